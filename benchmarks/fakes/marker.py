@@ -0,0 +1,77 @@
+"""
+Stand-in for the `marker` CLI used by the benchmarks.
+
+For every PDF in the input folder it writes `<output_dir>/<stem>/<stem>.md` with one section
+per page and FAKE_FIGURES_PER_PAGE figure PNGs per page (default 1), named the way Marker
+names them (with page separators for --paginate_output). FAKE_MARKER_LATENCY sets the
+simulated seconds per page, FAKE_OCR_LATENCY the extra seconds per OCR'd page. Pages with an
+image but no text layer (scans) come out empty unless --force_ocr is given. Like Marker,
+--workers parses that many PDFs at a time, handing them out in folder order.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from pypdf import PdfReader
+
+# 1x1 white PNG
+PNG_BYTES = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde"
+    b"\x00\x00\x00\x0cIDATx\x9cc\xf8\xff\xff?\x00\x05\xfe\x02\xfe\r\xefF\xb8\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+
+def is_scan(page) -> bool:
+    """Whether a page is an image without a text layer."""
+    resources = page.get("/Resources") or {}
+    return "/XObject" in resources and not (page.extract_text() or "").strip()
+
+
+def convert(pdf_file: Path, output_dir: Path, figures_per_page: int, latency: float, paginate: bool = False, force_ocr: bool = False, ocr_latency: float = 0.0) -> None:
+    """Writes synthetic Marker output for a single PDF."""
+    pages = PdfReader(pdf_file).pages
+    doc_dir = output_dir / pdf_file.stem
+    doc_dir.mkdir(parents=True, exist_ok=True)
+
+    lines = [f"# {pdf_file.stem}\n"]
+    for page in range(len(pages)):
+        time.sleep(latency + (ocr_latency if force_ocr else 0.0))
+        if paginate:
+            lines.append(f"\n\n{{{page}}}{'-' * 48}\n\n")
+        if not is_scan(pages[page]):
+            text = f"Synthetic text for page {page + 1} of {pdf_file.stem}."
+        else:
+            text = f"OCR text for page {page + 1} of {pdf_file.stem}." if force_ocr else ""
+        lines.append(f"\n## Page {page + 1}\n\n{text}\n")
+        for figure in range(figures_per_page):
+            image_name = f"_page_{page}_Figure_{figure + 1}.png"
+            (doc_dir / image_name).write_bytes(PNG_BYTES)
+            lines.append(f"\n![]({image_name})\n")
+    (doc_dir / f"{pdf_file.stem}.md").write_text("".join(lines), encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("in_folder")
+    parser.add_argument("--output_dir", required=True)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--force_ocr", action="store_true")
+    parser.add_argument("--languages", default="en")
+    parser.add_argument("--paginate_output", action="store_true")
+    args, _ = parser.parse_known_args()
+
+    latency = float(os.environ.get("FAKE_MARKER_LATENCY", "0"))
+    figures_per_page = int(os.environ.get("FAKE_FIGURES_PER_PAGE", "1"))
+    ocr_latency = float(os.environ.get("FAKE_OCR_LATENCY", "0"))
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [
+            executor.submit(convert, pdf_file, Path(args.output_dir), figures_per_page, latency, args.paginate_output, args.force_ocr, ocr_latency)
+            for pdf_file in sorted(Path(args.in_folder).glob("*.pdf"))
+        ]
+    for future in futures:
+        future.result()
+
+
+if __name__ == "__main__":
+    main()
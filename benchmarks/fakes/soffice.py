@@ -0,0 +1,101 @@
+"""
+Stand-in for `soffice --headless --convert-to pdf --outdir DIR FILE...` used by the benchmarks.
+
+Writes a PDF per input file with one line of text per page. The page count is read from a
+`pages: N` line in the input (default 1); pages listed in a `scanned: 2,3` line (1-based) get
+an image instead of text, like a scanned page. Inputs with a `corrupt` line get no PDF, as
+LibreOffice does for files it cannot read. FAKE_SOFFICE_LATENCY sets the simulated seconds
+per document.
+"""
+import argparse
+import os
+import re
+import time
+from pathlib import Path
+from typing import List
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+
+def page_count(input_file: Path) -> int:
+    """Reads the requested page count from the synthetic input document."""
+    try:
+        with open(input_file, "r", encoding="utf-8", errors="ignore") as f:
+            match = re.search(r"^pages:\s*(\d+)", f.read(4096), re.MULTILINE)
+    except OSError:
+        return 1
+    return int(match.group(1)) if match else 1
+
+
+def is_corrupt(input_file: Path) -> bool:
+    """Whether the synthetic input document is marked as unreadable."""
+    try:
+        with open(input_file, "r", encoding="utf-8", errors="ignore") as f:
+            return re.search(r"^corrupt$", f.read(4096), re.MULTILINE) is not None
+    except OSError:
+        return False
+
+
+def scanned_pages(input_file: Path) -> List[int]:
+    """Reads the 1-based numbers of the pages to render as scans from the synthetic input document."""
+    try:
+        with open(input_file, "r", encoding="utf-8", errors="ignore") as f:
+            match = re.search(r"^scanned:\s*([\d,\s]+)$", f.read(4096), re.MULTILINE)
+    except OSError:
+        return []
+    return [int(page) for page in re.findall(r"\d+", match.group(1))] if match else []
+
+
+def add_page(writer: PdfWriter, text: str = None) -> None:
+    """Adds an A4 page with a line of text, or with a full-page image (a scan) if `text` is None."""
+    page = writer.add_blank_page(width=595, height=842)
+    content = DecodedStreamObject()
+    if text is None:
+        image = DecodedStreamObject()
+        image.set_data(b"\x80\x80\x80")
+        image.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Image"),
+            NameObject("/Width"): NumberObject(1),
+            NameObject("/Height"): NumberObject(1),
+            NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+            NameObject("/BitsPerComponent"): NumberObject(8),
+        })
+        resources = {NameObject("/XObject"): DictionaryObject({NameObject("/Im1"): writer._add_object(image)})}
+        content.set_data(b"q 595 0 0 842 0 0 cm /Im1 Do Q")
+    else:
+        font = DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        })
+        resources = {NameObject("/Font"): DictionaryObject({NameObject("/F1"): writer._add_object(font)})}
+        content.set_data(f"BT /F1 12 Tf 72 770 Td ({text}) Tj ET".encode("latin-1"))
+    page[NameObject("/Resources")] = DictionaryObject(resources)
+    page[NameObject("/Contents")] = writer._add_object(content)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--convert-to", dest="convert_to", required=True)
+    parser.add_argument("--outdir", required=True)
+    parser.add_argument("files", nargs="+")
+    args, _ = parser.parse_known_args()
+
+    latency = float(os.environ.get("FAKE_SOFFICE_LATENCY", "0"))
+    for name in args.files:
+        input_file = Path(name)
+        time.sleep(latency)
+        if is_corrupt(input_file):
+            continue
+        writer = PdfWriter()
+        scanned = scanned_pages(input_file)
+        for page in range(1, page_count(input_file) + 1):
+            add_page(writer, None if page in scanned else f"Page {page} of {input_file.stem}, " + "born-digital text " * 8)
+        with open(Path(args.outdir) / f"{input_file.stem}.pdf", "wb") as f:
+            writer.write(f)
+
+
+if __name__ == "__main__":
+    main()
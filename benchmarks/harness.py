@@ -0,0 +1,96 @@
+"""
+Shared helpers for the benchmarks: fake external tools, synthetic corpora and resource usage.
+"""
+import os
+import resource
+import stat
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+FAKES_DIR = Path(__file__).resolve().parent / "fakes"
+
+
+def install_fake_tools(bin_dir: Path) -> Dict[str, Path]:
+    """
+    Creates `soffice`, `libreoffice` and `marker` executables in `bin_dir` that run the fakes.
+
+    Args:
+        bin_dir (Path): Directory to create the executables in.
+
+    Returns:
+        Dict[str, Path]: Mapping of tool name to executable path.
+    """
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    tools = {"soffice": "soffice.py", "libreoffice": "soffice.py", "marker": "marker.py"}
+    paths = {}
+    for name, script in tools.items():
+        path = bin_dir / name
+        path.write_text(f"#!/bin/sh\nexec \"{sys.executable}\" \"{FAKES_DIR / script}\" \"$@\"\n")
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        paths[name] = path
+    return paths
+
+
+@contextmanager
+def fake_tool_env(bin_dir: Path, soffice_latency: float = 0.0, marker_latency: float = 0.0, figures_per_page: int = 1, ocr_latency: float = 0.0) -> Iterator[Dict[str, Path]]:
+    """
+    Installs the fake tools, puts them first on PATH and configures them for the duration of the block.
+
+    Args:
+        bin_dir (Path): Directory to create the executables in.
+        soffice_latency (float): Simulated LibreOffice seconds per document.
+        marker_latency (float): Simulated Marker seconds per page.
+        figures_per_page (int): Figures the fake Marker emits per page.
+        ocr_latency (float): Additional simulated Marker seconds per page parsed with --force_ocr.
+    """
+    tools = install_fake_tools(bin_dir)
+    overrides = {
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "FAKE_SOFFICE_LATENCY": str(soffice_latency),
+        "FAKE_MARKER_LATENCY": str(marker_latency),
+        "FAKE_FIGURES_PER_PAGE": str(figures_per_page),
+        "FAKE_OCR_LATENCY": str(ocr_latency),
+    }
+    previous = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield tools
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def make_corpus(input_dir: Path, page_counts: List[int], suffix: str = ".docx") -> List[Path]:
+    """
+    Writes one synthetic document per entry of `page_counts`; the fake soffice reads the page count back.
+
+    Args:
+        input_dir (Path): Directory to write the documents to.
+        page_counts (List[int]): Number of pages for each document.
+        suffix (str): File extension of the documents.
+
+    Returns:
+        List[Path]: The created documents.
+    """
+    input_dir.mkdir(parents=True, exist_ok=True)
+    documents = []
+    for index, pages in enumerate(page_counts):
+        path = input_dir / f"doc_{index:04d}{suffix}"
+        path.write_text(f"pages: {pages}\nSynthetic document {index}.\n", encoding="utf-8")
+        documents.append(path)
+    return documents
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Returns the peak resident set size of this process and of its waited-for children, in MiB."""
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
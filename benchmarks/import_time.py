@@ -0,0 +1,102 @@
+"""
+Import-time benchmark for the LlaMarker CLI.
+
+Imports a module in a fresh interpreter with `python -X importtime`, reports the cumulative
+import time and the slowest modules it imports directly, and fails if the time exceeds the
+budget or if a heavy dependency (which should only be loaded by the stage that needs it) was
+imported.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module llamarker --budget-ms 150
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+# Dependencies that must not be imported at startup
+HEAVY_MODULES = ("matplotlib", "pypdf", "ollama", "pydantic", "streamlit")
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """
+    Imports `module` in a fresh interpreter and parses the `-X importtime` report.
+
+    Args:
+        module (str): Module to import, e.g. "llamarker.main".
+
+    Returns:
+        Dict[str, Any]: Cumulative import time of `module` in ms, the modules it imports
+        directly (name, cumulative ms) and the heavy modules that were loaded.
+    """
+    probe = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, check=True)
+
+    # The report lists modules in post-order; nesting is shown by two spaces of indent per level
+    total, children, pending = 0.0, [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # Header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entry = (name.strip(), int(cumulative) / 1000)
+        if depth == 1:
+            pending.append(entry)
+        elif depth == 0:
+            if entry[0] == module:
+                total, children = entry[1], pending
+            pending = []
+
+    return {
+        "module": module,
+        "total_ms": total,
+        "top_imports": sorted(children, key=lambda item: item[1], reverse=True),
+        "heavy_modules": [name for name in result.stdout.strip().split(",") if name],
+    }
+
+
+def check(results: Dict[str, Any], budget_ms: float) -> List[str]:
+    """Returns the budget violations of a measurement; empty if none."""
+    problems = []
+    if results["total_ms"] > budget_ms:
+        problems.append(f"import of {results['module']} took {results['total_ms']:.1f} ms (budget: {budget_ms:.0f} ms)")
+    for name in results["heavy_modules"]:
+        problems.append(f"importing {results['module']} loads '{name}'; import it in the stage that needs it")
+    return problems
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure the import time of the LlaMarker CLI.")
+    parser.add_argument("--module", type=str, default="llamarker.main", help="Module to import (default: llamarker.main).")
+    parser.add_argument("--budget-ms", type=float, default=200.0, help="Maximum allowed median import time in ms (default: 200).")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to measure; the median is checked (default: 5).")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest direct imports to print (default: 10).")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    results = sorted(runs, key=lambda run: run["total_ms"])[len(runs) // 2]
+    results["total_ms"] = statistics.median(run["total_ms"] for run in runs)
+
+    print(f"import {args.module}: {results['total_ms']:.1f} ms (median of {args.runs} runs)")
+    for name, ms in results["top_imports"][:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    problems = check(results, args.budget_ms)
+    if problems:
+        print("\nImport budget exceeded:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print("\nWithin import budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Load test for `llamarker serve`.
+
+Starts the ingestion service in-process with the fake `soffice`/`marker` executables and a
+stub Ollama server, submits documents over HTTP from concurrent clients, and reports the
+p50/p99 end-to-end latency (submit until the job is done) and job throughput.
+
+Usage:
+    python -m benchmarks.load_test --requests 50 --concurrency 8 --job-workers 2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+
+
+def submit_and_wait(base_url: str, document: Path, poll_interval: float = 0.05, timeout: float = 300.0) -> Dict[str, Any]:
+    """Submits one document and polls until its job ends; returns the final job with the client-side latency."""
+    start = time.perf_counter()
+    request = urllib.request.Request(f"{base_url}/jobs?filename={document.name}", data=document.read_bytes(), method="POST")
+    with urllib.request.urlopen(request) as response:
+        job_id = json.load(response)["id"]
+    while time.perf_counter() - start < timeout:
+        with urllib.request.urlopen(f"{base_url}/jobs/{job_id}") as response:
+            job = json.load(response)
+        if job["status"] in ("done", "failed", "cancelled"):
+            job["latency"] = time.perf_counter() - start
+            return job
+        time.sleep(poll_interval)
+    raise TimeoutError(f"Job {job_id} did not finish within {timeout}s")
+
+
+def run_load_test(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs the service against concurrent clients.
+
+    Args:
+        config (Dict[str, Any]): Load test settings (see `parse_args`).
+
+    Returns:
+        Dict[str, Any]: Latency percentiles, throughput and job outcomes.
+    """
+    from llamarker.ollama_pool import percentile
+    from llamarker.server import IngestService, ServiceHTTPServer
+
+    with tempfile.TemporaryDirectory() as work, StubOllamaServer(latency=config["model_latency"]) as stub:
+        work = Path(work)
+        documents = make_corpus(work / "corpus", [config["pages"]] * config["requests"])
+        with fake_tool_env(work / "bin", config["soffice_latency"], config["marker_latency"], config["figures_per_page"]) as tools:
+            cwd = os.getcwd()
+            os.chdir(work)  # Keep the service's logs out of the caller's directory
+            service = IngestService(work / "state", model="stub", marker_path=str(tools["marker"]), ollama_hosts=[stub.host], job_workers=config["job_workers"], in_process_marker=False)
+            server = ServiceHTTPServer(service, port=0)
+            threading.Thread(target=server.serve_forever, name="llamarker-load-test", daemon=True).start()
+            try:
+                service.start()
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=config["concurrency"]) as clients:
+                    jobs = list(clients.map(lambda document: submit_and_wait(server.url, document), documents))
+                elapsed = time.perf_counter() - start
+            finally:
+                server.shutdown()
+                server.server_close()
+                service.stop()
+                os.chdir(cwd)
+
+    latencies = [job["latency"] for job in jobs]
+    statuses: Dict[str, int] = {}
+    for job in jobs:
+        statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+    return {
+        "config": config,
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "max_s": round(max(latencies), 3),
+        "jobs_per_s": round(len(jobs) / max(elapsed, 1e-9), 3),
+        "statuses": statuses,
+        "model_requests": stub.requests,
+    }
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure request latency of `llamarker serve` with fake external tools.")
+    parser.add_argument("--requests", type=int, default=40, help="Number of documents submitted (default: 40).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8).")
+    parser.add_argument("--job-workers", type=int, default=2, help="Jobs the service runs at the same time (default: 2).")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per document (default: 2).")
+    parser.add_argument("--figures-per-page", type=int, default=1, help="Figures emitted per page by the fake Marker (default: 1).")
+    parser.add_argument("--soffice-latency", type=float, default=0.02, help="Fake LibreOffice seconds per document (default: 0.02).")
+    parser.add_argument("--marker-latency", type=float, default=0.005, help="Fake Marker seconds per page (default: 0.005).")
+    parser.add_argument("--model-latency", type=float, default=0.01, help="Stub Ollama seconds per request (default: 0.01).")
+    parser.add_argument("--output", type=str, default=None, help="Write the results as JSON to this path.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    config = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "job_workers": args.job_workers,
+        "pages": args.pages,
+        "figures_per_page": args.figures_per_page,
+        "soffice_latency": args.soffice_latency,
+        "marker_latency": args.marker_latency,
+        "model_latency": args.model_latency,
+    }
+    results = run_load_test(config)
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}, job workers: {args.job_workers}")
+    print(f"latency p50: {results['p50_s']:.3f}s  p99: {results['p99_s']:.3f}s  max: {results['max_s']:.3f}s")
+    print(f"throughput: {results['jobs_per_s']:.2f} jobs/s, outcomes: {results['statuses']}, model requests: {results['model_requests']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Results written to {args.output}")
+    return 0 if set(results["statuses"]) == {"done"} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+End-to-end throughput benchmark for the LlaMarker pipeline.
+
+Runs conversion, Marker parsing and image enrichment over a synthetic corpus, using the fake
+`soffice`/`marker` executables and a stub Ollama server, and reports documents/s, pages/s and
+figures/s per stage plus peak RSS.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --save-baseline benchmarks/baseline.json
+    python -m benchmarks.pipeline_benchmark --compare benchmarks/baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.harness import fake_tool_env, make_corpus, peak_rss_mb
+from benchmarks.stub_ollama import StubOllamaServer
+
+THROUGHPUT_METRICS = ("documents_per_s", "pages_per_s", "figures_per_s")
+
+
+def throughput(seconds: float, documents: int, pages: int, figures: int) -> Dict[str, float]:
+    """Builds the per-stage result entry."""
+    seconds = max(seconds, 1e-9)
+    return {
+        "seconds": round(seconds, 4),
+        "documents_per_s": round(documents / seconds, 3),
+        "pages_per_s": round(pages / seconds, 3),
+        "figures_per_s": round(figures / seconds, 3),
+    }
+
+
+def run_benchmark(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs the pipeline once over a synthetic corpus.
+
+    Args:
+        config (Dict[str, Any]): Benchmark settings (see `parse_args`).
+
+    Returns:
+        Dict[str, Any]: Per-stage timings and throughput, totals and peak RSS.
+    """
+    from llamarker.main import LlaMarker
+
+    page_counts = [config["pages"]] * config["documents"]
+    with tempfile.TemporaryDirectory() as work, StubOllamaServer(latency=config["model_latency"]) as stub:
+        work = Path(work)
+        make_corpus(work / "input", page_counts)
+        with fake_tool_env(work / "bin", config["soffice_latency"], config["marker_latency"], config["figures_per_page"]) as tools:
+            cwd = os.getcwd()
+            os.chdir(work)  # Keep the run's logs out of the caller's directory
+            try:
+                llamarker = LlaMarker(input_dir=str(work / "input"), output_dir=str(work / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host])
+                stage_calls = [
+                    ("convert", lambda: llamarker.process_documents()),
+                    ("marker", lambda: llamarker.parse_with_marker(workers=config["marker_workers"])),
+                    ("enrich", lambda: llamarker.process_subdirectories(model="stub", qa_evaluator=config["qa_evaluator"], workers=config["doc_workers"], image_workers=config["image_workers"])),
+                ]
+                timings = {}
+                for stage, call in stage_calls:
+                    start = time.perf_counter()
+                    call()
+                    timings[stage] = time.perf_counter() - start
+            finally:
+                os.chdir(cwd)
+
+        documents = len(page_counts)
+        pages = sum(pages for _, pages in llamarker.generate_summary())
+        figures = documents * config["pages"] * config["figures_per_page"]
+        stages = {stage: throughput(seconds, documents, pages, figures) for stage, seconds in timings.items()}
+        return {
+            "config": config,
+            "stages": stages,
+            "total": throughput(sum(timings.values()), documents, pages, figures),
+            "model_requests": stub.requests,
+            "peak_rss_mb": {key: round(value, 1) for key, value in peak_rss_mb().items()},
+        }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compares a run against a saved baseline.
+
+    Args:
+        results (Dict[str, Any]): Output of `run_benchmark`.
+        baseline (Dict[str, Any]): Previously saved output of `run_benchmark`.
+        tolerance (float): Allowed relative slowdown or memory growth, e.g. 0.2 for 20%.
+
+    Returns:
+        List[str]: Human-readable regressions; empty if none.
+    """
+    regressions = []
+    if results["config"] != baseline["config"]:
+        regressions.append("Benchmark configuration differs from the baseline; results are not comparable.")
+        return regressions
+
+    for stage, base in list(baseline["stages"].items()) + [("total", baseline["total"])]:
+        current = results["total"] if stage == "total" else results["stages"].get(stage)
+        if current is None:
+            regressions.append(f"{stage}: stage missing from results")
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if current[metric] < base[metric] * (1 - tolerance):
+                regressions.append(f"{stage}: {metric} dropped from {base[metric]} to {current[metric]}")
+
+    base_rss = baseline["peak_rss_mb"]["self"]
+    if results["peak_rss_mb"]["self"] > base_rss * (1 + tolerance):
+        regressions.append(f"peak RSS grew from {base_rss} MiB to {results['peak_rss_mb']['self']} MiB")
+    return regressions
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Prints a per-stage throughput table."""
+    print(f"{'stage':<10}{'seconds':>10}{'docs/s':>10}{'pages/s':>10}{'figures/s':>12}")
+    for stage, row in list(results["stages"].items()) + [("total", results["total"])]:
+        print(f"{stage:<10}{row['seconds']:>10.3f}{row['documents_per_s']:>10.2f}{row['pages_per_s']:>10.2f}{row['figures_per_s']:>12.2f}")
+    rss = results["peak_rss_mb"]
+    print(f"peak RSS: {rss['self']:.1f} MiB (children: {rss['children']:.1f} MiB), model requests: {results['model_requests']}")
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the LlaMarker pipeline with fake external tools.")
+    parser.add_argument("--documents", type=int, default=20, help="Number of synthetic documents (default: 20).")
+    parser.add_argument("--pages", type=int, default=5, help="Pages per document (default: 5).")
+    parser.add_argument("--figures-per-page", type=int, default=1, help="Figures emitted per page by the fake Marker (default: 1).")
+    parser.add_argument("--soffice-latency", type=float, default=0.02, help="Fake LibreOffice seconds per document (default: 0.02).")
+    parser.add_argument("--marker-latency", type=float, default=0.005, help="Fake Marker seconds per page (default: 0.005).")
+    parser.add_argument("--model-latency", type=float, default=0.01, help="Stub Ollama seconds per request (default: 0.01).")
+    parser.add_argument("--marker-workers", type=int, default=4, help="Marker workers (default: 4).")
+    parser.add_argument("--doc-workers", type=int, default=1, help="Documents enriched concurrently (default: 1).")
+    parser.add_argument("--image-workers", type=int, default=1, help="Images processed concurrently per document (default: 1).")
+    parser.add_argument("--qa-evaluator", action="store_true", help="Enable the QA evaluator agent.")
+    parser.add_argument("--output", type=str, default=None, help="Write the results as JSON to this path.")
+    parser.add_argument("--save-baseline", type=str, default=None, help="Save the results as the new baseline at this path.")
+    parser.add_argument("--compare", type=str, default=None, help="Compare against the baseline at this path; exit 1 on regression.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression for --compare (default: 0.2).")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    config = {
+        "documents": args.documents,
+        "pages": args.pages,
+        "figures_per_page": args.figures_per_page,
+        "soffice_latency": args.soffice_latency,
+        "marker_latency": args.marker_latency,
+        "model_latency": args.model_latency,
+        "marker_workers": args.marker_workers,
+        "doc_workers": args.doc_workers,
+        "image_workers": args.image_workers,
+        "qa_evaluator": args.qa_evaluator,
+    }
+    results = run_benchmark(config)
+    print_report(results)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        Path(path).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Results written to {path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
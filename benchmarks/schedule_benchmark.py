@@ -0,0 +1,133 @@
+"""
+Makespan benchmark for document scheduling on a skewed corpus.
+
+Builds a corpus of many small documents and a few large ones that are discovered last, runs
+Marker and enrichment with the fake tools and stub Ollama server once per schedule ("fifo":
+discovery order, "lpt": longest first), and reports the wall time of each stage next to the
+makespan predicted from the page counts.
+
+Usage:
+    python -m benchmarks.schedule_benchmark
+    python -m benchmarks.schedule_benchmark --small 12 --large 2 --large-pages 10 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.planning import longest_first, makespan
+
+
+def skewed_page_counts(small: int, large: int, large_pages: int) -> List[int]:
+    """Page counts of the corpus: `small` one-page documents followed by `large` big ones."""
+    return [1] * small + [large_pages] * large
+
+
+def predicted_makespan(page_counts: List[int], workers: int, schedule: str) -> float:
+    """Makespan in pages when `workers` take the documents in the schedule's order."""
+    ordered = longest_first(page_counts, lambda pages: pages) if schedule == "lpt" else page_counts
+    return makespan(ordered, workers)
+
+
+def run_schedule(config: Dict[str, Any], schedule: str) -> Dict[str, float]:
+    """
+    Runs Marker and enrichment over the skewed corpus with one schedule.
+
+    Returns:
+        Dict[str, float]: Wall seconds of the "marker" and "enrich" stages and their sum.
+    """
+    from llamarker.main import LlaMarker
+
+    page_counts = skewed_page_counts(config["small"], config["large"], config["large_pages"])
+    with tempfile.TemporaryDirectory() as work, StubOllamaServer(latency=config["model_latency"]) as stub:
+        work = Path(work)
+        make_corpus(work / "input", page_counts)
+        with fake_tool_env(work / "bin", marker_latency=config["marker_latency"]) as tools:
+            cwd = os.getcwd()
+            os.chdir(work)  # Keep the run's logs out of the caller's directory
+            try:
+                llamarker = LlaMarker(input_dir=str(work / "input"), output_dir=str(work / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host], schedule=schedule)
+                llamarker.process_documents()
+                timings = {}
+                start = time.perf_counter()
+                llamarker.parse_with_marker(workers=config["workers"])
+                timings["marker"] = time.perf_counter() - start
+                start = time.perf_counter()
+                llamarker.process_subdirectories(model="stub", qa_evaluator=False, workers=config["workers"])
+                timings["enrich"] = time.perf_counter() - start
+                llamarker.results_sink.close()
+            finally:
+                os.chdir(cwd)
+    timings["total"] = timings["marker"] + timings["enrich"]
+    return {stage: round(seconds, 3) for stage, seconds in timings.items()}
+
+
+def run_benchmark(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs both schedules and computes the makespan reduction of "lpt" over "fifo".
+
+    Args:
+        config (Dict[str, Any]): Benchmark settings (see `parse_args`).
+
+    Returns:
+        Dict[str, Any]: Per-schedule stage timings, predicted makespans in pages and the relative reduction.
+    """
+    page_counts = skewed_page_counts(config["small"], config["large"], config["large_pages"])
+    results = {"config": config, "schedules": {}}
+    for schedule in ("fifo", "lpt"):
+        results["schedules"][schedule] = {
+            "seconds": run_schedule(config, schedule),
+            "predicted_pages": predicted_makespan(page_counts, config["workers"], schedule),
+        }
+    fifo, lpt = results["schedules"]["fifo"]["seconds"]["total"], results["schedules"]["lpt"]["seconds"]["total"]
+    results["reduction"] = round(1 - lpt / fifo, 3) if fifo else 0.0
+    return results
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Prints the stage timings of each schedule."""
+    print(f"{'schedule':<10}{'marker s':>10}{'enrich s':>10}{'total s':>10}{'predicted pages':>17}")
+    for schedule, row in results["schedules"].items():
+        seconds = row["seconds"]
+        print(f"{schedule:<10}{seconds['marker']:>10.3f}{seconds['enrich']:>10.3f}{seconds['total']:>10.3f}{row['predicted_pages']:>17.0f}")
+    print(f"makespan reduction with lpt: {results['reduction']:.1%}")
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare fifo and longest-first scheduling on a skewed synthetic corpus.")
+    parser.add_argument("--small", type=int, default=9, help="Number of one-page documents (default: 9).")
+    parser.add_argument("--large", type=int, default=1, help="Number of large documents, discovered last (default: 1).")
+    parser.add_argument("--large-pages", type=int, default=9, help="Pages per large document (default: 9).")
+    parser.add_argument("--workers", type=int, default=3, help="Marker processes and documents enriched concurrently (default: 3).")
+    parser.add_argument("--marker-latency", type=float, default=0.2, help="Fake Marker seconds per page (default: 0.2).")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Stub Ollama seconds per request (default: 0.05).")
+    parser.add_argument("--output", type=str, default=None, help="Write the results as JSON to this path.")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    config = {
+        "small": args.small,
+        "large": args.large,
+        "large_pages": args.large_pages,
+        "workers": args.workers,
+        "marker_latency": args.marker_latency,
+        "model_latency": args.model_latency,
+    }
+    results = run_benchmark(config)
+    print_report(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
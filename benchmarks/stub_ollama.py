@@ -0,0 +1,85 @@
+"""
+Local HTTP server speaking the subset of the Ollama API that LlaMarker uses.
+
+`/api/chat` answers every agent with a single JSON document containing the keys each
+agent looks for, after a configurable delay. `/api/tags` answers health checks.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPONSE_CONTENT = json.dumps({
+    "is_logo": False,
+    "Detected Elements": ["Text"],
+    "Language": "English",
+    "Text Content": "Synthetic figure description.",
+    "best_response": 1,
+    "translated_text": "Synthetic figure description.",
+})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json({"models": []})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+        self._send_json({
+            "model": "stub",
+            "created_at": "2025-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": RESPONSE_CONTENT},
+            "done": True,
+        })
+
+
+class StubOllamaServer:
+    """Runs the stub server on a background thread."""
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        """
+        Args:
+            latency (float): Seconds to wait before answering each chat request.
+            port (int): Port to listen on; 0 picks a free port.
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.server.latency = latency
+        self.server.requests = 0
+        self.server.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def host(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def requests(self) -> int:
+        return self.server.requests
+
+    def start(self) -> "StubOllamaServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
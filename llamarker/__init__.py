@@ -1,7 +1,26 @@
 # llamarker/__init__.py
 
-from .file_to_pdf_converter import FileToPDFConverter
-from .img_processor import ImageProcessor
-from .main import LlaMarker
+__all__ = ["DocumentParser", "FileToPDFConverter", "ImageProcessor", "LlaMarker", "parse_document"]
 
-__all__ = ["FileToPDFConverter", "ImageProcessor", "LlaMarker"]
+# Classes are imported on first access so that `import llamarker` does not load pypdf, ollama or pydantic
+_LAZY_IMPORTS = {
+    "DocumentParser": "llamarker.api",
+    "FileToPDFConverter": "llamarker.file_to_pdf_converter",
+    "ImageProcessor": "llamarker.img_processor",
+    "LlaMarker": "llamarker.main",
+    "parse_document": "llamarker.api",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'llamarker' has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
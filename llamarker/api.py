@@ -0,0 +1,225 @@
+# llamarker/api.py
+"""
+In-process Python API: document bytes in, Markdown and figure metadata out.
+
+Unlike `LlaMarker`, which works on folders and writes `PDFs/` and `ParsedFiles/`, `DocumentParser`
+keeps each document's intermediates in a private scratch folder, on tmpfs (`/dev/shm`) when
+available, and removes it as soon as the result is in memory.
+
+    parser = DocumentParser(model="llama3.2-vision")
+    with open("report.docx", "rb") as f:
+        document = parser.parse(f, "report.docx")
+    print(document["markdown"])
+"""
+import io
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from llamarker.ingest import CHUNK_SIZE, SUPPORTED_EXTENSIONS
+from llamarker.plaintext import DIRECT_EXTENSIONS, convert_to_markdown
+from llamarker.scheduler import ModelCallScheduler
+
+IMAGE_REF_PATTERN = re.compile(r"!\[\]\(([^)\n]*)\)")
+
+
+def default_scratch_root() -> Optional[str]:
+    """Returns `/dev/shm` if it is a writable tmpfs, else None (the system temporary directory)."""
+    shm = Path("/dev/shm")
+    return str(shm) if shm.is_dir() and os.access(shm, os.W_OK) else None
+
+
+class DocumentParser:
+    """
+    Converts single documents given as bytes or file-like objects to Markdown, with the extracted
+    figure text inline, without writing to the caller's file system.
+
+    A parser is meant to be created once and reused: it keeps the Marker runner, the LibreOffice
+    profile, the model-call scheduler and the Ollama connection pool for all documents. `parse` is
+    thread-safe; every call works in its own scratch folder.
+    """
+
+    def __init__(self, model: str = "llama3.2-vision", marker_path: str = None, marker_runner=None, ollama_hosts: List[str] = None, scheduler: ModelCallScheduler = None, qa_evaluator: bool = False, image_workers: int = 1, keep_alive: str = None, scratch_dir: str = None, direct_text: bool = True, logger: logging.Logger = None):
+        """
+        Args:
+            model (str): Ollama model used to enrich figures. Defaults to "llama3.2-vision".
+            marker_path (str, optional): Path to the Marker executable, used when no `marker_runner` is given. Defaults to the one in the PATH.
+            marker_runner (optional): Runs Marker in-process with its models loaded once, e.g. `llamarker.server.InProcessMarker`.
+            ollama_hosts (List[str], optional): Ollama hosts to balance requests across. Defaults to the local host.
+            scheduler (ModelCallScheduler, optional): Scheduler that gates model calls. Defaults to a new, unlimited one.
+            qa_evaluator (bool): Whether to pick the best of several extractions per figure. Defaults to False.
+            image_workers (int): Figures of one document processed concurrently. Defaults to 1.
+            keep_alive (str, optional): How long Ollama keeps the model loaded after each call. Defaults to Ollama's default.
+            scratch_dir (str, optional): Where per-document scratch folders are created. Defaults to `/dev/shm` if available,
+                otherwise the system temporary directory.
+            direct_text (bool): Convert .txt and .csv documents straight to Markdown instead of through LibreOffice and Marker. Defaults to True.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.model = model
+        self.marker_runner = marker_runner
+        self.marker_path = marker_path or shutil.which("marker")
+        if not self.marker_runner and not self.marker_path:
+            raise FileNotFoundError("The 'marker' executable is required but not found in the PATH.")
+        self.qa_evaluator = qa_evaluator
+        self.image_workers = max(1, image_workers)
+        self.keep_alive = keep_alive
+        self.direct_text = direct_text
+        self.scheduler = scheduler or ModelCallScheduler(logger=self.logger)
+        self.backend = None
+        if ollama_hosts:
+            from llamarker.ollama_pool import OllamaBackendPool
+            self.backend = OllamaBackendPool(ollama_hosts, logger=self.logger)
+        if scratch_dir:
+            Path(scratch_dir).mkdir(parents=True, exist_ok=True)
+        self.scratch_root = Path(tempfile.mkdtemp(prefix="llamarker_api_", dir=scratch_dir or default_scratch_root()))
+        self.libreoffice_profile = self.scratch_root / "libreoffice_profile"
+        self._conversions = threading.Lock()
+
+    def parse(self, document: Union[bytes, BinaryIO], filename: str, enrich: bool = True, force_ocr: bool = False, languages: str = "en") -> Dict[str, Any]:
+        """
+        Converts one document to Markdown.
+
+        Args:
+            document (Union[bytes, BinaryIO]): The document's content, or a binary file-like object to read it from.
+            filename (str): Original file name; its extension selects the conversion.
+            enrich (bool): Describe figures with the vision model. Without it, figure references are left as they are. Defaults to True.
+            force_ocr (bool): Force OCR on all pages. Defaults to False.
+            languages (str): Comma-separated languages for OCR. Defaults to "en".
+
+        Returns:
+            Dict[str, Any]: `markdown` (str), `pages` (int), `figures` (one dict per figure: `image`, `is_logo`,
+                `contains_info`, `extracted_info` and `data`, the image bytes) and `seconds`.
+
+        Raises:
+            ValueError: If the file type is not supported.
+            RuntimeError: If the document could not be converted or parsed.
+        """
+        name = Path(filename).name
+        if Path(name).suffix.lower() not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file type: {filename}")
+        start = time.perf_counter()
+        scratch = Path(tempfile.mkdtemp(prefix="doc_", dir=self.scratch_root))
+        try:
+            source = self._write_input(document, name, scratch)
+            if self.direct_text and source.suffix.lower() in DIRECT_EXTENSIONS:
+                markdown_file = scratch / "parsed" / source.stem / f"{source.stem}.md"
+                markdown_file.parent.mkdir(parents=True)
+                pages = convert_to_markdown(source, markdown_file)
+            else:
+                pdf_file, pages = self._to_pdf(source, scratch)
+                markdown_file = self._run_marker(pdf_file, scratch / "parsed", force_ocr, languages)
+            figures = self._enrich(markdown_file) if enrich else []
+            markdown = self._render(markdown_file, figures)
+            for figure in figures:
+                figure["data"] = Path(figure.pop("new_image_path")).read_bytes()
+                figure.pop("old_image_path", None)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        seconds = time.perf_counter() - start
+        self.logger.info(f"Parsed {name}: {pages} pages, {len(figures)} figures in {seconds:.2f}s")
+        return {"markdown": markdown, "pages": pages, "figures": figures, "seconds": seconds}
+
+    @staticmethod
+    def _write_input(document: Union[bytes, BinaryIO], name: str, scratch: Path) -> Path:
+        """Writes the document to the scratch folder."""
+        source = scratch / "input" / name
+        source.parent.mkdir()
+        stream = io.BytesIO(document) if isinstance(document, (bytes, bytearray, memoryview)) else document
+        with open(source, "wb") as f:
+            shutil.copyfileobj(stream, f, CHUNK_SIZE)
+        return source
+
+    def _to_pdf(self, source: Path, scratch: Path) -> Tuple[Path, int]:
+        """Converts the document to PDF unless it already is one."""
+        name = source.name
+        if source.suffix.lower() == ".pdf":
+            from pypdf import PdfReader
+
+            return source, len(PdfReader(source).pages)
+
+        from llamarker.file_to_pdf_converter import FileToPDFConverter
+
+        (scratch / "pdf").mkdir()
+        converter = FileToPDFConverter(file_path=str(source), temp_dir=str(scratch / "pdf"), logger=self.logger, profile_dir=str(self.libreoffice_profile))
+        # One LibreOffice instance per profile at a time
+        with self._conversions:
+            converter.convert_file(source)
+        if not converter.results:
+            raise RuntimeError(f"Could not convert {name} to PDF.")
+        pdf_file, pages = converter.results[-1]
+        source.unlink()
+        return Path(pdf_file), pages
+
+    def _run_marker(self, pdf_file: Path, output_dir: Path, force_ocr: bool, languages: str) -> Path:
+        """Runs Marker on one PDF and returns the Markdown file it wrote."""
+        if self.marker_runner:
+            self.marker_runner.convert(pdf_file, output_dir, force_ocr=force_ocr, languages=languages)
+        else:
+            command = [self.marker_path, str(pdf_file.parent), "--output_dir", str(output_dir), "--workers", "1", "--languages", languages]
+            if force_ocr:
+                command.append("--force_ocr")
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        markdown_file = output_dir / pdf_file.stem / f"{pdf_file.stem}.md"
+        if not markdown_file.exists():
+            raise RuntimeError(f"Marker produced no Markdown for {pdf_file.name}.")
+        return markdown_file
+
+    def _enrich(self, markdown_file: Path) -> List[Dict[str, Any]]:
+        """Describes the document's figures; the images end up in the scratch `pics` folder."""
+        from llamarker.img_processor import ImageProcessor
+
+        processor = ImageProcessor(folder_path=str(markdown_file.parent), model=self.model, logger=self.logger, qa_evaluator=self.qa_evaluator, backend=self.backend, scheduler=self.scheduler, workers=self.image_workers, keep_alive=self.keep_alive)
+        processor.process_images()
+        figures = list(processor.results)
+        processor.results.close()
+        return figures
+
+    @staticmethod
+    def _render(markdown_file: Path, figures: List[Dict[str, Any]]) -> str:
+        """Returns the Markdown with figure references replaced by their extracted text, and logos removed."""
+        replacements = {}
+        for figure in figures:
+            if figure["contains_info"]:
+                replacements[figure["image"]] = f"![]({figure['image']}) \n {figure['extracted_info']}"
+            else:
+                replacements[figure["image"]] = ""
+        text = markdown_file.read_text(encoding="utf-8")
+        return IMAGE_REF_PATTERN.sub(lambda match: replacements.get(match.group(1), match.group(0)), text)
+
+    def close(self) -> None:
+        """Stops the Ollama connection pool and removes the scratch folder."""
+        if self.backend:
+            self.backend.stop()
+        shutil.rmtree(self.scratch_root, ignore_errors=True)
+
+    def __enter__(self) -> "DocumentParser":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def parse_document(document: Union[bytes, BinaryIO], filename: str, **options: Any) -> Dict[str, Any]:
+    """
+    Converts one document to Markdown with a throwaway `DocumentParser`. Services converting
+    many documents should keep a `DocumentParser` instead, so resources are reused.
+
+    Args:
+        document (Union[bytes, BinaryIO]): The document's content, or a binary file-like object to read it from.
+        filename (str): Original file name; its extension selects the conversion.
+        **options: `DocumentParser` arguments, plus `enrich`, `force_ocr` and `languages` for `parse`.
+
+    Returns:
+        Dict[str, Any]: See `DocumentParser.parse`.
+    """
+    parse_options = {key: options.pop(key) for key in ("enrich", "force_ocr", "languages") if key in options}
+    with DocumentParser(**options) as parser:
+        return parser.parse(document, filename, **parse_options)
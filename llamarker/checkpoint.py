@@ -0,0 +1,75 @@
+# llamarker/checkpoint.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class CheckpointStore:
+    """
+    Durable record of which documents finished which pipeline stage, and of the figures
+    already enriched, so an interrupted run can be resumed without redoing finished work.
+
+    Backed by SQLite: every update is its own transaction, so the state on disk is always
+    consistent, even if the process dies in the middle of a write.
+    """
+
+    def __init__(self, db_path: str, logger: logging.Logger = None):
+        """
+        Args:
+            db_path (str): SQLite database file; created if missing.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stages (document TEXT NOT NULL, stage TEXT NOT NULL, data TEXT NOT NULL, updated REAL NOT NULL, PRIMARY KEY (document, stage))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS figures (document TEXT NOT NULL, image TEXT NOT NULL, result TEXT NOT NULL, PRIMARY KEY (document, image))"
+        )
+
+    def complete(self, document: str, stage: str, **data: Any) -> None:
+        """Records that `document` finished `stage`, with any data needed to resume from it."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?)", (document, stage, json.dumps(data), time.time()))
+
+    def stage(self, document: str, stage: str) -> Optional[Dict[str, Any]]:
+        """Returns the data recorded when `document` finished `stage`, or None if it has not."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM stages WHERE document = ? AND stage = ?", (document, stage)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def is_done(self, document: str, stage: str) -> bool:
+        return self.stage(document, stage) is not None
+
+    def record_figure(self, document: str, result: Dict[str, Any]) -> None:
+        """Records the enrichment result of one figure of `document`."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO figures VALUES (?, ?, ?)", (document, result["image"], json.dumps(result)))
+
+    def figures(self, document: str) -> Dict[str, Dict[str, Any]]:
+        """Returns the recorded figure results of `document` by image name."""
+        with self._lock:
+            rows = self._conn.execute("SELECT image, result FROM figures WHERE document = ?", (document,)).fetchall()
+        return {image: json.loads(result) for image, result in rows}
+
+    def reset(self, document: str) -> None:
+        """Forgets all progress of `document`, e.g. because its source file changed."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM stages WHERE document = ?", (document,))
+            self._conn.execute("DELETE FROM figures WHERE document = ?", (document,))
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
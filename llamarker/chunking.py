@@ -0,0 +1,139 @@
+# llamarker/chunking.py
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Page separator Marker writes with --paginate_output; the number is the 0-based page index
+PAGE_SEPARATOR_PATTERN = re.compile(r"^\{(\d+)\}-{48}$")
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*\S)\s*$")
+IMAGE_REF_PATTERN = re.compile(r"!\[\]\(([^)\n]*)\)")
+# Marker names figures after their 0-based page, e.g. _page_3_Figure_1.png
+FIGURE_PAGE_PATTERN = re.compile(r"_page_(\d+)_")
+
+
+def _blocks(lines: Iterable[str], figures: Dict[str, Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Splits Marker Markdown into paragraph blocks, each with its page, section path and the
+    figures it references. Figure references are replaced by the figure's extracted text.
+    """
+    page: Optional[int] = None
+    paginated = False
+    section: List[str] = []
+    text: List[str] = []
+    block_figures: List[Dict[str, Any]] = []
+    block_page: Optional[int] = None
+    is_heading = False
+
+    def flush():
+        nonlocal text, block_figures, block_page, is_heading
+        content = "\n".join(text).strip()
+        block = {"text": content, "page": block_page if block_page is not None else page, "section": list(section), "figures": block_figures, "heading": is_heading}
+        text, block_figures, block_page, is_heading = [], [], None, False
+        return block if content or block["figures"] else None
+
+    def replace(match: re.Match) -> str:
+        nonlocal block_page, page
+        name = match.group(1)
+        if not paginated:
+            found = FIGURE_PAGE_PATTERN.search(name)
+            if found:
+                page = int(found.group(1)) + 1
+                block_page = page if block_page is None else block_page
+        result = figures.get(name)
+        if not result or not result.get("contains_info"):
+            return ""
+        block_figures.append({"image": name, "path": result.get("new_image_path"), "text": result.get("extracted_info")})
+        return result.get("extracted_info") or ""
+
+    for line in lines:
+        line = line.rstrip("\n")
+        separator = PAGE_SEPARATOR_PATTERN.match(line)
+        heading = HEADING_PATTERN.match(line)
+        if separator or heading or not line.strip():
+            block = flush()
+            if block:
+                yield block
+        if separator:
+            paginated = True
+            page = int(separator.group(1)) + 1
+        elif heading:
+            level = len(heading.group(1))
+            section = section[:level - 1] + [heading.group(2)]
+            text.append(line)
+            is_heading = True
+        elif line.strip():
+            text.append(IMAGE_REF_PATTERN.sub(replace, line))
+    block = flush()
+    if block:
+        yield block
+
+
+def _split_long(text: str, size: int) -> List[str]:
+    """Splits text longer than `size` at whitespace into pieces of at most about `size` characters."""
+    pieces = []
+    while len(text) > size:
+        cut = text.rfind(" ", 0, size)
+        cut = cut if cut > size // 2 else size
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    pieces.append(text)
+    return pieces
+
+
+def chunk_markdown(lines: Iterable[str], figures: Dict[str, Dict[str, Any]] = None, chunk_size: int = 1500, overlap: int = 200) -> Iterator[Dict[str, Any]]:
+    """
+    Splits a Marker Markdown document into overlapping chunks for indexing, without rereading
+    the enriched output.
+
+    Chunks end at paragraph boundaries where possible. Page numbers come from Marker's page
+    separators (--paginate_output) or, without them, from the page numbers in figure names.
+
+    Args:
+        lines (Iterable[str]): Lines of the Markdown file as written by Marker, e.g. an open file.
+        figures (Dict[str, Dict[str, Any]], optional): `ImageProcessor` results by image name; references to
+            figures with information are replaced by their extracted text, logos are dropped.
+        chunk_size (int): Target maximum chunk length in characters. Defaults to 1500.
+        overlap (int): Characters of the previous chunk repeated at the start of the next. Defaults to 200.
+
+    Yields:
+        Dict[str, Any]: `chunk` (index), `text`, `page_start`, `page_end` (1-based, None if unknown),
+            `heading` (innermost section heading), `section_path` and `figures` (image, path and text).
+    """
+    figures = figures or {}
+    overlap = max(0, min(overlap, chunk_size // 2))
+    current: List[Dict[str, Any]] = []
+    size = 0
+    index = 0
+
+    def emit() -> Dict[str, Any]:
+        pages = [block["page"] for block in current if block["page"] is not None]
+        first = next((block for block in current if not block.get("overlap")), current[0])
+        return {
+            "chunk": index,
+            "text": "\n\n".join(block["text"] for block in current if block["text"]),
+            "page_start": min(pages) if pages else None,
+            "page_end": max(pages) if pages else None,
+            "heading": first["section"][-1] if first["section"] else None,
+            "section_path": first["section"],
+            "figures": [figure for block in current if not block.get("overlap") for figure in block["figures"]],
+        }
+
+    for block in _blocks(lines, figures):
+        pieces = _split_long(block["text"], chunk_size) if len(block["text"]) > chunk_size else [block["text"]]
+        for position, piece in enumerate(pieces):
+            part = {**block, "text": piece, "figures": block["figures"] if position == 0 else []}
+            # Start a new chunk when this one is full, or at a section heading once it is half full
+            full = size + len(piece) > chunk_size or (block["heading"] and size >= chunk_size // 2)
+            if current and full and any(not item.get("overlap") for item in current):
+                # A trailing heading belongs to the text below it
+                carried = [current.pop()] if current[-1]["heading"] and not current[-1].get("overlap") and any(not item.get("overlap") for item in current[:-1]) else []
+                yield emit()
+                index += 1
+                tail = current[-1]["text"][-overlap:] if overlap and not carried else ""
+                if tail and " " in tail:
+                    tail = tail[tail.index(" ") + 1:]
+                current = ([{**current[-1], "text": tail, "figures": [], "overlap": True}] if tail else []) + carried
+                size = len(tail) + sum(len(item["text"]) + 2 for item in carried)
+            current.append(part)
+            size += len(piece) + 2
+    if any(not item.get("overlap") for item in current):
+        yield emit()
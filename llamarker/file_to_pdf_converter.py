@@ -3,10 +3,14 @@ import logging
 import subprocess
 import tempfile
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterable, Optional
 from pypdf import PdfReader
-import matplotlib.pyplot as plt
 import shutil
+from llamarker.ingest import SUPPORTED_EXTENSIONS
+from llamarker.metrics import MetricsRecorder, NullMetrics
+from llamarker.results_store import ConversionResults
+from llamarker.scratch import ScratchSpace
+from llamarker.tracing import get_tracer
 
 
 class FileToPDFConverter:
@@ -15,13 +19,21 @@ class FileToPDFConverter:
     Files are stored temporarily unless explicitly saved to a user-defined folder.
     """
 
-    def __init__(self, input_dir: str = None, file_path: str = None, temp_dir: str = None, save_dir: str = None, logger: logging.Logger = None):
+    def __init__(self, input_dir: str = None, file_path: str = None, temp_dir: str = None, save_dir: str = None, logger: logging.Logger = None, metrics: MetricsRecorder = None, profile_dir: str = None, results_in_memory: int = 10000, scratch: ScratchSpace = None, clean: bool = True):
         """
         Args:
             input_dir (str): Path to the input directory with files.
             file_path (str): Path to a single file to process.
             save_dir (str): Optional path to save the converted PDFs permanently.
             logger (logging.Logger): Logger instance for logging progress.
+            metrics (MetricsRecorder): Optional recorder for per-document conversion metrics.
+            profile_dir (str): Optional LibreOffice user profile directory to reuse across runs, which avoids
+                re-creating the profile on every start and keeps concurrent converters from sharing one.
+            results_in_memory (int): Conversion results kept in memory before older ones are spilled to disk,
+                which keeps memory constant on very large corpora. Defaults to 10000.
+            scratch (ScratchSpace, optional): Decides whether each PDF is written to RAM or to `temp_dir`; the PDFs
+                are always listed in `temp_dir`. Defaults to None (written to `temp_dir`).
+            clean (bool): Empty `save_dir` first. Defaults to True; incremental runs pass False to keep earlier PDFs.
         """
         if not (input_dir or file_path):
             raise ValueError("Either 'input_dir' or 'file_path' must be provided.")
@@ -31,6 +43,9 @@ class FileToPDFConverter:
         self.logger = logger or logging.getLogger(__name__)
         self.temp_dir = Path(temp_dir) if temp_dir else Path(tempfile.mkdtemp())
         self.save_dir = Path(save_dir) if save_dir else None
+        self.metrics = metrics or NullMetrics()
+        self.profile_dir = Path(profile_dir).resolve() if profile_dir else None
+        self.scratch = scratch
 
         # Temporary folder to store converted PDFs
         self.logger.info(f"Temporary directory created at: {self.temp_dir}")
@@ -43,10 +58,13 @@ class FileToPDFConverter:
         if self.input_dir and not self.input_dir.exists():
             raise FileNotFoundError(f"Input directory not found: {self.input_dir}")
 
-        self.results: List[Tuple[str, int]] = []
+        self.results = ConversionResults(memory_records=results_in_memory)
 
         # Creates pdf directory and cleans if needed
-        self.clean_save_dir()
+        if clean:
+            self.clean_save_dir()
+        elif self.save_dir:
+            self.save_dir.mkdir(parents=True, exist_ok=True)
 
         # Validate LibreOffice installation
         self.libreoffice_path = self._validate_libreoffice()
@@ -65,9 +83,18 @@ class FileToPDFConverter:
         self.logger.info(f"LibreOffice found at: {libreoffice_path}")
         return libreoffice_path
     
-    def _process_file(self, file: Path):
-        if file.suffix in [".txt", ".docx", ".pdf", ".xls", ".xlsx", ".ppt", ".pptx", ".csv", ".rtf", ".odt", ".ods", ".odp"]:
+    def convert_file(self, file: Path) -> Optional[bool]:
+        """
+        Converts a single file if its type is supported; extensions are matched case-insensitively.
+
+        Returns:
+            Optional[bool]: True if a PDF was produced, False if the conversion failed, None if the type is not supported.
+        """
+        if file.suffix.lower() in SUPPORTED_EXTENSIONS:
+            converted = len(self.results)
             self._convert_to_pdf(file)
+            return len(self.results) > converted
+        return None
 
     def convert_and_count_pages(self) -> None:
         """
@@ -75,35 +102,63 @@ class FileToPDFConverter:
         """
 
         if self.file_path:
-            self._process_file(self.file_path)
+            self.convert_file(self.file_path)
         elif self.input_dir:
             self.logger.info(f"Starting file conversion in: {self.input_dir}")
             for file in self.input_dir.rglob("*"):
-                self._process_file(file)
+                self.convert_file(file)
+
+        self.logger.info(f"Processing completed: {len(self.results)} files converted.")
+
+    def convert_files(self, files: Iterable[Path]) -> None:
+        """
+        Converts the given files one by one as the iterable produces them, so conversion can start
+        while later files are still being uploaded or extracted.
+
+        Args:
+            files (Iterable[Path]): Files to convert; unsupported types are skipped.
+        """
+        for file in files:
+            self.convert_file(Path(file))
 
         self.logger.info(f"Processing completed: {len(self.results)} files converted.")
 
     def _convert_to_pdf(self, input_file: Path) -> None:
         """Converts a file to PDF using LibreOffice."""
-        output_file = self.temp_dir / input_file.with_suffix(".pdf").name
-        command = [
-            self.libreoffice_path,
+        output_dir = self.scratch.output_dir(input_file.stat().st_size) if self.scratch else self.temp_dir
+        output_file = output_dir / input_file.with_suffix(".pdf").name
+        command = [self.libreoffice_path]
+        if self.profile_dir:
+            command.append(f"-env:UserInstallation={self.profile_dir.as_uri()}")
+        command += [
             "--headless",
             "--convert-to", "pdf",
             "--outdir", str(output_file.parent),
             str(input_file)
         ]
-        try:
-            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            pages = self._count_pdf_pages(output_file)
-            self.results.append((str(output_file), pages))
-            self.logger.info(f"Converted: {input_file} -> {output_file} ({pages} pages)")
-
-            # Save to user-specified directory if provided
-            if self.save_dir:
-                self._save_to_user_directory(output_file)
-        except Exception as e:
-            self.logger.error(f"Failed to convert {input_file}: {e}")
+        tracer = get_tracer()
+        with tracer.span("document", trace_id=tracer.document_trace_id(input_file.stem), document=input_file.name, stage="convert") as span, \
+                self.metrics.measure("document", "convert", document=input_file.name) as record:
+            try:
+                record["bytes_in"] = input_file.stat().st_size
+                with tracer.span("subprocess", tool="soffice", document=input_file.name):
+                    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                pages = self._count_pdf_pages(output_file)
+                if self.scratch:
+                    output_file = self.scratch.admit(output_file)
+                self.results.append((str(output_file), pages))
+                record["bytes_out"] = output_file.stat().st_size if output_file.exists() else 0
+                record["pages"] = pages
+                span.set_attributes(pages=pages, bytes_in=record["bytes_in"], bytes_out=record["bytes_out"])
+                self.logger.info(f"Converted: {input_file} -> {output_file} ({pages} pages)")
+
+                # Save to user-specified directory if provided
+                if self.save_dir:
+                    self._save_to_user_directory(output_file)
+            except Exception as e:
+                record["status"] = "error"
+                span.set_attribute("error", str(e))
+                self.logger.error(f"Failed to convert {input_file}: {e}")
 
     def _count_pdf_pages(self, pdf_file: Path) -> int:
         """Counts pages in a PDF file."""
@@ -117,6 +172,8 @@ class FileToPDFConverter:
         self.logger.info(f"Saved PDF to: {dest_file}")
 
     def clean_save_dir(self):
+        if not self.save_dir:
+            return
         if self.save_dir.exists():
             self.logger.info(f"Cleaning existing PDFFiles directory: {self.save_dir}")
             for item in self.save_dir.iterdir():
@@ -128,30 +185,43 @@ class FileToPDFConverter:
             self.save_dir.mkdir(exist_ok=True)
 
     def cleanup(self):
-        """Cleans up the temporary directory."""
+        """Cleans up the temporary directory and any PDFs kept in RAM."""
+        if self.scratch:
+            self.scratch.close()
         try:
             shutil.rmtree(self.temp_dir)
             self.logger.info("Temporary directory cleaned up.")
         except Exception as e:
             self.logger.error(f"Failed to clean up temporary files: {e}")
 
-    def get_results(self) -> List[Tuple[str, int]]:
-        """Returns the list of converted PDFs and their page counts."""
+    def get_results(self) -> ConversionResults:
+        """Returns the converted PDFs and their page counts as a sequence of (pdf_path, pages) tuples."""
         return self.results
     
-    def plot_page_counts(self) -> None:
-        """Plots a bar chart showing the number of pages across all processed files."""
+    def plot_page_counts(self, max_bars: int = 50) -> None:
+        """
+        Plots a bar chart showing the number of pages across all processed files. With more than
+        `max_bars` files, plots a histogram of page counts instead, one bar per power-of-two bucket.
+        """
+        import matplotlib.pyplot as plt
+
         if not self.results:
             self.logger.warning("No files to plot. Please run `convert_and_count_pages` first.")
             return
 
-        file_names, page_counts = zip(*[(Path(f).name, p) for f, p in self.results])
-
         plt.figure(figsize=(10, 6))
-        plt.bar(file_names, page_counts, color="skyblue")
-        plt.xlabel("Files", fontsize=12)
-        plt.ylabel("Number of Pages", fontsize=12)
-        plt.title("Page Count Across Files", fontsize=14)
+        if len(self.results) > max_bars:
+            histogram = self.results.histogram()
+            plt.bar(list(histogram), list(histogram.values()), color="skyblue")
+            plt.xlabel("Number of Pages", fontsize=12)
+            plt.ylabel("Files", fontsize=12)
+            plt.title(f"Page Count Distribution ({len(self.results)} files, {self.results.total_pages} pages)", fontsize=14)
+        else:
+            file_names, page_counts = zip(*[(Path(f).name, p) for f, p in self.results])
+            plt.bar(file_names, page_counts, color="skyblue")
+            plt.xlabel("Files", fontsize=12)
+            plt.ylabel("Number of Pages", fontsize=12)
+            plt.title("Page Count Across Files", fontsize=14)
         plt.xticks(rotation=45, ha="right", fontsize=10)
         plt.tight_layout()
         # plt.show()
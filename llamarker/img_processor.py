@@ -4,11 +4,22 @@ from shutil import rmtree, move
 from datetime import datetime
 from pydantic import BaseModel
 from ollama import Options, chat
+from llamarker.ollama_pool import OllamaBackendPool
+from llamarker.scheduler import ModelCallScheduler, get_default_scheduler
+from llamarker.metrics import MetricsRecorder, NullMetrics
+from llamarker.log_config import ResultsSink
+from llamarker.results_store import FigureResults
+from llamarker.checkpoint import CheckpointStore
+from llamarker.tracing import bind_context, get_tracer
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 import json
 import logging
 import time
 import os
+import re
+import tempfile
+import threading
 
 
 class ImageProcessor:
@@ -17,7 +28,7 @@ class ImageProcessor:
     and extracts relevant details into a Markdown file.
     """
 
-    def __init__(self, folder_path: str, model: str = 'llama3.2-vision', logger: logging.Logger = None, translator: bool = True, qa_evaluator:bool = True):
+    def __init__(self, folder_path: str, model: str = 'llama3.2-vision', logger: logging.Logger = None, translator: bool = True, qa_evaluator:bool = True, backend: OllamaBackendPool = None, scheduler: ModelCallScheduler = None, workers: int = 1, metrics: MetricsRecorder = None, results_sink: ResultsSink = None, keep_alive: str = None, checkpoint: CheckpointStore = None):
         """
         Initializes the ImageProcessor.
 
@@ -27,15 +38,33 @@ class ImageProcessor:
             logger (logging.Logger, optional): Logger instance to use for logging. Defaults to None.
             translator (bool, optional): Whether to enable translation of extracted content. Defaults to False.
             qa_evaluator (bool, optional): Whether to enable QA evaluation for selecting the best response during image processing. Defaults to True.
+            backend (OllamaBackendPool, optional): Pool of Ollama hosts to send requests to. Defaults to the local Ollama host.
+            scheduler (ModelCallScheduler, optional): Shared scheduler that gates all model calls. Defaults to the process-wide scheduler.
+            workers (int, optional): Number of images processed concurrently. Defaults to 1.
+            metrics (MetricsRecorder, optional): Recorder for per-call metrics. Defaults to None (disabled).
+            results_sink (ResultsSink, optional): Sink that receives the full per-image results. Defaults to None (not written).
+            keep_alive (str, optional): How long Ollama keeps the model loaded after each call. Defaults to Ollama's default.
+            checkpoint (CheckpointStore, optional): Store that records each finished figure; figures it already has are not processed again. Defaults to None.
         """
 
         self.folder_path = Path(folder_path)
         self.model = model
-        self.results: List[Dict[str, str]] = []
+        # Per-figure results; older ones are spilled to disk, so documents with many figures stay in constant memory
+        self.results = FigureResults()
         self.max_retries = 3
-        self.img_language = "English"
+        self._thread_state = threading.local()
         self.translator = translator
         self.qa_evaluator = qa_evaluator
+        self.backend = backend
+        self.scheduler = scheduler or get_default_scheduler()
+        self.workers = max(1, workers)
+        self.metrics = metrics or NullMetrics()
+        self.results_sink = results_sink
+        self.keep_alive = keep_alive
+        self.checkpoint = checkpoint
+        self.retries = 0
+        self.cache_hits = 0
+        self._counter_lock = threading.Lock()
 
         # Use provided logger or set up a default logger
         self.logger = logger or logging.getLogger(__name__)
@@ -50,8 +79,19 @@ class ImageProcessor:
         # Assign the detected markdown file
         self.markdown_file = markdown_files[0]
         self.markdown_file_name = self.markdown_file.stem
+        # Identifies this run with the scheduler; documents with the same name must not share a priority
+        self.document_id = f"{self.markdown_file_name}:{uuid.uuid4().hex}"
         self.logger.info(f"Using Markdown file: {self.markdown_file}")
 
+    @property
+    def img_language(self) -> str:
+        """Language detected in the image currently handled by the calling thread."""
+        return getattr(self._thread_state, "img_language", "English")
+
+    @img_language.setter
+    def img_language(self, value: str) -> None:
+        self._thread_state.img_language = value
+
     def process_images(self) -> None:
         """
         Processes all PNG images in the folder by querying the Ollama model.
@@ -60,10 +100,39 @@ class ImageProcessor:
                       list(self.folder_path.glob("*.jpg")) + \
                       list(self.folder_path.glob("*.jpeg"))
 
-        for image_file in image_files:
+        if self.checkpoint:
+            # Resume: reuse recorded results, and pick up figures an interrupted run already moved to pics
+            done = self.checkpoint.figures(self.markdown_file_name)
+            self.results.extend(done.values())
+            self.cache_hits += len(done)
+            image_files = [image_file for image_file in image_files if image_file.name not in done]
+            pics_folder = self.folder_path.parent / "pics"
+            with open(self.markdown_file, "r", encoding="utf-8") as f:
+                referenced = dict.fromkeys(self.IMAGE_REF_PATTERN.findall(f.read()))
+            for name in referenced:
+                if name not in done and not (self.folder_path / name).exists() and (pics_folder / f"{self.markdown_file_name}{name}").exists():
+                    image_files.append(self.folder_path / name)
+            if done:
+                self.logger.info(f"Resuming {self.markdown_file_name}: {len(done)} figures already processed, {len(image_files)} left")
+
+        self.scheduler.register_document(self.document_id)
+
+        def process(index: int, image_file: Path) -> Dict[str, str]:
             self.logger.info(f"Processing image: {image_file.name}")
-            result = self.process_image(image_file)
-            self.results.append(result)
+            with get_tracer().span("figure", document=self.markdown_file_name, figure=image_file.name, figure_index=index):
+                result = self.process_image(image_file)
+            if self.checkpoint:
+                self.checkpoint.record_figure(self.markdown_file_name, result)
+            return result
+
+        try:
+            if self.workers == 1:
+                self.results.extend(process(index, image_file) for index, image_file in enumerate(image_files))
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    self.results.extend(executor.map(bind_context(process), range(len(image_files)), image_files))
+        finally:
+            self.scheduler.finish_document(self.document_id)
 
     def process_image(self, image_path: Path) -> Dict[str, str]:
         """
@@ -340,39 +409,47 @@ class ImageProcessor:
 
         return self.retry_ollama_vision_agent(instruction_set, prompt, llm_role, response_key, img_path, llm_schema)
 
+    # Matches the bare image references Marker emits, e.g. ![](_page_0_Figure_1.png)
+    IMAGE_REF_PATTERN = re.compile(r"!\[\]\(([^)\n]*)\)")
+
     def update_markdown(self) -> None:
         """
         Updates the Markdown file with extracted information for images,
         moves the updated file to the parent directory, and deletes the old folder.
+
+        The file is rewritten in a single streaming pass: every image reference is
+        looked up in the results by image name, and the output is written to a
+        temporary file that atomically replaces the target once complete.
         """
         self.logger.info(f"Updating Markdown file: {self.markdown_file}")
         if not self.markdown_file.exists():
             self.logger.error(f"Markdown file {self.markdown_file} does not exist.")
             return
 
-        with open(self.markdown_file, "r", encoding="utf-8") as md_file:
-            content = md_file.read()
+        base_path = Path.cwd()
 
-        self.logger.info(f"Read Markdown content")
+        def substitute(match: re.Match) -> str:
+            result = self.results.get(match.group(1))
+            if result is None:
+                return match.group(0)
+            if not result["contains_info"]:
+                return ""
+            # Add extracted info below the image reference in Markdown
+            relative_path = os.path.relpath(result['new_image_path'], start=base_path)
+            return f"[![Extracted Image]({relative_path})]({relative_path}) \n {result['extracted_info']}"
 
-        for result in self.results:
-            if result["contains_info"]:
-                # Add extracted info as a comment below the image reference in Markdown
-                base_path = Path.cwd()
-                relative_path = os.path.relpath(result['new_image_path'], start=base_path)
-                image_ref = f"![]({result['image']})"
-                extracted_info = result['extracted_info']
-                updated_extracted_info = f"[![Extracted Image]({relative_path})]({relative_path}) \n {extracted_info}"
-                content = content.replace(image_ref, updated_extracted_info)
-            else:
-                image_ref = f"![]({result['image']})"
-                content = content.replace(image_ref, "")
-
-        self.logger.info(f"Updated Markdown content")
         # Save the updated file in the parent folder
         updt_file_path = self.folder_path.parent / f"{self.markdown_file.name}"
-        with open(updt_file_path, "w", encoding="utf-8") as md_file:
-            md_file.write(content)
+        fd, tmp_path = tempfile.mkstemp(dir=updt_file_path.parent, prefix=f".{updt_file_path.name}.", suffix=".tmp")
+        try:
+            with open(self.markdown_file, "r", encoding="utf-8") as src, os.fdopen(fd, "w", encoding="utf-8") as dst:
+                for line in src:
+                    dst.write(self.IMAGE_REF_PATTERN.sub(substitute, line))
+            os.replace(tmp_path, updt_file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
         self.logger.info(f"Updated Markdown file saved at: {updt_file_path}")
 
         # Check and delete the folder containing the old markdown file
@@ -382,16 +459,15 @@ class ImageProcessor:
 
     def summarize_results(self) -> None:
         """
-        Prints a summary of the processed results.
+        Logs a summary of the processed results and writes the full results, including the
+        extracted text, to the results sink (the text itself is kept out of the log). `self.results`
+        is left unchanged for callers that read it afterwards.
         """
-        self.logger.info("Summary of Results:")
+        self.logger.info(f"Summary of Results for {self.markdown_file_name}: {len(self.results)} images, {self.results.logos} logos, {self.results.with_info} with extracted information")
         for result in self.results:
-            self.logger.info(f"Image: {result['image']}")
-            self.logger.info(f"Old Image Path: {result['old_image_path']}")
-            self.logger.info(f"New Image Path: {result['new_image_path']}")
-            self.logger.info(f"  - Is Logo: {result['is_logo']}")
-            self.logger.info(f"  - Contains Info: {result['contains_info']}")
-            self.logger.info(f"  - Extracted Info: {result['extracted_info']}")
+            self.logger.debug(f"Image: {result['image']} (logo: {result['is_logo']}, extracted: {len(result['extracted_info'])} characters) -> {result['new_image_path']}")
+            if self.results_sink:
+                self.results_sink.write({"document": self.markdown_file_name, **result})
 
     def move_image_to_pics_folder(self, image_path: Path, with_timestamp: bool = False) -> Path:
         """
@@ -414,6 +490,9 @@ class ImageProcessor:
         else:
             new_image_path = pics_folder / f"{self.markdown_file_name}{image_path.stem}{image_path.suffix}"
 
+        if not image_path.exists() and new_image_path.exists():
+            # Already moved by an interrupted run
+            return new_image_path
         move(str(image_path), str(new_image_path))
 
         return new_image_path
@@ -454,7 +533,9 @@ class ImageProcessor:
         Returns:
             str: Response from the agent.
         """
-        response = chat(
+        chat_fn = self.backend.chat if self.backend else chat
+        extra = {"keep_alive": self.keep_alive} if self.keep_alive is not None else {}
+        response = chat_fn(
             model=self.model,
             messages=[
                 {
@@ -470,7 +551,8 @@ class ImageProcessor:
                 }
             ],
             format='json',
-            options={'temperature': 0.7}
+            options={'temperature': 0.7},
+            **extra
         )
         return response['message']['content']
     
@@ -490,36 +572,49 @@ class ImageProcessor:
         Returns:
             str: Valid value for the key.
         """
-        for attempt in range(self.max_retries):
-            try:
-                response = self.ollama_vision_agent(instruction_set, user_prompt, img_path, llm_schema)
-                response_json = json.loads(response)
-
-                if response_key in response_json:
-                    if valid_values:
-                        if response_json[response_key] in valid_values:
-                            self.logger.info(f"Agent {llm_role} : Response: {response_json[response_key]}")
-                            return response_json[response_key]
+        with self.metrics.measure("model_call", "enrich", document=self.markdown_file_name, role=llm_role, figure=Path(img_path).name) as record:
+            record["bytes_in"] = Path(img_path).stat().st_size if Path(img_path).exists() else 0
+            for attempt in range(self.max_retries):
+                if attempt:
+                    record["retries"] = attempt
+                    with self._counter_lock:
+                        self.retries += 1
+                try:
+                    with get_tracer().span("model_call", role=llm_role, model=self.model, figure=Path(img_path).name, attempt=attempt + 1) as span:
+                        response = self.scheduler.call(
+                            lambda: self.ollama_vision_agent(instruction_set, user_prompt, img_path, llm_schema),
+                            document=self.document_id,
+                            role=llm_role,
+                        )
+                        span.set_attribute("bytes_out", len(response))
+                    record["bytes_out"] = len(response)
+                    response_json = json.loads(response)
+
+                    if response_key in response_json:
+                        if valid_values:
+                            if response_json[response_key] in valid_values:
+                                self.logger.info(f"Agent {llm_role} : Response: {response_json[response_key]}")
+                                return response_json[response_key]
+                            else:
+                                raise ValueError(f"Agent {llm_role} : Invalid response value: {response_json[response_key]}")
                         else:
-                            raise ValueError(f"Agent {llm_role} : Invalid response value: {response_json[response_key]}")
+                            if llm_role == "Information Extractor":
+                                self.img_language = list(response_json['Language'])[0]
+                            return response_json[response_key]
                     else:
-                        if llm_role == "Information Extractor":
-                            self.img_language = list(response_json['Language'])[0]
-                        return response_json[response_key]
+                        raise ValueError(f"Agent {llm_role} : Invalid JSON structure or missing '{response_key}' key.")
+                except json.JSONDecodeError:
+                    self.logger.error(f"Agent {llm_role} : Attempt {attempt + 1}: Response is not valid JSON: {response}")
+                except Exception as e:
+                    self.logger.error(f"Agent {llm_role} : Attempt {attempt + 1}: Error during classification: {e}")
+
+                if attempt < self.max_retries - 1:
+                    time.sleep(1)
                 else:
-                    raise ValueError(f"Agent {llm_role} : Invalid JSON structure or missing '{response_key}' key.")
-            except json.JSONDecodeError:
-                self.logger.error(f"Agent {llm_role} : Attempt {attempt + 1}: Response is not valid JSON: {response}")
-            except Exception as e:
-                self.logger.error(f"Agent {llm_role} : Attempt {attempt + 1}: Error during classification: {e}")
-
-            if attempt < self.max_retries - 1:
-                time.sleep(1)
-            else:
-                self.logger.error(f"Operation failed after {self.max_retries} attempts.")
-                raise RuntimeError(f"Operation failed after {self.max_retries} attempts.")
+                    self.logger.error(f"Operation failed after {self.max_retries} attempts.")
+                    raise RuntimeError(f"Operation failed after {self.max_retries} attempts.")
 
-        return ""
+            return ""
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+# llamarker/ingest.py
+import logging
+import shutil
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+# File types LlaMarker can convert
+SUPPORTED_EXTENSIONS = (".docx", ".txt", ".pdf", ".rtf", ".odt", ".xls", ".xlsx", ".csv", ".ods", ".ppt", ".pptx", ".odp")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def save_upload(upload: BinaryIO, name: str, dest_dir: Path, chunk_size: int = CHUNK_SIZE) -> Path:
+    """
+    Writes an uploaded file to `dest_dir` in chunks, without materializing another copy in memory.
+
+    Args:
+        upload (BinaryIO): File-like object, e.g. a Streamlit `UploadedFile`.
+        name (str): Original file name; any directory part is dropped.
+        dest_dir (Path): Directory to write the file to.
+        chunk_size (int): Bytes copied per write. Defaults to 1 MiB.
+
+    Returns:
+        Path: Path of the written file.
+    """
+    file_path = Path(dest_dir) / Path(name).name
+    upload.seek(0)
+    with open(file_path, "wb") as f:
+        shutil.copyfileobj(upload, f, chunk_size)
+    return file_path
+
+
+def extract_zip(zip_path: Path, dest_dir: Path, max_members: int = 1000, max_member_bytes: int = 512 * 1024 * 1024, max_total_bytes: int = 2 * 1024 * 1024 * 1024, chunk_size: int = CHUNK_SIZE, logger: logging.Logger = None) -> Iterator[Path]:
+    """
+    Extracts supported documents from a ZIP archive one member at a time, yielding each
+    file as soon as it is on disk so it can be converted while the rest is extracted.
+
+    Members with unsupported types or paths escaping `dest_dir` are skipped. The size limits
+    are enforced on the bytes actually written, not only on the sizes the archive declares.
+
+    Args:
+        zip_path (Path): The ZIP archive.
+        dest_dir (Path): Directory to extract into.
+        max_members (int): Maximum number of documents extracted. Defaults to 1000.
+        max_member_bytes (int): Maximum uncompressed size of one document. Defaults to 512 MiB.
+        max_total_bytes (int): Maximum uncompressed size of all documents. Defaults to 2 GiB.
+        chunk_size (int): Bytes copied per write. Defaults to 1 MiB.
+        logger (logging.Logger, optional): Logger instance for logging progress.
+
+    Yields:
+        Path: Each extracted document.
+
+    Raises:
+        ValueError: If the archive exceeds one of the limits.
+    """
+    logger = logger or logging.getLogger(__name__)
+    dest_dir = Path(dest_dir).resolve()
+    members = total_bytes = 0
+
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or Path(info.filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            target = (dest_dir / info.filename).resolve()
+            if not target.is_relative_to(dest_dir):
+                logger.warning(f"Skipping ZIP member outside the extraction folder: {info.filename}")
+                continue
+
+            members += 1
+            if members > max_members:
+                raise ValueError(f"ZIP archive {zip_path.name} contains more than {max_members} documents.")
+            if info.file_size > max_member_bytes:
+                raise ValueError(f"ZIP member {info.filename} is larger than {max_member_bytes} bytes.")
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            written = 0
+            try:
+                with archive.open(info) as source, open(target, "wb") as f:
+                    while chunk := source.read(chunk_size):
+                        written += len(chunk)
+                        if written > max_member_bytes or total_bytes + written > max_total_bytes:
+                            raise ValueError(f"ZIP archive {zip_path.name} exceeds the extraction size limit.")
+                        f.write(chunk)
+            except BaseException:
+                target.unlink(missing_ok=True)
+                raise
+            total_bytes += written
+            logger.info(f"Extracted {info.filename} ({written} bytes)")
+            yield target
+
+
+def ingest_uploads(uploads: Iterable[BinaryIO], dest_dir: Path, chunk_size: int = CHUNK_SIZE, logger: logging.Logger = None, **zip_limits) -> Iterator[Path]:
+    """
+    Saves uploaded files to `dest_dir` and yields each supported document as soon as it is on
+    disk. ZIP archives are extracted member by member and deleted afterwards.
+
+    Args:
+        uploads (Iterable[BinaryIO]): Uploaded files; each needs a `name` attribute.
+        dest_dir (Path): Directory to store the documents in.
+        chunk_size (int): Bytes copied per write. Defaults to 1 MiB.
+        logger (logging.Logger, optional): Logger instance for logging progress.
+        **zip_limits: Limits passed on to `extract_zip`.
+
+    Yields:
+        Path: Each saved or extracted document.
+    """
+    logger = logger or logging.getLogger(__name__)
+    for upload in uploads:
+        file_path = save_upload(upload, upload.name, dest_dir, chunk_size)
+        if file_path.suffix.lower() == ".zip":
+            try:
+                yield from extract_zip(file_path, dest_dir, chunk_size=chunk_size, logger=logger, **zip_limits)
+            finally:
+                file_path.unlink(missing_ok=True)
+        elif file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+            yield file_path
+        else:
+            logger.warning(f"Skipping unsupported upload: {file_path.name}")
@@ -0,0 +1,146 @@
+# llamarker/jobs.py
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from llamarker.main import PipelineCancelled
+
+STAGES = ("convert", "marker", "enrich")
+
+
+class Job:
+    """
+    State of one background parse run: overall status, per-stage and per-document progress
+    with timings, and the event used to cancel it.
+
+    Progress is fed in by `on_progress`, which matches `LlaMarker`'s `progress_callback`.
+    """
+
+    def __init__(self, job_id: str, description: str = ""):
+        self.id = job_id
+        self.description = description
+        self.status = "queued"  # queued, running, done, failed, cancelled
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.documents: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def on_progress(self, stage: str, document: Optional[str], status: str, seconds: Optional[float] = None) -> None:
+        """Records a progress event; `document` is None for whole stages."""
+        entry = {"status": status, "seconds": round(seconds, 2) if seconds is not None else None, "updated": time.time()}
+        with self._lock:
+            if document is None:
+                self.stages[stage] = entry
+            else:
+                self.documents.setdefault(document, {})[stage] = entry
+
+    def cancel(self) -> None:
+        """Asks the run to stop before its next document."""
+        self.cancel_event.set()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def finished_documents(self) -> List[str]:
+        """Documents whose enrichment is done, in completion order; their Markdown can be viewed."""
+        with self._lock:
+            done = [(stages["enrich"]["updated"], name) for name, stages in self.documents.items() if stages.get("enrich", {}).get("status") == "done"]
+        return [name for _, name in sorted(done)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a consistent copy of the job state for display."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "description": self.description,
+                "status": self.status,
+                "error": self.error,
+                "elapsed": round((self.finished or time.time()) - (self.started or self.created), 2),
+                "stages": {stage: dict(entry) for stage, entry in self.stages.items()},
+                "documents": {name: {stage: dict(entry) for stage, entry in stages.items()} for name, stages in self.documents.items()},
+            }
+
+
+class JobManager:
+    """
+    Runs parse jobs in background threads, independent of any UI session, and keeps their
+    state so progress can be polled (and a reloaded page can re-attach by job ID).
+    """
+
+    def __init__(self, max_workers: int = 1, logger: logging.Logger = None):
+        """
+        Args:
+            max_workers (int): Number of jobs run at the same time; further jobs wait. Defaults to 1.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.jobs: Dict[str, Job] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llamarker-job")
+        self._lock = threading.Lock()
+
+    def submit(self, target: Callable[[Job], None], description: str = "") -> Job:
+        """
+        Starts `target(job)` in the background.
+
+        `target` should pass `job.on_progress` and `job.cancel_event` to `LlaMarker`. The job ends
+        as "cancelled" if `target` raises `PipelineCancelled`, "failed" on any other exception
+        and "done" otherwise.
+
+        Args:
+            target (Callable[[Job], None]): The work to run.
+            description (str): Label shown with the job.
+
+        Returns:
+            Job: The queued job.
+        """
+        job = Job(uuid.uuid4().hex[:12], description)
+        with self._lock:
+            self.jobs[job.id] = job
+        self._executor.submit(self._run, job, target)
+        return job
+
+    def _run(self, job: Job, target: Callable[[Job], None]) -> None:
+        job.started = time.time()
+        job.status = "running"
+        try:
+            if job.cancel_event.is_set():
+                raise PipelineCancelled("Processing was cancelled.")
+            target(job)
+            job.status = "done"
+        except PipelineCancelled:
+            job.status = "cancelled"
+            self.logger.info(f"Job {job.id} cancelled")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            self.logger.error(f"Job {job.id} failed: {e}")
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a job; returns False if it does not exist or already ended."""
+        job = self.get(job_id)
+        if not job or not job.active:
+            return False
+        job.cancel()
+        return True
+
+    def shutdown(self) -> None:
+        """Cancels all jobs and waits for the running ones to stop."""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            job.cancel()
+        self._executor.shutdown(wait=True)
@@ -1,15 +1,17 @@
 import streamlit as st
 from streamlit import session_state as ss
 import os
-import ollama
 import base64
 from pathlib import Path
 import importlib.resources as pkg_resources
 from llamarker.main import LlaMarker
+from llamarker.ingest import SUPPORTED_EXTENSIONS, ingest_uploads
+from llamarker.jobs import STAGES, Job, JobManager
+from llamarker.model_catalog import ModelCatalog
+from llamarker.preview import InlinePreview, PreviewServer, file_fingerprint, split_markdown_pages
 import tempfile
-import shutil
-import time
 import html
+from functools import partial
 
 
 def encode_image_to_base64(image_path: str) -> str:
@@ -34,11 +36,190 @@ def get_logo_path():
     return logo_path
 
 
+@st.cache_data
+def get_encoded_logo() -> str:
+    """Base64 logo for the sidebar; read and encoded once per process."""
+    return encode_image_to_base64(get_logo_path())
+
+
+@st.cache_resource
+def get_model_catalog() -> ModelCatalog:
+    """One TTL-cached view of the installed Ollama models, shared by all sessions."""
+    return ModelCatalog()
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """One job manager per process, shared by all sessions. Jobs run one at a time since they share the output folder."""
+    return JobManager(max_workers=1)
+
+
+def run_parse_job(job: Job, uploads: list, gui_out: str, parsed_markdown_folder: str, force_ocr: bool, languages: str, model: str, qa_evaluator: bool) -> None:
+    """Runs the whole pipeline for the uploaded files in a background thread, reporting progress to `job`."""
+    with tempfile.TemporaryDirectory() as upload_folder:
+        llamarker = LlaMarker(input_dir=upload_folder, output_dir=gui_out, save_pdfs=True, verbose=0, progress_callback=job.on_progress, cancel_event=job.cancel_event)
+        try:
+            # Stream the uploads to disk (ZIPs member by member) and convert each document as soon as it lands
+            llamarker.process_documents(files=ingest_uploads(uploads, Path(upload_folder)))
+            llamarker.parse_with_marker(force_ocr=force_ocr, languages=languages)
+            llamarker.process_subdirectories(model=model, qa_evaluator=qa_evaluator)
+            llamarker.plot_analysis(parsed_markdown_folder)
+        finally:
+            llamarker.results_sink.close()
+            if llamarker.temp_dir.exists():
+                llamarker.file_converter.cleanup()
+
+
+def reset_to_upload() -> None:
+    """Returns to the upload view, cancelling the current job if it is still running."""
+    if ss.job_id:
+        get_job_manager().cancel(ss.job_id)
+    st.query_params.pop("job", None)
+    ss.job_id = None
+    ss.uploaded_file_list = []
+    ss.selected_file = None
+    ss.files_parsed = False
+    ss.clicked_parse_button = False
+    ss.clicked_upload_button = True
+
+
+def show_job_status(job: Job) -> None:
+    """Shows the job's status, per-stage and per-document progress with timings, and a cancel button while it runs."""
+    snapshot = job.snapshot()
+    documents = snapshot["documents"]
+    enriched = sum(1 for stages in documents.values() if stages.get("enrich", {}).get("status") in ("done", "failed"))
+
+    if job.active:
+        running = next((stage for stage in STAGES if snapshot["stages"].get(stage, {}).get("status") == "running"), "queued")
+        st.progress(enriched / len(documents) if documents else 0.0, text=f"{running.capitalize()}: {enriched}/{len(documents)} documents finished ({snapshot['elapsed']} s)")
+        if st.button("Cancel", icon=":material/cancel:"):
+            job.cancel()
+    elif snapshot["status"] == "failed":
+        st.error(f"Processing failed: {snapshot['error']}", icon="🚨")
+    elif snapshot["status"] == "cancelled":
+        st.warning("Processing was cancelled. Documents finished before that can still be viewed.")
+
+    with st.expander("Progress details", expanded=job.active):
+        st.dataframe(
+            [{"stage": stage, **snapshot["stages"].get(stage, {"status": "pending"})} for stage in STAGES],
+            column_order=("stage", "status", "seconds"),
+            hide_index=True,
+        )
+        st.dataframe(
+            [{"document": name, **{f"{stage} (s)": stages[stage]["seconds"] if stage in stages else None for stage in ("convert", "enrich")}, "status": stages.get("enrich", stages.get("convert"))["status"]} for name, stages in documents.items()],
+            hide_index=True,
+        )
+
+
+@st.fragment(run_every=1)
+def poll_job(job_id: str, shown_documents: int) -> None:
+    """Refreshes the job status every second; reruns the whole page when documents finish or the job ends."""
+    job = get_job_manager().get(job_id)
+    show_job_status(job)
+    if not job.active or len(job.finished_documents()) != shown_documents:
+        st.rerun(scope="app")
+
+
+@st.cache_resource
+def get_preview_server(root_dir: str):
+    """
+    Returns how PDFs and pictures under `root_dir` are embedded. With LLAMARKER_PREVIEW_URL set
+    (the address browsers reach the preview server at), one server per process serves them by URL,
+    bound to LLAMARKER_PREVIEW_HOST and LLAMARKER_PREVIEW_PORT. Otherwise they are inlined, which
+    works from any host.
+    """
+    public_url = os.environ.get("LLAMARKER_PREVIEW_URL")
+    if not public_url:
+        return InlinePreview(root_dir)
+    return PreviewServer(root_dir, host=os.environ.get("LLAMARKER_PREVIEW_HOST", "127.0.0.1"), port=int(os.environ.get("LLAMARKER_PREVIEW_PORT", "0")), public_url=public_url)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_markdown_pages(fingerprint: tuple) -> list:
+    """Reads and paginates a Markdown file once per version (`fingerprint` from `file_fingerprint`)."""
+    return split_markdown_pages(Path(fingerprint[0]).read_text(encoding="utf-8"))
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_file_bytes(fingerprint: tuple) -> bytes:
+    """Reads a file once per version, e.g. for the download button."""
+    return Path(fingerprint[0]).read_bytes()
+
+
+@st.fragment
+def show_document(document: str, gui_out: str, parsed_pdf_folder: str, parsed_markdown_folder: str, container_height: str) -> None:
+    """
+    Shows the uploaded PDF of `document` (file name without extension) next to its parsed Markdown. Runs as a fragment, so toggles and page
+    changes only rerun this function; files are embedded by URL or as cached inline data, and Markdown is rendered one page at a time.
+    """
+    preview_server = get_preview_server(gui_out)
+    uploaded_file_col, parsed_file_col = st.columns(2, gap="medium", border=True)
+
+    with uploaded_file_col:
+        pdf_file = Path(parsed_pdf_folder) / f"{document}.pdf"
+        col1_, col2_, col3_ = st.columns([5,5,2], gap='large', vertical_alignment="center")
+        with col1_:
+            st.markdown("### Uploaded File")
+        with col3_:
+            # Button to reset the app for a new upload
+            if st.button("X"):
+                reset_to_upload()
+                st.rerun(scope="app")
+        st.divider()
+        if pdf_file.exists():
+            st.markdown(
+                f"<iframe src=\"{html.escape(preview_server.url_for(pdf_file))}\" width=\"100%\" height=\"{container_height}\"></iframe>",
+                unsafe_allow_html=True,
+            )
+        else:
+            st.error(f"PDF File Not Found : {pdf_file}", icon="🚨")
+
+    with parsed_file_col:
+        md_file_path = Path(parsed_markdown_folder) / f"{document}.md"
+
+        col1_, col2_, col3_ = st.columns([5,3,5], gap='large', vertical_alignment="center")
+        with col1_:
+            st.markdown("### Parsed Content")
+        with col3_:
+            # Add a toggle switch for raw or rendered view
+            show_raw = st.toggle("Show Raw Markdown")
+
+        st.divider()
+        if md_file_path.exists():
+            fingerprint = file_fingerprint(md_file_path)
+            pages = load_markdown_pages(fingerprint)
+            page_number = 1
+            if len(pages) > 1:
+                page_number = st.number_input(f"Page (of {len(pages)})", min_value=1, max_value=len(pages), value=1, step=1)
+            page = pages[page_number - 1]
+
+            if show_raw:
+                # Show raw markdown content in a text area
+                st.text_area("Raw Markdown Content", page, height=650)
+            else:
+                # Show rendered markdown content in a scrollable container; pictures are embedded by URL or inline
+                with st.container(height=int(container_height.rstrip("px")), border=True):
+                    st.markdown(preview_server.rewrite_links(page, os.getcwd()))
+
+            st.markdown("<br>", unsafe_allow_html=True)
+
+            # Add a download button for the markdown content
+            st.download_button(
+                label="Download Markdown File",
+                data=load_file_bytes(fingerprint),
+                file_name=os.path.basename(md_file_path),
+                mime="text/markdown",
+                icon=":material/download:"
+            )
+
+        else:
+            st.error(f"Parsed File Not Found : {md_file_path}", icon="🚨")
+
+
 def main():
     
     # Encode and store the logo image for display in the sidebar
-    logo_path = get_logo_path()
-    encoded_logo = encode_image_to_base64(logo_path)
+    encoded_logo = get_encoded_logo()
 
     # Define paths for GUI output
     cwd = os.getcwd()
@@ -62,14 +243,20 @@ def main():
     if "files_parsed" not in ss:
         ss.files_parsed = False
 
-    if "processing_time" not in ss:
-        ss.processing_time = 0
-        
     if "clicked_parse_button" not in ss:
         ss.clicked_parse_button = False
         
     if "clicked_upload_button" not in ss:
         ss.clicked_upload_button = True
+
+    if "job_id" not in ss:
+        # Re-attach to a running or finished job after a browser refresh
+        ss.job_id = st.query_params.get("job")
+        if ss.job_id and get_job_manager().get(ss.job_id):
+            ss.clicked_parse_button = True
+            ss.clicked_upload_button = False
+        else:
+            ss.job_id = None
         
     # Set up the page configuration for Streamlit
     st.set_page_config(
@@ -160,16 +347,23 @@ def main():
         st.sidebar.subheader("📷 Image Processing", divider=True)
         qa_evaluator_flag = st.sidebar.toggle("Enable QA Evaluator", value=True, help="Enable or disable the QA evaluator for selecting the best response.")
 
-        # Fetch and display available models from Ollama
+        # Fetch and display available models from Ollama (cached for a short TTL, stale list served while Ollama is busy)
+        catalog = get_model_catalog()
+        selected_model = None
+        refresh = st.sidebar.button("Refresh models", icon=":material/refresh:", help="Reload the installed models from Ollama.")
         try:
-            response = ollama.list()  # Fetch the list of installed models
-            vision_models = ollama_vision_models = [ "llama3.2-vision", "llama3.2-vision-90B", "llava", "llava-13B", 
-            "llava-34B", "llava-llama3", "bakllava", "moondream", "minicpm-v", "llava-phi3",
-            ]
-            models = response.models  # Extract the models from the ListResponse object
-            model_names = [model.model for model in models if any(vm in model.model.lower() for vm in vision_models)]
-
+            if refresh:
+                catalog.refresh()
+            model_names = catalog.vision_models()
             selected_model = st.sidebar.selectbox("Select LLM model", model_names)
+            if catalog.last_error:
+                st.sidebar.warning(f"Ollama did not respond, showing the last known models: {catalog.last_error}")
+            if selected_model:
+                try:
+                    info = catalog.capabilities(selected_model)
+                    st.sidebar.caption(" · ".join(str(value) for value in (info["family"], info["parameter_size"], info["quantization_level"]) if value))
+                except Exception as e:
+                    st.sidebar.caption(f"Model details unavailable: {e}")
 
         except Exception as e:
             st.sidebar.error(f"Error listing models: {e}")
@@ -218,52 +412,51 @@ def main():
             
             uploaded_files = st.file_uploader(
                 "Upload documents (multiple files supported)",
-                type=["docx", "txt", "pdf", "rtf", "odt", "xls", "xlsx", "csv", "ods", "ppt", "pptx", "odp", "zip"],
+                type=[extension.lstrip(".") for extension in SUPPORTED_EXTENSIONS] + ["zip"],
                 accept_multiple_files=True,
             )
 
             if uploaded_files:
                 ss.uploaded_files = uploaded_files
 
-    # Main logic for processing uploaded files
+    # Main logic for processing uploaded files: parsing runs as a background job, so the page
+    # stays responsive, survives a browser refresh (the job ID is kept in the URL) and can be cancelled
     if ss.clicked_parse_button:
-        start_time = time.time()  # Start the timer to measure processing time
-
-        if not ss.files_parsed:
-            with tempfile.TemporaryDirectory() as upload_folder:
-                # Save uploaded file to a temporary folder
-                for uploaded_file in ss.uploaded_files:
-                    file_path = Path(upload_folder) / uploaded_file.name
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-
-                    # If a ZIP file is uploaded, unpack it
-                    if file_path.suffix == ".zip":
-                        shutil.unpack_archive(file_path, upload_folder)
-                        for p in Path(upload_folder).rglob("*"):
-                            if p.suffix in [".docx", ".txt", ".pdf", ".rtf", ".odt", ".xls", ".xlsx", ".csv", ".ods", ".ppt", ".pptx", ".odp"]:
-                                ss.uploaded_file_list.append(str(p))
-                    else:
-                        ss.uploaded_file_list.append(str(file_path))
-
-                # Initialize LlaMarker and process the documents
-                llamarker = LlaMarker(input_dir=upload_folder, output_dir=gui_out, save_pdfs=True, verbose=0)
-                with st.spinner("Converting your documents..."):
-                    llamarker.process_documents()
-                with st.spinner("Parsing using Marker OCR ..."):
-                    llamarker.parse_with_marker(force_ocr=ss.force_ocr, languages=",".join(ss.selected_languages))
-                with st.spinner(f"Extracting necessary info from images using {ss.selected_model} ..."):
-                    llamarker.process_subdirectories(model=ss.selected_model, qa_evaluator=ss.qa_evaluator_flag)
-                    llamarker.plot_analysis(parsed_markdown_folder)
-
-                ss.files_parsed = True
-            end_time = time.time()  # End the timer
-            ss.processing_time = round(end_time - start_time, 2)
-
-        # Display processing time and parsed files
-        if ss.uploaded_file_list and ss.files_parsed:
-
-            st.sidebar.success(f"Processing completed in {ss.processing_time} seconds.")
+        job_manager = get_job_manager()
+
+        if not ss.job_id:
+            job = job_manager.submit(
+                partial(
+                    run_parse_job,
+                    uploads=list(ss.uploaded_files),
+                    gui_out=gui_out,
+                    parsed_markdown_folder=parsed_markdown_folder,
+                    force_ocr=ss.force_ocr,
+                    languages=",".join(ss.selected_languages),
+                    model=ss.selected_model,
+                    qa_evaluator=ss.qa_evaluator_flag,
+                ),
+                description=", ".join(uploaded_file.name for uploaded_file in ss.uploaded_files),
+            )
+            ss.job_id = job.id
+            st.query_params["job"] = job.id
+            # The job holds the uploads now; drop the session's references
+            ss.uploaded_files = []
+
+        job = job_manager.get(ss.job_id)
+        ss.uploaded_file_list = job.finished_documents()
+        ss.files_parsed = not job.active
+
+        # Live progress while the job runs; a static summary once it has ended
+        if job.active:
+            poll_job(job.id, len(ss.uploaded_file_list))
+        else:
+            show_job_status(job)
+            if job.status == "done":
+                st.sidebar.success(f"Processing completed in {job.snapshot()['elapsed']} seconds.")
+
+        # Display parsed files, including those finished while others are still processing
+        if ss.uploaded_file_list:
 
             # Sidebar for selecting a parsed file to view
             with st.sidebar:
@@ -273,101 +466,23 @@ def main():
                         "Files:",
                         options=ss.uploaded_file_list,
                         index=0,
-                        format_func=lambda x: Path(x).name,
                     )
                 else:
                     ss.selected_file = ss.uploaded_file_list[0]
 
             # Columns for displaying uploaded and parsed files
-            uploaded_file_col, parsed_file_col = st.columns(2, gap="medium", border=True)
-
-            with uploaded_file_col:
-                
-                with st.spinner("Displaying selected file..."):
-                    pdf_file = Path(parsed_pdf_folder) / Path(ss.selected_file).with_suffix(".pdf").name
-                    col1_, col2_, col3_ = st.columns([5,5,2], gap='large', vertical_alignment="center")
-                    with col1_:
-                        st.markdown("### Uploaded File")
-                    with col3_:
-                        # Button to reset the app for a new upload
-                        if st.button("X"):
-                            ss.uploaded_file_list = []
-                            ss.selected_file = None
-                            ss.files_parsed = False
-                            ss.clicked_parse_button = False
-                            ss.clicked_upload_button = True
-                            ss.processing_time = 0
-                            st.rerun()
-                    st.divider()
-                    if pdf_file.exists():
-                        pdf_data = pdf_file.read_bytes()
-                        pdf_base64 = base64.b64encode(pdf_data).decode("utf-8")
-                        st.markdown(
-                            f"<iframe src=\"data:application/pdf;base64,{pdf_base64}\" width=\"100%\" height=\"{container_height}\"></iframe>",
-                            unsafe_allow_html=True,
-                        )
-                    else:
-                        st.error(f"PDF File Not Found : {pdf_file}", icon="🚨")
-
-            with parsed_file_col:
-                with st.spinner("Displaying parsed file..."):
-                    md_file_path = Path(parsed_markdown_folder) / Path(ss.selected_file).with_suffix(".md").name
-                    
-                    col1_, col2_, col3_ = st.columns([5,3,5], gap='large', vertical_alignment="center")
-                    with col1_:
-                        st.markdown("### Parsed Content")
-                    with col3_:
-                        # Add a toggle switch for raw or rendered view
-                        show_raw = st.toggle("Show Raw Markdown")
-                        
-                    st.divider()
-                    if md_file_path.exists():
-                        
-                        with open(md_file_path, "r") as md_file:
-                            md_content = md_file.read()
-                        
-                        if show_raw:
-                            # Show raw markdown content in a text area
-                            st.text_area("Raw Markdown Content", md_content, height=650)
-                        else:
-                            # Show rendered markdown content in a scrollable container
-                            st.markdown(
-                                f"""
-                                <div style="overflow-y: scroll; height: {container_height}; border: 1px solid #ccc; padding: 10px;">
-                                    {html.escape(md_content)}
-                                </div>
-                                """,
-                                unsafe_allow_html=True,
-                            )
-                        
-                        st.markdown("<br>", unsafe_allow_html=True)
-                        
-                        # Add a download button for the markdown content
-                        st.download_button(
-                            label="Download Markdown File",
-                            data=md_content,
-                            file_name=os.path.basename(md_file_path),
-                            mime="text/markdown",
-                            icon=":material/download:"
-                        )
-
-                    else:
-                        st.error(f"Parsed File Not Found : {md_file_path}", icon="🚨")
-                        
-            # Sidebar for displaying analysis plot
-            with st.sidebar:
-                if len(ss.uploaded_file_list) > 1:
-                    st.subheader("Analysis Plot")
-                    st.image(Path(parsed_markdown_folder) / "page_counts.png")
-
-                if st.button("Upload New", type="primary", icon=":material/upload:"):
-                    ss.uploaded_file_list = []
-                    ss.selected_file = None
-                    ss.files_parsed = False
-                    ss.clicked_parse_button = False
-                    ss.clicked_upload_button = True
-                    ss.processing_time = 0
-                    st.rerun()
+            show_document(ss.selected_file, gui_out, parsed_pdf_folder, parsed_markdown_folder, container_height)
+
+        # Sidebar for displaying analysis plot
+        with st.sidebar:
+            plot_path = Path(parsed_markdown_folder) / "page_counts.png"
+            if ss.files_parsed and len(ss.uploaded_file_list) > 1 and plot_path.exists():
+                st.subheader("Analysis Plot")
+                st.image(plot_path)
+
+            if st.button("Upload New", type="primary", icon=":material/upload:"):
+                reset_to_upload()
+                st.rerun()
 
 if __name__ == "__main__":
     main()
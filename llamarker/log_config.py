@@ -0,0 +1,129 @@
+# llamarker/log_config.py
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["BoundedQueueHandler"] = None
+_log_file: Optional[Path] = None
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue so the calling thread never waits on log I/O.
+
+    When the queue is full, records below WARNING are dropped (and counted) instead of
+    blocking; warnings and errors wait for room so they are never lost.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
+
+
+def configure_logging(level: int = logging.WARNING, log_dir: str = "logs", max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, queue_size: int = 10000) -> Path:
+    """
+    Sets up asynchronous logging for the process: records are queued by the caller and written by
+    a background thread to the console and a size-capped, rotating log file.
+
+    Only the first call installs the handlers; later calls (e.g. from further `LlaMarker`
+    instances) just update the level.
+
+    Args:
+        level (int): Logging level of the root logger. Defaults to WARNING.
+        log_dir (str): Directory for the log file. Defaults to "logs".
+        max_bytes (int): Size at which the log file is rotated. Defaults to 10 MiB.
+        backup_count (int): Number of rotated files kept. Defaults to 5.
+        queue_size (int): Maximum number of records waiting to be written. Defaults to 10000.
+
+    Returns:
+        Path: The log file of this process.
+    """
+    global _listener, _queue_handler, _log_file
+    root = logging.getLogger()
+    with _lock:
+        root.setLevel(level)
+        if _listener is not None:
+            return _log_file
+
+        log_path = Path(log_dir)
+        log_path.mkdir(parents=True, exist_ok=True)
+        _log_file = log_path / f"llamarker_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = RotatingFileHandler(_log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        stream_handler = logging.StreamHandler()
+        for handler in (file_handler, stream_handler):
+            handler.setFormatter(formatter)
+
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        _queue_handler = BoundedQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(_queue_handler)
+        atexit.register(shutdown_logging)
+        return _log_file
+
+
+def shutdown_logging() -> None:
+    """Writes out all queued records, stops the background writer and removes the handlers."""
+    global _listener, _queue_handler, _log_file
+    with _lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        if _queue_handler.dropped:
+            print(f"LlaMarker logging: {_queue_handler.dropped} records below WARNING were dropped because the log queue was full.", file=sys.stderr)
+        _listener = _queue_handler = _log_file = None
+
+
+class ResultsSink:
+    """
+    Writes large per-figure payloads (extracted text, paths) as JSONL, one record per line,
+    so they stay out of the log stream.
+    """
+
+    def __init__(self, path: str, logger: logging.Logger = None):
+        """
+        Args:
+            path (str): JSONL file to append records to.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        self.logger.info(f"Extraction results written to {self.path}")
@@ -1,14 +1,37 @@
 import argparse
 import logging
 from pathlib import Path
-from typing import List, Tuple, Optional
-import matplotlib.pyplot as plt
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional
 from datetime import datetime
-from llamarker.file_to_pdf_converter import FileToPDFConverter
-from llamarker.img_processor import ImageProcessor
+from llamarker.checkpoint import CheckpointStore
+from llamarker.chunking import chunk_markdown
+from llamarker.ingest import SUPPORTED_EXTENSIONS
+from llamarker.log_config import ResultsSink, configure_logging
+from llamarker.scheduler import AIMDController, ModelCallScheduler
+from llamarker.metrics import MetricsRecorder, NullMetrics, directory_size
+from llamarker.ollama_pool import parse_hosts
+from llamarker.planning import SCHEDULES, longest_first, lpt_gain, partition
+from llamarker.plaintext import DIRECT_EXTENSIONS, convert_to_markdown
+from llamarker.profiling import NullProfiler, StageProfiler
+from llamarker.scratch import DEFAULT_RAM_DIR, ScratchSpace
+from llamarker.tracing import Tracer, bind_context, get_tracer, set_tracer
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
+import sys
 import tempfile
 import shutil
+import threading
+import time
+
+# Above this many converted files the CLI summary shows totals and a page-count histogram
+SUMMARY_MAX_FILES = 50
+# Each extra Marker process loads its own models; "lpt" only splits the PDFs across processes
+# if that shortens the Marker run predicted from the page counts by at least this fraction
+MARKER_SPLIT_MIN_GAIN = 0.2
+
+
+class PipelineCancelled(RuntimeError):
+    """Raised when a run is stopped through its cancel event."""
 
 
 class LlaMarker:
@@ -16,7 +39,7 @@ class LlaMarker:
     A class to handle document parsing, conversion, and analysis operations.
     """
 
-    def __init__(self, input_dir: str = None, file_path: str = None, temp_dir: str = None, save_pdfs: bool = False, output_dir: str = None, logger: logging.Logger = None, marker_path: str = None, verbose: int = 0):
+    def __init__(self, input_dir: str = None, file_path: str = None, temp_dir: str = None, save_pdfs: bool = False, output_dir: str = None, logger: logging.Logger = None, marker_path: str = None, verbose: int = 0, ollama_hosts: List[str] = None, max_model_calls: int = None, model_rate_limit: float = None, adaptive_concurrency: bool = False, target_p95_latency: float = 60.0, metrics_dir: str = None, profile: bool = False, trace_file: str = None, progress_callback: Callable[[str, Optional[str], str, Optional[float]], None] = None, cancel_event: threading.Event = None, libreoffice_profile: str = None, marker_runner=None, scheduler: ModelCallScheduler = None, ollama_backend=None, checkpoint: bool = False, resume: bool = False, chunk_file: str = None, chunk_size: int = 1500, chunk_overlap: int = 200, scratch_ram: int = 0, scratch_ram_dir: str = DEFAULT_RAM_DIR, schedule: str = "lpt", selective_ocr: bool = False, ocr_min_chars: int = 100, direct_text: bool = True, clean_pdfs: bool = True):
         """
         Initialize the LlaMarker instance with input parameters.
         
@@ -29,6 +52,44 @@ class LlaMarker:
             logger (logging.Logger): Logger instance for logging progress.
             marker_path (str): Path to the Marker executable.
             verbose (int): Verbosity level for logging (0: WARNING, 1: INFO, 2: DEBUG). Defaults to 0.
+            ollama_hosts (List[str]): Ollama hosts to balance image processing requests across. Defaults to the local host.
+            max_model_calls (int): Maximum number of concurrent model calls across all documents. Defaults to unlimited.
+            model_rate_limit (float): Maximum number of model calls started per second. Defaults to unlimited.
+            adaptive_concurrency (bool): Adapt the number of concurrent model calls to observed latency, up to `max_model_calls` (or 16). Defaults to False.
+            target_p95_latency (float): p95 model call latency in seconds the adaptive controller aims to stay under. Defaults to 60.
+            metrics_dir (str): Directory to write per-stage, per-document metrics to (`metrics.jsonl` and `llamarker.prom`). Defaults to None (disabled).
+            profile (bool): Profile each stage and save flamegraph-ready files under `<parent_dir>/profiles`. Defaults to False.
+            trace_file (str): JSONL file to export trace spans (documents, stages, subprocesses, model calls) to. Defaults to None (disabled).
+            progress_callback (Callable): Called as `(stage, document, status, seconds)` when a stage or document starts ("running")
+                or ends ("done"/"failed"); `document` is None for whole stages and `seconds` is None on start. Defaults to None.
+            cancel_event (threading.Event): When set, the run stops before the next document with `PipelineCancelled`. Defaults to None.
+            libreoffice_profile (str): LibreOffice user profile directory to reuse across conversions. Defaults to None (LibreOffice's default).
+            marker_runner: Object whose `convert(pdf_path, output_dir, force_ocr, languages)` runs Marker in-process with
+                preloaded models, used instead of the Marker executable. Defaults to None.
+            scheduler (ModelCallScheduler): Existing scheduler to share, e.g. across the jobs of a long-running service. Defaults to a new one
+                built from `max_model_calls`, `model_rate_limit` and `adaptive_concurrency`.
+            ollama_backend (OllamaBackendPool): Running pool of Ollama hosts to reuse instead of building one from `ollama_hosts`. Defaults to None.
+            checkpoint (bool): Record each finished stage per document and each enriched figure under `<output>/.llamarker_checkpoint`,
+                and keep the intermediate PDFs there, so an interrupted run can be resumed. Defaults to False.
+            resume (bool): Continue the checkpointed run in the same output directory, skipping finished work (implies `checkpoint`). Defaults to False.
+            chunk_file (str): JSONL file that receives RAG-ready chunks of each document as soon as it is enriched, with page range,
+                section heading and figure text. Marker is then run with page separators. Defaults to None (no chunks).
+            chunk_size (int): Target chunk length in characters for `chunk_file` (default: 1500).
+            chunk_overlap (int): Characters repeated between consecutive chunks for `chunk_file` (default: 200).
+            scratch_ram (int): Bytes of converted PDFs kept on a RAM disk instead of `temp_dir`; PDFs beyond the cap are
+                written to disk. Each PDF is deleted as soon as Marker has parsed it. Defaults to 0 (disk only).
+            scratch_ram_dir (str): tmpfs mount for `scratch_ram`. Defaults to "/dev/shm".
+            schedule (str): Order in which documents are handed to Marker and enrichment workers: "lpt" starts the
+                documents with the most pages (Marker) or figures (enrichment) first, "fifo" keeps discovery order. With "lpt",
+                the PDFs are only split across several Marker processes when their page counts are skewed enough
+                (`MARKER_SPLIT_MIN_GAIN`); otherwise one Marker process runs with `workers`. Defaults to "lpt".
+            selective_ocr (bool): OCR only the pages without a usable text layer instead of leaving OCR to Marker's
+                per-document decision; the pages are parsed in two parts and merged. `force_ocr` takes precedence. Defaults to False.
+            ocr_min_chars (int): Characters of extractable text below which a page with an image counts as scanned. Defaults to 100.
+            direct_text (bool): Convert .txt and .csv files straight to Markdown (CSV as tables) instead of rendering them
+                to PDF and parsing them with Marker; such documents have no PDF. Defaults to True.
+            clean_pdfs (bool): Empty the PDFs folder of `save_pdfs` first. Defaults to True; incremental runs pass False
+                to keep the PDFs of earlier runs.
             
         Raises:
             FileNotFoundError: If the 'marker' executable is not found in the system PATH.        
@@ -41,7 +102,20 @@ class LlaMarker:
         self.save_dir = None
         self.verbose = verbose
         self.save_pdfs = save_pdfs
-        if not marker_path:
+        self.ollama_hosts = ollama_hosts
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self.ollama_backend = ollama_backend
+        if scheduler:
+            self.scheduler = scheduler
+        else:
+            self.scheduler = ModelCallScheduler(max_concurrency=max_model_calls, rate_limit=model_rate_limit, logger=self.logger)
+        if adaptive_concurrency and not scheduler:
+            AIMDController(self.scheduler, max_concurrency=max_model_calls or 16, target_p95=target_p95_latency, logger=self.logger)
+        self.marker_runner = marker_runner
+        if marker_runner:
+            self.marker_path = marker_path
+        elif not marker_path:
             self.marker_path = shutil.which("marker")
             if not self.marker_path:
                 self.logger.error("The 'marker' executable was not found in the system's PATH.")
@@ -72,8 +146,38 @@ class LlaMarker:
             else:
                 self.out_dir = self.parent_dir/"ParsedFiles"
 
+        # Checkpoints and the intermediate PDFs are kept next to the outputs, so a crashed run can be resumed
+        self.checkpoint = None
+        self.checkpoint_dir = self.parent_dir / ".llamarker_checkpoint"
+        if checkpoint or resume:
+            if not resume:
+                shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+            self.checkpoint = CheckpointStore(self.checkpoint_dir / "state.sqlite3", logger=self.logger)
+            if not temp_dir:
+                self.temp_dir.rmdir()
+                self.temp_dir = self.checkpoint_dir / "pdfs"
+                self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.resume = resume
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown schedule {schedule!r}; expected one of {SCHEDULES}.")
+        self.schedule = schedule
+        self.selective_ocr = selective_ocr
+        self.ocr_min_chars = ocr_min_chars
+        self.direct_text = direct_text
+        self.sources = {}  # document stem -> source file
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.chunk_sink = None
+        if chunk_file:
+            if not resume:
+                Path(chunk_file).unlink(missing_ok=True)
+            self.chunk_sink = ResultsSink(chunk_file, logger=self.logger)
+
         # Temporary folder to store converted PDFs
         self.logger.info(f"Temporary directory created at: {self.temp_dir}")
+        self.scratch = ScratchSpace(self.temp_dir, ram_limit=scratch_ram, ram_dir=scratch_ram_dir, logger=self.logger)
+        # Markdown of documents converted without a PDF, until it is moved to ParsedFiles
+        self.direct_dir = self.temp_dir / "direct"
 
         # Validate input
         if self.file_path and not self.file_path.exists():
@@ -84,7 +188,14 @@ class LlaMarker:
             raise FileNotFoundError(f"Input directory not found: {self.input_dir}")
 
         self.setup_logging()
-        self.file_converter = FileToPDFConverter(input_dir=self.input_dir, file_path=self.file_path, temp_dir=self.temp_dir, save_dir=self.save_dir, logger=self.logger)
+        self.metrics = MetricsRecorder(metrics_dir, logger=self.logger) if metrics_dir else NullMetrics()
+        self.profiler = StageProfiler(self.parent_dir / "profiles", logger=self.logger) if profile else NullProfiler()
+        if trace_file:
+            set_tracer(Tracer(trace_file, logger=self.logger))
+        # Heavy dependencies (pypdf, matplotlib, ollama, pydantic) are imported by the stage that needs them,
+        # so `llamarker --help` and importing this module stay fast
+        from llamarker.file_to_pdf_converter import FileToPDFConverter
+        self.file_converter = FileToPDFConverter(input_dir=self.input_dir, file_path=self.file_path, temp_dir=self.temp_dir, save_dir=self.save_dir, logger=self.logger, metrics=self.metrics, profile_dir=libreoffice_profile, scratch=self.scratch, clean=clean_pdfs)
 
     def setup_logging(self):
         """Configure logging for the LlaMarker operations based on verbosity level."""
@@ -98,35 +209,290 @@ class LlaMarker:
         
         log_level = level_map.get(self.verbose, logging.DEBUG)  # Default to DEBUG if invalid verbose level
         
-        # Create log directory if it doesn't exist
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = log_dir / f"llamarker_{timestamp}.log"
-
-        # Configure logging
-        logging.basicConfig(
-            level=log_level,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler(),
-            ],
-        )
-        
+        # Handlers are installed once per process; records are written by a background thread
+        log_file = configure_logging(log_level)
+        self.results_sink = ResultsSink(log_file.with_name(f"{log_file.stem}_results.jsonl"))
+
         self.logger = logging.getLogger(__name__)
         self.logger.info("Logging setup completed with level: %s", logging.getLevelName(log_level))
 
-    def process_documents(self) -> None:
-        """Process all documents in the root directory."""
+    def _report(self, stage: str, document: Optional[str], status: str, seconds: Optional[float] = None) -> None:
+        """Forwards a progress event to the progress callback, if any."""
+        if self.progress_callback:
+            try:
+                self.progress_callback(stage, document, status, seconds)
+            except Exception as e:
+                self.logger.error(f"Progress callback failed: {e}")
+
+    def _check_cancelled(self) -> None:
+        """Raises `PipelineCancelled` if the cancel event is set."""
+        if self.cancel_event and self.cancel_event.is_set():
+            raise PipelineCancelled("Processing was cancelled.")
+
+    def process_documents(self, files: Iterable[Path] = None) -> None:
+        """
+        Process all documents in the root directory.
+
+        Args:
+            files (Iterable[Path], optional): Convert these files instead, each as soon as the iterable yields it
+                (e.g. while an upload is still being extracted). Defaults to None (all files in the input).
+        """
         try:
-            self.file_converter.convert_and_count_pages()
+            with get_tracer().span("stage", stage="convert"), self.metrics.measure("stage", "convert") as record, self.profiler.stage("convert"):
+                if files is None:
+                    files = [self.file_path] if self.file_path else (file for file in self.input_dir.rglob("*") if self.checkpoint_dir not in file.parents)
+                self._report("convert", None, "running")
+                start = time.perf_counter()
+                for file in files:
+                    self._check_cancelled()
+                    file = Path(file)
+                    file_start = time.perf_counter()
+                    if self.checkpoint and file.is_file() and file.suffix.lower() in SUPPORTED_EXTENSIONS and self._restore_conversion(file):
+                        self.sources[file.stem] = str(file)
+                        self._report("convert", file.stem, "done", 0.0)
+                        continue
+                    direct = self._is_direct(file)
+                    if direct:
+                        converted = self._convert_direct(file)
+                    else:
+                        converted = self.file_converter.convert_file(file)
+                    if converted:
+                        self.sources[file.stem] = str(file)
+                    if converted is not None:
+                        self._report("convert", file.stem, "done" if converted else "failed", time.perf_counter() - file_start)
+                    if converted and self.checkpoint:
+                        pdf_file, pages = self.file_converter.get_results()[-1]
+                        stat = file.stat()
+                        # A direct conversion has no PDF; its Markdown is moved to ParsedFiles before Marker runs
+                        self.checkpoint.complete(file.stem, "convert", source=str(file.resolve()), size=stat.st_size, mtime_ns=stat.st_mtime_ns, pdf=None if direct else pdf_file, pages=pages, direct=direct)
+                self.logger.info(f"Processing completed: {len(self.file_converter.get_results())} files converted.")
+                self._report("convert", None, "done", time.perf_counter() - start)
+                record["pages"] = self.file_converter.results.total_pages
         except Exception as e:
             self.logger.error(f"Error during document processing: {e}")
             raise
+        finally:
+            self.metrics.write_prometheus()
+
+    def _is_direct(self, file: Path) -> bool:
+        """Whether `file` is converted straight to Markdown instead of to a PDF."""
+        return self.direct_text and file.is_file() and file.suffix.lower() in DIRECT_EXTENSIONS
+
+    def _convert_direct(self, file: Path) -> bool:
+        """
+        Converts a .txt or .csv file straight to Markdown in `direct_dir`, bypassing LibreOffice and Marker.
+        Returns True if the conversion succeeded.
+        """
+        markdown_file = self.direct_dir / file.stem / f"{file.stem}.md"
+        tracer = get_tracer()
+        with tracer.span("document", trace_id=tracer.document_trace_id(file.stem), document=file.name, stage="convert") as span, \
+                self.metrics.measure("document", "convert", document=file.name) as record:
+            try:
+                record["bytes_in"] = file.stat().st_size
+                markdown_file.parent.mkdir(parents=True, exist_ok=True)
+                pages = convert_to_markdown(file, markdown_file)
+                self.file_converter.results.append((str(markdown_file), pages))
+                record["bytes_out"] = markdown_file.stat().st_size
+                record["pages"] = pages
+                span.set_attributes(pages=pages, bytes_in=record["bytes_in"], bytes_out=record["bytes_out"])
+                self.logger.info(f"Converted: {file} -> {markdown_file} (direct, {pages} pages)")
+                return True
+            except Exception as e:
+                record["status"] = "error"
+                span.set_attribute("error", str(e))
+                self.logger.error(f"Failed to convert {file}: {e}")
+                return False
+
+    def _place_direct(self) -> None:
+        """Moves the Markdown of documents converted without a PDF to ParsedFiles, where Marker's output goes."""
+        if not self.direct_dir.is_dir():
+            return
+        for document_dir in sorted(self.direct_dir.iterdir()):
+            shutil.rmtree(self.out_dir / document_dir.name, ignore_errors=True)
+            shutil.move(str(document_dir), str(self.out_dir / document_dir.name))
+            if self.checkpoint:
+                self.checkpoint.complete(document_dir.name, "marker")
+        shutil.rmtree(self.direct_dir, ignore_errors=True)
 
-    def parse_with_marker(self, workers: int = 4, force_ocr: bool = False, languages: str = "en") -> None:
+    def _restore_conversion(self, file: Path) -> bool:
+        """
+        Reuses the PDF of a checkpointed conversion if the source file is unchanged; otherwise
+        forgets the document's recorded progress. Returns True if the conversion was reused.
+        """
+        converted = self.checkpoint.stage(file.stem, "convert") if self.resume else None
+        if converted and converted.get("direct", False) == self._is_direct(file):
+            stat = file.stat()
+            unchanged = (converted["source"], converted["size"], converted["mtime_ns"]) == (str(file.resolve()), stat.st_size, stat.st_mtime_ns)
+            if unchanged and converted.get("direct"):
+                # The Markdown waits in direct_dir until it is moved to ParsedFiles
+                markdown_file = self.direct_dir / file.stem / f"{file.stem}.md"
+                if markdown_file.exists() or not self._needs_marker(file.stem):
+                    self.file_converter.results.append((str(markdown_file), converted["pages"]))
+                    self.logger.info(f"Resuming: {file.name} was already converted")
+                    return True
+            # The PDF itself is deleted once Marker has parsed it
+            elif unchanged and (Path(converted["pdf"]).exists() or not self._needs_marker(file.stem)):
+                self.file_converter.results.append((converted["pdf"], converted["pages"]))
+                if self.save_dir and Path(converted["pdf"]).exists() and not (self.save_dir / Path(converted["pdf"]).name).exists():
+                    shutil.copy2(converted["pdf"], self.save_dir)
+                self.logger.info(f"Resuming: {file.name} was already converted")
+                return True
+        self.checkpoint.reset(file.stem)
+        return False
+
+    def _needs_marker(self, document: str) -> bool:
+        """Whether Marker has to (re-)parse a checkpointed document."""
+        if self.checkpoint.is_done(document, "enrich"):
+            return False
+        return not (self.checkpoint.is_done(document, "marker") and (self.out_dir / document / f"{document}.md").exists())
+
+    def _page_counts(self, documents: Iterable[str]) -> Dict[str, int]:
+        """Page counts of the given converted documents, by document name, looked up in the conversion results."""
+        return self.file_converter.results.pages(documents)
+
+    def _marker_command(self, source_dir: Path, workers: int, force_ocr: bool, languages: str, output_dir: Path = None, paginate: bool = False) -> List[str]:
+        """Builds the Marker command that parses every PDF in `source_dir` into `output_dir` (default: ParsedFiles)."""
+        command = [
+            self.marker_path,
+            str(source_dir),
+            "--output_dir",
+            str(output_dir or self.out_dir),
+            "--workers",
+            str(workers),
+        ]
+
+        # Add force OCR option if enabled
+        if force_ocr:
+            command.append("--force_ocr")
+
+        # Add languages option
+        command.extend(["--languages", languages])
+
+        # Page separators give chunks exact page ranges
+        if paginate or self.chunk_sink:
+            command.append("--paginate_output")
+        return command
+
+    def _split_marker(self, pdf_files: List[Path], workers: int) -> bool:
+        """
+        Whether to split the PDFs across `workers` Marker processes, longest first, instead of running one
+        Marker pool, which takes them in folder order: only worth the extra model loads for skewed page counts.
+        """
+        if self.schedule != "lpt" or workers < 2 or len(pdf_files) < 2:
+            return False
+        pages = self._page_counts(pdf_file.stem for pdf_file in pdf_files)
+        gain = lpt_gain([pages.get(pdf_file.stem, 1) for pdf_file in pdf_files], workers)
+        self.logger.info(f"Longest-first Marker processes would shorten the predicted Marker run by {gain:.0%}")
+        return gain >= MARKER_SPLIT_MIN_GAIN
+
+    def _run_marker_lpt(self, pdf_files: List[Path], workers: int, force_ocr: bool, languages: str) -> None:
+        """
+        Splits the PDFs across `workers` Marker processes, longest documents first, each one going to
+        the process with the fewest pages so far, and runs the processes side by side. Marker's own
+        pool would hand out the documents in folder order instead.
+        """
+        pages = self._page_counts(pdf_file.stem for pdf_file in pdf_files)
+        cost = lambda pdf_file: pages.get(pdf_file.stem, 1)
+        groups = partition(longest_first(pdf_files, cost), cost, workers)
+        processes = []
+        try:
+            for index, group in enumerate(groups):
+                group_dir = self.temp_dir / f"marker_{index}"
+                shutil.rmtree(group_dir, ignore_errors=True)
+                group_dir.mkdir()
+                for pdf_file in group:
+                    (group_dir / pdf_file.name).symlink_to(pdf_file.resolve())
+                command = self._marker_command(group_dir, 1, force_ocr, languages)
+                self.logger.info(f"Running Marker command for {len(group)} documents ({sum(map(cost, group))} pages): {' '.join(command)}")
+                processes.append((subprocess.Popen(self.profiler.wrap_command(f"marker_{index}", command)), command))
+            for process, command in processes:
+                if process.wait() != 0:
+                    raise subprocess.CalledProcessError(process.returncode, command)
+        finally:
+            for process, _ in processes:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+            for index in range(len(groups)):
+                shutil.rmtree(self.temp_dir / f"marker_{index}", ignore_errors=True)
+
+    def _run_marker_folder(self, source_dir: Path, output_dir: Path, workers: int, force_ocr: bool, languages: str) -> None:
+        """Parses every PDF in `source_dir` into `output_dir` with page separators, in-process if possible."""
+        if self.marker_runner:
+            for pdf_file in sorted(source_dir.glob("*.pdf")):
+                self._check_cancelled()
+                self.marker_runner.convert(pdf_file, output_dir, force_ocr=force_ocr, languages=languages, paginate=True)
+            return
+        command = self._marker_command(source_dir, workers, force_ocr, languages, output_dir=output_dir, paginate=True)
+        self.logger.info(f"Running Marker command: {' '.join(command)}")
+        # marker_text / marker_ocr, so neither run overwrites the other's profile
+        subprocess.run(self.profiler.wrap_command(f"marker_{source_dir.name}", command), check=True)
+
+    def _parse_selective_ocr(self, pdf_files: List[Path], workers: int, languages: str) -> List[Path]:
+        """
+        OCRs only the scanned pages. Documents with pages that lack a text layer are split into a
+        born-digital and a scanned part, which Marker parses separately (OCR forced on the scanned part
+        only); the parts are merged back into ParsedFiles/<document>.
+
+        Returns:
+            List[Path]: The documents without scanned pages, still to be parsed as usual.
+        """
+        from llamarker.selective_ocr import classify_pages, merge_parts, write_pages
+
+        plan = {}
+        for pdf_file in pdf_files:
+            flags = classify_pages(pdf_file, self.ocr_min_chars)
+            if any(flags):
+                plan[pdf_file] = flags
+                self.logger.info(f"{pdf_file.stem}: {sum(flags)} of {len(flags)} pages need OCR")
+        if not plan:
+            return pdf_files
+
+        work_dir = self.temp_dir / "selective_ocr"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        parts = {}
+        try:
+            with get_tracer().span("subprocess", tool="marker", documents=len(plan), pages=sum(len(flags) for flags in plan.values()), ocr_pages=sum(sum(flags) for flags in plan.values())):
+                for pdf_file, flags in plan.items():
+                    parts[pdf_file] = []
+                    for kind, needs_ocr in (("text", False), ("ocr", True)):
+                        pages = [index for index, flag in enumerate(flags) if flag == needs_ocr]
+                        if pages:
+                            write_pages(pdf_file, pages, work_dir / kind / pdf_file.name)
+                            parts[pdf_file].append((work_dir / f"{kind}_out" / pdf_file.stem, pages))
+                for kind, force_ocr in (("text", False), ("ocr", True)):
+                    if (work_dir / kind).is_dir():
+                        self._run_marker_folder(work_dir / kind, work_dir / f"{kind}_out", workers, force_ocr, languages)
+            for pdf_file, document_parts in parts.items():
+                try:
+                    merge_parts(pdf_file.stem, document_parts, self.out_dir / pdf_file.stem, paginate=self.chunk_sink is not None)
+                except Exception as e:
+                    # Like a failed parse: the PDF is kept for a retry
+                    self.logger.error(f"Failed to merge the parts of {pdf_file.name}: {e}")
+                    continue
+                self._marker_finished(pdf_file)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return [pdf_file for pdf_file in pdf_files if pdf_file not in plan]
+
+    def _marker_finished(self, pdf_file: Path) -> None:
+        """
+        Records that Marker parsed `pdf_file` and deletes the PDF, whose last consumer Marker is (PDFs to
+        keep were copied to PDFs/ when converted). The PDF of a failed parse is kept for a retry.
+        """
+        if not (self.out_dir / pdf_file.stem / f"{pdf_file.stem}.md").exists():
+            return
+        if self.checkpoint:
+            self.checkpoint.complete(pdf_file.stem, "marker")
+        self.scratch.release(pdf_file)
+
+    def _write_chunks(self, document: str, markdown_file: Path, results) -> None:
+        """Streams the chunks of one document to the chunk file, with the figure text looked up in `results` (`FigureResults`)."""
+        with open(markdown_file, "r", encoding="utf-8") as f:
+            for chunk in chunk_markdown(f, results, chunk_size=self.chunk_size, overlap=self.chunk_overlap):
+                self.chunk_sink.write({"id": f"{document}:{chunk['chunk']}", "document": document, "source": self.sources.get(document), **chunk})
+
+    def parse_with_marker(self, workers: int = 4, force_ocr: bool = False, languages: str = "en", clean: bool = True) -> None:
         """
         Parse the OutDir folder using Marker and store the results in ParsedFiles.
 
@@ -134,93 +500,214 @@ class LlaMarker:
             workers (int): Number of worker threads to use (default: 4).
             force_ocr (bool): Whether to force OCR processing on all pages (default: False).
             languages (str): Comma-separated list of languages for OCR processing (default: "en").
+            clean (bool): Empty ParsedFiles first (default: True). Incremental runs pass False to keep earlier results.
         """
+        self._check_cancelled()
         self.logger.info(f"Starting parsing with Marker for directory: {self.temp_dir}")
+        self._report("marker", None, "running")
+        start = time.perf_counter()
 
-        # Clean or create ParsedFiles directory
-        if self.out_dir.exists():
+        # Clean or create ParsedFiles directory; a resumed run keeps what was parsed and enriched before
+        if clean and not self.resume and self.out_dir.exists():
             self.logger.info(f"Cleaning existing ParsedFiles directory: {self.out_dir}")
             for item in self.out_dir.iterdir():
                 if item.is_dir():
                     shutil.rmtree(item)
                 else:
                     item.unlink()
-        self.out_dir.mkdir(exist_ok=True)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._place_direct()
 
-        if self.temp_dir.is_dir():
-            # Run Marker command for the current directory
-            try:
-                command = [
-                    self.marker_path,
-                    str(self.temp_dir),
-                    "--output_dir",
-                    str(self.out_dir),
-                    "--workers",
-                    str(workers),
-                ]
-                
-                # Add force OCR option if enabled
-                if force_ocr:
-                    command.append("--force_ocr")
-                
-                # Add languages option
-                command.extend(["--languages", languages])
-
-                self.logger.info(f"Running Marker command: {' '.join(command)}")
-                subprocess.run(command, check=True)
-                self.logger.info(f"Parsing completed for directory: {self.temp_dir}")
-            except subprocess.CalledProcessError as e:
-                self.logger.error(f"Marker command failed for {self.temp_dir}: {e}")
-                raise
-            except Exception as e:
-                self.logger.error(f"Error during parsing for {self.temp_dir}: {e}")
-                raise
+        source_dir = self.temp_dir
+        pdf_files = sorted(self.temp_dir.glob("*.pdf")) if self.temp_dir.is_dir() else []
+        if self.checkpoint:
+            pending = [pdf_file for pdf_file in pdf_files if self._needs_marker(pdf_file.stem)]
+            if pdf_files and not pending:
+                self.logger.info("Resuming: all documents were already parsed by Marker")
+                self._report("marker", None, "done", time.perf_counter() - start)
+                return
+            if len(pending) < len(pdf_files):
+                self.logger.info(f"Resuming: {len(pdf_files) - len(pending)} documents were already parsed, {len(pending)} left")
+            pdf_files = pending
+        pdf_count = len(pdf_files)
+
+        with get_tracer().span("stage", stage="marker"), self.metrics.measure("stage", "marker") as record, self.profiler.stage("marker"):
+            record["bytes_in"] = sum(pdf_file.stat().st_size for pdf_file in pdf_files)
+            record["pages"] = self.file_converter.results.total_pages
+            if self.selective_ocr and not force_ocr and pdf_files:
+                try:
+                    pdf_files = self._parse_selective_ocr(pdf_files, workers, languages)
+                except Exception as e:
+                    self.logger.error(f"Error during selective OCR for {self.temp_dir}: {e}")
+                    self._report("marker", None, "failed", time.perf_counter() - start)
+                    raise
+            if self.temp_dir.is_dir() and len(pdf_files) < len(list(self.temp_dir.glob("*.pdf"))):
+                # Marker parses whole folders; give it one with only the documents left to parse
+                source_dir = self.temp_dir / "pending"
+                shutil.rmtree(source_dir, ignore_errors=True)
+                source_dir.mkdir()
+                for pdf_file in pdf_files:
+                    (source_dir / pdf_file.name).symlink_to(pdf_file.resolve())
+            if not pdf_files:
+                self.logger.info("All documents were parsed with selective OCR" if pdf_count else "No PDFs to parse with Marker")
+                record["bytes_out"] = directory_size(self.out_dir)
+                record["figures"] = sum(1 for image in self.out_dir.rglob("*") if image.suffix in (".png", ".jpg", ".jpeg"))
+            elif self.temp_dir.is_dir() and self.marker_runner:
+                # Models are already loaded; convert the PDFs one by one in this process
+                try:
+                    if self.schedule == "lpt":
+                        pages = self._page_counts(pdf_file.stem for pdf_file in pdf_files)
+                        pdf_files = longest_first(pdf_files, lambda pdf_file: pages.get(pdf_file.stem, 1))
+                    for pdf_file in pdf_files:
+                        self._check_cancelled()
+                        with get_tracer().span("marker", document=pdf_file.name, in_process=True):
+                            self.marker_runner.convert(pdf_file, self.out_dir, force_ocr=force_ocr, languages=languages, paginate=self.chunk_sink is not None)
+                        self._marker_finished(pdf_file)
+                    record["bytes_out"] = directory_size(self.out_dir)
+                    record["figures"] = sum(1 for image in self.out_dir.rglob("*") if image.suffix in (".png", ".jpg", ".jpeg"))
+                except Exception as e:
+                    self.logger.error(f"Error during parsing for {self.temp_dir}: {e}")
+                    self._report("marker", None, "failed", time.perf_counter() - start)
+                    raise
+            elif self.temp_dir.is_dir():
+                # Run Marker command for the current directory
+                try:
+                    with get_tracer().span("subprocess", tool="marker", documents=len(pdf_files), pages=record.get("pages"), force_ocr=force_ocr):
+                        if self._split_marker(pdf_files, workers):
+                            self._run_marker_lpt(pdf_files, workers, force_ocr, languages)
+                        else:
+                            command = self._marker_command(source_dir, workers, force_ocr, languages)
+                            self.logger.info(f"Running Marker command: {' '.join(command)}")
+                            subprocess.run(self.profiler.wrap_command("marker", command), check=True)
+                    self.logger.info(f"Parsing completed for directory: {self.temp_dir}")
+                    for pdf_file in pdf_files:
+                        self._marker_finished(pdf_file)
+                    record["bytes_out"] = directory_size(self.out_dir)
+                    record["figures"] = sum(1 for image in self.out_dir.rglob("*") if image.suffix in (".png", ".jpg", ".jpeg"))
+                except subprocess.CalledProcessError as e:
+                    self.logger.error(f"Marker command failed for {self.temp_dir}: {e}")
+                    self._report("marker", None, "failed", time.perf_counter() - start)
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Error during parsing for {self.temp_dir}: {e}")
+                    self._report("marker", None, "failed", time.perf_counter() - start)
+                    raise
+
+        if source_dir != self.temp_dir:
+            shutil.rmtree(source_dir, ignore_errors=True)
 
+        self.metrics.write_prometheus()
+        self._report("marker", None, "done", time.perf_counter() - start)
         self.logger.info(f"Parsing completed successfully for all file. Parsed files saved in {self.out_dir}")
 
 
-    def process_subdirectories(self, model: str = 'llama3.2-vision', qa_evaluator: bool = True) -> None:
+    def process_subdirectories(self, model: str = 'llama3.2-vision', qa_evaluator: bool = True, workers: int = 1, image_workers: int = 1, keep_alive: str = None) -> None:
         """
         Process all directories (including nested subdirectories) in the root directory with ImageProcessor.
 
         Args:
             model (str): Name of the Ollama model to use.
+            qa_evaluator (bool): Whether to enable the QA evaluator (default: True).
+            workers (int): Number of documents processed concurrently (default: 1).
+            image_workers (int): Number of images processed concurrently within each document (default: 1).
+            keep_alive (str): How long Ollama keeps the model loaded after each call, e.g. "30m" or "-1" (default: Ollama's default).
         """
+        from llamarker.img_processor import ImageProcessor
+        from llamarker.ollama_pool import OllamaBackendPool
+
         self.logger.info(f"Processing directories in: {self.out_dir}")
 
-        # Recursively traverse all directories
-        for subdir in self.out_dir.rglob("*"):
-            if subdir.is_dir():
-                self.logger.info(f"Processing directory: {subdir}")
-                try:
-                    # Check if the directory contains an .md file
-                    markdown_files = list(subdir.glob("*.md"))
-                    if not markdown_files:
-                        self.logger.warning(f"Skipping directory {subdir}: No Markdown (.md) file found.")
-                        continue
+        backend = self.ollama_backend
+        if not backend and self.ollama_hosts:
+            backend = OllamaBackendPool(self.ollama_hosts, logger=self.logger)
+            backend.start_health_checks()
 
-                    # Process the directory using ImageProcessor
-                    processor = ImageProcessor(folder_path=str(subdir), model=model, logger=self.logger, qa_evaluator=qa_evaluator)
-                    processor.process_images()
-                    processor.update_markdown()
-                    processor.summarize_results()
-                except Exception as e:
-                    self.logger.error(f"Failed to process directory {subdir}: {e}")
+        def process(subdir: Path) -> None:
+            self._check_cancelled()
+            self.logger.info(f"Processing directory: {subdir}")
+            start = time.perf_counter()
+            try:
+                # Check if the directory contains an .md file
+                markdown_files = list(subdir.glob("*.md"))
+                if not markdown_files:
+                    self.logger.warning(f"Skipping directory {subdir}: No Markdown (.md) file found.")
+                    return
+
+                # Process the directory using ImageProcessor
+                self._report("enrich", subdir.name, "running")
+                tracer = get_tracer()
+                with tracer.span("document", trace_id=tracer.document_trace_id(subdir.name), document=subdir.name, stage="enrich") as span, \
+                        self.metrics.measure("document", "enrich", document=subdir.name) as record:
+                    record["bytes_in"] = markdown_files[0].stat().st_size
+                    processor = ImageProcessor(folder_path=str(subdir), model=model, logger=self.logger, qa_evaluator=qa_evaluator, backend=backend, scheduler=self.scheduler, workers=image_workers, metrics=self.metrics, results_sink=self.results_sink, keep_alive=keep_alive, checkpoint=self.checkpoint)
+                    try:
+                        processor.process_images()
+                        if self.chunk_sink:
+                            self._write_chunks(subdir.name, markdown_files[0], processor.results)
+                        processor.update_markdown()
+                        processor.summarize_results()
+                    finally:
+                        # The figure text is in the Markdown, the chunks and the results sink now
+                        figures = processor.results.with_info
+                        processor.results.close()
+                    if self.checkpoint:
+                        self.checkpoint.complete(subdir.name, "enrich")
+                    record["bytes_out"] = (subdir.parent / markdown_files[0].name).stat().st_size
+                    record["figures"] = figures
+                    record["retries"] = processor.retries
+                    record["cache_hits"] = processor.cache_hits
+                    span.set_attributes(figures=record["figures"], retries=processor.retries, cache_hits=processor.cache_hits)
+                self._report("enrich", subdir.name, "done", time.perf_counter() - start)
+            except Exception as e:
+                self.logger.error(f"Failed to process directory {subdir}: {e}")
+                self._report("enrich", subdir.name, "failed", time.perf_counter() - start)
 
-        if self.temp_dir.exists():
-            self.file_converter.cleanup()
+        # Recursively traverse all directories; figures of earlier runs are already in pics
+        pics_dir = self.out_dir / "pics"
+        subdirs = [subdir for subdir in self.out_dir.rglob("*") if subdir.is_dir() and subdir != pics_dir and pics_dir not in subdir.parents]
+        if self.schedule == "lpt":
+            # Model calls per figure dominate enrichment; start the documents with the most figures first
+            pages = self._page_counts(subdir.name for subdir in subdirs)
+            subdirs = longest_first(subdirs, lambda subdir: sum(1 for image in subdir.iterdir() if image.suffix in (".png", ".jpg", ".jpeg")) + pages.get(subdir.name, 0) / 1000)
+        self._report("enrich", None, "running")
+        start = time.perf_counter()
+        try:
+            with get_tracer().span("stage", stage="enrich"), self.metrics.measure("stage", "enrich"), self.profiler.stage("enrich"), ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                list(executor.map(bind_context(process), subdirs))
+        finally:
+            self.metrics.write_prometheus()
+            if backend and backend is not self.ollama_backend:
+                backend.stop()
+                backend.log_metrics()
+        self._report("enrich", None, "done", time.perf_counter() - start)
+
+        unfinished = [Path(pdf_file).stem for pdf_file, _ in self.file_converter.get_results() if not self.checkpoint.is_done(Path(pdf_file).stem, "enrich")] if self.checkpoint else []
+        # PDFs of unfinished documents still in RAM are moved to disk for a resume
+        self.scratch.close(persist=bool(unfinished))
+        if unfinished:
+            # Keep the checkpoint and intermediate PDFs so the unfinished documents can be retried
+            self.logger.warning(f"{len(unfinished)} document(s) did not finish; run again with --resume to retry only those.")
+        else:
+            if self.temp_dir.exists():
+                self.file_converter.cleanup()
+            if self.checkpoint:
+                self.checkpoint.close()
+                shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+                self.checkpoint = None
 
         self.logger.info("Finished processing all files.")
 
     
-    def generate_summary(self) -> List[Tuple[str, int]]:
+    def generate_summary(self) -> Iterator[Tuple[str, int]]:
         """
-        Generate a summary of processed documents.
+        Generate a summary of processed documents. Results are read back lazily, so this stays cheap
+        even when most of them were spilled to disk; use `file_converter.results` for totals and a
+        page-count histogram.
 
-        Returns:
-            List[Tuple[str, int]]: List of (filename, page_count) tuples
+        Yields:
+            Tuple[str, int]: (filename, page_count) tuples
         """
-        return self.file_converter.get_results()
+        yield from self.file_converter.get_results()
 
     def plot_analysis(self, output_dir: Optional[str] = None) -> None:
         """
@@ -229,6 +716,8 @@ class LlaMarker:
         Args:
             output_dir (Optional[str]): Directory to save plots. If None, uses current directory.
         """
+        import matplotlib.pyplot as plt
+
         try:
             if output_dir:
                 plot_dir = Path(output_dir)
@@ -247,8 +736,86 @@ class LlaMarker:
             raise
 
 
+def watch(args: argparse.Namespace) -> int:
+    """Runs the watch-folder mode until interrupted."""
+    from llamarker.watch import FolderWatchProcessor
+
+    try:
+        processor = FolderWatchProcessor(
+            input_dir=args.directory,
+            output_dir=args.output,
+            marker_path=args.marker_path,
+            model=args.model,
+            qa_evaluator=args.qa_evaluator,
+            force_ocr=args.force_ocr,
+            languages=args.languages,
+            save_pdfs=args.save_pdfs,
+            ollama_hosts=parse_hosts(args.ollama_hosts),
+            max_model_calls=args.max_model_calls,
+            keep_alive=args.keep_alive or "30m",
+            doc_workers=args.doc_workers,
+            image_workers=args.image_workers,
+            debounce=args.debounce,
+            poll_interval=args.poll_interval,
+            verbose=args.verbose,
+        )
+    except Exception as e:
+        print(f"\nError: {e}")
+        return 1
+
+    print(f"Watching {processor.input_dir} for new or modified documents (Ctrl+C to stop)...")
+    try:
+        processor.run()
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        processor.close()
+    return 0
+
+
+def shard(args: argparse.Namespace) -> int:
+    """Runs this process as one worker of a sharded run."""
+    from llamarker.shard import ShardWorker
+
+    configure_logging({0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG))
+    try:
+        worker = ShardWorker(
+            input_dir=args.directory,
+            output_dir=args.output,
+            shard_dir=args.shard_dir,
+            worker_id=args.worker_id,
+            lease_seconds=args.lease_seconds,
+            batch_size=args.shard_batch,
+            marker_path=args.marker_path,
+            model=args.model,
+            qa_evaluator=args.qa_evaluator,
+            force_ocr=args.force_ocr,
+            languages=args.languages,
+            save_pdfs=args.save_pdfs,
+            ollama_hosts=parse_hosts(args.ollama_hosts),
+            max_model_calls=args.max_model_calls,
+            keep_alive=args.keep_alive,
+            doc_workers=args.doc_workers,
+            image_workers=args.image_workers,
+            verbose=args.verbose,
+        )
+        summary = worker.run()
+    except Exception as e:
+        print(f"\nError: {e}")
+        logging.error(f"Fatal error during execution: {e}", exc_info=True)
+        return 1
+
+    print(f"\nSharded run finished: {summary['done']} of {summary['documents']} documents done, {summary['failed']} failed, {summary['pages']} pages.")
+    print(f"Summary written to {Path(args.output) / 'summary.json'}")
+    return 0 if not summary["failed"] else 1
+
+
 def main():
     """Main entry point for the LlaMarker application."""
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from llamarker.server import main as serve_main
+        return serve_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description="Process and analyze documents with LlaMarker."
     )
@@ -272,6 +839,15 @@ def main():
         action="store_true",
         help="Flag to save PDFs in a separate directory.",
     )
+    parser.add_argument(
+        "--scratch_ram_mb",
+        type=int,
+        default=0,
+        help="Keep up to this many MB of converted PDFs on a RAM disk instead of --temp_dir; larger batches fall back to disk (default: 0, disk only).",
+    )
+    parser.add_argument(
+        "--scratch_ram_dir", type=str, default=DEFAULT_RAM_DIR, help="tmpfs mount for --scratch_ram_mb (default: /dev/shm)."
+    )
     parser.add_argument(
         "--output",
         type=str,
@@ -291,6 +867,19 @@ def main():
         action="store_true",  # Boolean flag; if present, it's True
         help="Force OCR processing on the entire document, even for pages that might contain extractable text.",
     )
+    parser.add_argument(
+        "--selective_ocr",
+        action="store_true",
+        help="OCR only the scanned pages of each document (pages with an image but no usable text layer) and merge them back.",
+    )
+    parser.add_argument(
+        "--text_via_pdf",
+        action="store_true",
+        help="Convert .txt and .csv files through LibreOffice and Marker like other formats, instead of straight to Markdown.",
+    )
+    parser.add_argument(
+        "--ocr_min_chars", type=int, default=100, help="Characters of extractable text below which a page counts as scanned (default: 100)."
+    )
 
     # Argument for specifying languages
     parser.add_argument(
@@ -316,9 +905,127 @@ def main():
         default=0,
     )
     parser.add_argument("--model", type=str, default='llama3.2-vision', help="Ollama model to query.")
+    parser.add_argument(
+        "--doc_workers", type=int, default=1, help="Number of documents enriched concurrently (default: 1)."
+    )
+    parser.add_argument(
+        "--image_workers", type=int, default=1, help="Number of images processed concurrently per document (default: 1)."
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=SCHEDULES,
+        default="lpt",
+        help="Order of documents across Marker and enrichment workers: 'lpt' starts the longest documents first (splitting Marker into one process per worker only when page counts are skewed), 'fifo' keeps discovery order (default: lpt).",
+    )
+    parser.add_argument(
+        "--max_model_calls", type=int, default=None, help="Maximum number of concurrent Ollama calls (default: unlimited)."
+    )
+    parser.add_argument(
+        "--model_rate_limit", type=float, default=None, help="Maximum number of Ollama calls started per second (default: unlimited)."
+    )
+    parser.add_argument(
+        "--adaptive_concurrency",
+        action="store_true",
+        help="Adapt the number of concurrent Ollama calls to observed latency, up to --max_model_calls (default: 16).",
+    )
+    parser.add_argument(
+        "--target_p95_latency", type=float, default=60.0, help="Target p95 Ollama call latency in seconds for --adaptive_concurrency (default: 60)."
+    )
+    parser.add_argument(
+        "--plot",
+        action="store_true",
+        help="Save a bar chart of the page counts per file (page_counts.png) to the output directory.",
+    )
+    parser.add_argument(
+        "--metrics_dir",
+        type=str,
+        help="Directory to write per-stage, per-document metrics to as JSONL and a Prometheus textfile (optional).",
+        default=None,
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each stage and save flamegraph-ready files under <output>/profiles, then print the hot functions per stage.",
+    )
+    parser.add_argument(
+        "--trace_file",
+        type=str,
+        help="JSONL file to export trace spans to: one per document, stage, soffice/marker run and model call (optional).",
+        default=None,
+    )
+    parser.add_argument(
+        "--ollama_hosts",
+        type=str,
+        help='Comma-separated list of Ollama hosts to balance requests across (e.g., "http://gpu-1:11434,http://gpu-2:11434").',
+        default=None,
+    )
+    parser.add_argument(
+        "--keep_alive",
+        type=str,
+        help='How long Ollama keeps the model loaded after each call, e.g. "30m" or "-1" (default: Ollama\'s default; 30m with --watch).',
+        default=None,
+    )
+    parser.add_argument(
+        "--chunks_output",
+        type=str,
+        help="Write RAG-ready chunks (text, source, page range, section heading, figure text) of each document to this JSONL file as it finishes.",
+        default=None,
+    )
+    parser.add_argument(
+        "--chunk_size", type=int, default=1500, help="Target chunk length in characters for --chunks_output (default: 1500)."
+    )
+    parser.add_argument(
+        "--chunk_overlap", type=int, default=200, help="Characters repeated between consecutive chunks for --chunks_output (default: 200)."
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Record progress in .llamarker_checkpoint next to the outputs (and keep the intermediate PDFs there, unless --temp_dir is given), so an interrupted run can be continued with --resume.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run with the same input and output, skipping documents and figures that were already finished.",
+    )
+    parser.add_argument(
+        "--shard_dir",
+        type=str,
+        help="Shared folder for coordinating several llamarker workers (on one or more hosts) that split --directory between them.",
+        default=None,
+    )
+    parser.add_argument(
+        "--worker_id", type=str, default=None, help="Unique name of this worker for --shard_dir (default: <hostname>-<pid>)."
+    )
+    parser.add_argument(
+        "--lease_seconds", type=float, default=300.0, help="Seconds without a heartbeat after which a worker's documents are taken over (default: 300)."
+    )
+    parser.add_argument(
+        "--shard_batch", type=int, default=4, help="Documents a worker claims and parses at a time with --shard_dir (default: 4)."
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and process new or modified documents as they appear in --directory.",
+    )
+    parser.add_argument(
+        "--debounce", type=float, default=2.0, help="Seconds a file must stay unchanged before --watch processes it (default: 2)."
+    )
+    parser.add_argument(
+        "--poll_interval", type=float, default=1.0, help="Seconds between folder scans for --watch when inotify is not available (default: 1)."
+    )
 
     args = parser.parse_args()
 
+    if args.shard_dir:
+        if not (args.directory and args.output):
+            parser.error("--shard_dir requires --directory and --output")
+        return shard(args)
+
+    if args.watch:
+        if not args.directory:
+            parser.error("--watch requires --directory")
+        return watch(args)
+
     try:
         llamarker = LlaMarker(
             input_dir=args.directory,
@@ -327,7 +1034,26 @@ def main():
             save_pdfs=args.save_pdfs,
             output_dir=args.output,
             marker_path=args.marker_path,
-            verbose=args.verbose
+            verbose=args.verbose,
+            ollama_hosts=parse_hosts(args.ollama_hosts),
+            max_model_calls=args.max_model_calls,
+            model_rate_limit=args.model_rate_limit,
+            adaptive_concurrency=args.adaptive_concurrency,
+            target_p95_latency=args.target_p95_latency,
+            metrics_dir=args.metrics_dir,
+            profile=args.profile,
+            trace_file=args.trace_file,
+            checkpoint=args.checkpoint,
+            resume=args.resume,
+            chunk_file=args.chunks_output,
+            chunk_size=args.chunk_size,
+            scratch_ram=args.scratch_ram_mb * 1024 * 1024,
+            scratch_ram_dir=args.scratch_ram_dir,
+            schedule=args.schedule,
+            selective_ocr=args.selective_ocr,
+            ocr_min_chars=args.ocr_min_chars,
+            direct_text=not args.text_via_pdf,
+            chunk_overlap=args.chunk_overlap,
         )
 
         # Step 1: Process documents (convert and count pages)
@@ -337,16 +1063,32 @@ def main():
         llamarker.parse_with_marker(force_ocr=args.force_ocr, languages=args.languages)
 
         # Step 3: Enriched Parsed files
-        llamarker.process_subdirectories(model=args.model, qa_evaluator=args.qa_evaluator)
+        llamarker.process_subdirectories(model=args.model, qa_evaluator=args.qa_evaluator, workers=args.doc_workers, image_workers=args.image_workers, keep_alive=args.keep_alive)
 
         # Step 4: Print summary
         print("\nDocument Processing Summary:")
         print("-" * 30)
-        for file_name, page_count in llamarker.generate_summary():
-            print(f"{file_name}: {page_count} pages")
+        if len(llamarker.file_converter.results) > SUMMARY_MAX_FILES:
+            # Listing every file of a large run is unreadable; report totals and a histogram instead
+            print(llamarker.file_converter.results.report())
+        else:
+            for file_name, page_count in llamarker.generate_summary():
+                print(f"{file_name}: {page_count} pages")
 
         # Step 5: Generate analysis plots
-        llamarker.plot_analysis(llamarker.parent_dir)
+        if args.plot:
+            llamarker.plot_analysis(llamarker.parent_dir)
+        llamarker.metrics.close()
+        llamarker.results_sink.close()
+        if llamarker.chunk_sink:
+            llamarker.chunk_sink.close()
+        get_tracer().close()
+
+        # Step 6: Print profiling summary
+        if args.profile:
+            print("\nProfile Summary:")
+            print("-" * 30)
+            print(llamarker.profiler.report())
 
         print("\nProcessing completed successfully!")
 
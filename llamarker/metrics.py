@@ -0,0 +1,147 @@
+# llamarker/metrics.py
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+# Numeric record fields that are summed into the Prometheus counters
+COUNTER_FIELDS = ("wall_s", "cpu_s", "child_cpu_s", "bytes_in", "bytes_out", "pages", "figures", "retries", "cache_hits")
+
+
+def _children_cpu() -> float:
+    """CPU seconds used by finished child processes (LibreOffice, Marker)."""
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def directory_size(path: Path, pattern: str = "*") -> int:
+    """Total size in bytes of the files under `path` matching `pattern`."""
+    return sum(f.stat().st_size for f in Path(path).rglob(pattern) if f.is_file())
+
+
+class MetricsRecorder:
+    """
+    Records per-stage, per-document and per-model-call timing metrics.
+
+    Every record is appended to a JSONL file as soon as it completes, and running
+    totals are written as a Prometheus textfile-collector file by `write_prometheus`.
+    Records carry a `kind` ("stage", "document" or "model_call"), the `stage` name,
+    and optionally the `document` and agent `role`.
+    """
+
+    def __init__(self, metrics_dir: str, run_id: str = None, logger: logging.Logger = None):
+        """
+        Args:
+            metrics_dir (str): Directory for `metrics.jsonl` and `llamarker.prom`.
+            run_id (str, optional): Identifier added to every record. Defaults to the start timestamp.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.metrics_dir = Path(metrics_dir)
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        self.jsonl_path = self.metrics_dir / "metrics.jsonl"
+        self.prom_path = self.metrics_dir / "llamarker.prom"
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self.logger = logger or logging.getLogger(__name__)
+        self.totals: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._file = open(self.jsonl_path, "a", encoding="utf-8")
+
+    @contextmanager
+    def measure(self, kind: str, stage: str, document: str = None, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Measures wall and CPU time of the block and records the result.
+
+        The yielded dictionary can be updated inside the block with counts such as
+        `bytes_in`, `bytes_out`, `pages`, `figures`, `retries` or `cache_hits`.
+
+        Args:
+            kind (str): "stage", "document" or "model_call".
+            stage (str): Pipeline stage name.
+            document (str, optional): Document the record belongs to.
+            **fields: Initial record fields.
+        """
+        record = {"kind": kind, "stage": stage, "document": document, **fields}
+        record["ts"] = time.time()
+        wall, cpu, child_cpu = time.perf_counter(), time.thread_time(), _children_cpu()
+        try:
+            yield record
+        except BaseException:
+            record["status"] = "error"
+            raise
+        finally:
+            record.setdefault("status", "ok")
+            record["wall_s"] = round(time.perf_counter() - wall, 6)
+            record["cpu_s"] = round(time.thread_time() - cpu, 6)
+            record["child_cpu_s"] = round(_children_cpu() - child_cpu, 6)
+            self.record(record)
+
+    def record(self, record: Dict[str, Any]) -> None:
+        """Appends a completed record to the JSONL file and adds it to the running totals."""
+        record = {"run_id": self.run_id, **record}
+        line = json.dumps(record, default=str)
+        key = (record["kind"], record["stage"], record.get("role") or "")
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            totals = self.totals.setdefault(key, {"count": 0, "errors": 0})
+            totals["count"] += 1
+            totals["errors"] += record.get("status") == "error"
+            for field in COUNTER_FIELDS:
+                value = record.get(field)
+                if isinstance(value, (int, float)):
+                    totals[field] = totals.get(field, 0) + value
+
+    def write_prometheus(self) -> None:
+        """Atomically writes the running totals in the Prometheus text exposition format."""
+        with self._lock:
+            totals = {key: dict(values) for key, values in self.totals.items()}
+
+        lines = []
+        for field in ("count", "errors") + COUNTER_FIELDS:
+            name = f"llamarker_{field}_total"
+            samples = [(key, values[field]) for key, values in sorted(totals.items()) if field in values]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} Sum of '{field}' over LlaMarker records.")
+            lines.append(f"# TYPE {name} counter")
+            for (kind, stage, role), value in samples:
+                labels = f'kind="{kind}",stage="{stage}"' + (f',role="{role}"' if role else "")
+                lines.append(f"{name}{{{labels}}} {round(value, 6)}")
+        lines.append("# HELP llamarker_last_update_timestamp_seconds Time the metrics were last written.")
+        lines.append("# TYPE llamarker_last_update_timestamp_seconds gauge")
+        lines.append(f"llamarker_last_update_timestamp_seconds {time.time():.3f}")
+
+        # The textfile collector may read at any moment, so never expose a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.metrics_dir, prefix=".llamarker.prom.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prom_path)
+
+    def close(self) -> None:
+        """Writes the final Prometheus totals and closes the JSONL file."""
+        self.write_prometheus()
+        with self._lock:
+            self._file.close()
+        self.logger.info(f"Metrics written to {self.jsonl_path} and {self.prom_path}")
+
+
+class NullMetrics:
+    """Metrics recorder used when metrics are disabled; records nothing."""
+
+    @contextmanager
+    def measure(self, kind: str, stage: str, document: str = None, **fields: Any) -> Iterator[Dict[str, Any]]:
+        yield {}
+
+    def record(self, record: Dict[str, Any]) -> None:
+        pass
+
+    def write_prometheus(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
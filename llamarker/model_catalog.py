@@ -0,0 +1,131 @@
+# llamarker/model_catalog.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Name fragments of Ollama models that accept images
+VISION_MODEL_FAMILIES = (
+    "llama3.2-vision", "llava", "llava-llama3", "llava-phi3", "bakllava", "moondream", "minicpm-v",
+)
+# Model families (from `ollama show`) that indicate an image encoder
+VISION_ENCODER_FAMILIES = ("clip", "mllama")
+
+
+class ModelCatalog:
+    """
+    TTL cache in front of `ollama list` and `ollama show`, so UIs do not hit Ollama on every
+    render.
+
+    The model list is re-fetched after `list_ttl` seconds, so models pulled or removed in the
+    background show up. If Ollama is busy or unreachable, the last good list is served and
+    the error is kept in `last_error`. Model metadata is cached per model digest, so a re-pulled
+    model is looked up again.
+    """
+
+    def __init__(self, client: Any = None, list_ttl: float = 30.0, show_ttl: float = 3600.0, timeout: float = 5.0, clock: Callable[[], float] = time.monotonic, logger: logging.Logger = None):
+        """
+        Args:
+            client (Any, optional): Object with `list()` and `show(model)`, e.g. `ollama.Client`. Defaults to a local client.
+            list_ttl (float): Seconds the model list is reused. Defaults to 30.
+            show_ttl (float): Seconds model metadata is reused. Defaults to 3600.
+            timeout (float): Request timeout of the default client in seconds. Defaults to 5.
+            clock (Callable[[], float]): Time source; replaceable in tests.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        if client is None:
+            import ollama
+            client = ollama.Client(timeout=timeout)
+        self.client = client
+        self.list_ttl = list_ttl
+        self.show_ttl = show_ttl
+        self.clock = clock
+        self.logger = logger or logging.getLogger(__name__)
+        self.last_error: Optional[str] = None
+        self._models: Optional[Dict[str, str]] = None  # model name -> digest
+        self._models_fetched = 0.0
+        self._fetching = False  # A list call is in flight
+        self._details: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def models(self, force: bool = False) -> Dict[str, str]:
+        """
+        Returns all installed models mapped to their digest. Ollama is queried without holding the
+        lock, and while one caller is waiting for it the others get the cached list.
+
+        Args:
+            force (bool): Bypass the cache. Defaults to False.
+
+        Raises:
+            Exception: The Ollama error, if the models have never been fetched successfully.
+        """
+        with self._lock:
+            fresh = self._models is not None and self.clock() - self._models_fetched < self.list_ttl
+            if self._models is not None and ((fresh and not force) or self._fetching):
+                return dict(self._models)
+            self._fetching = True
+        try:
+            response = self.client.list()
+        except Exception as e:
+            with self._lock:
+                self._fetching = False
+                self.last_error = str(e)
+                if self._models is None:
+                    raise
+                self.logger.warning(f"Listing Ollama models failed, using the cached list: {e}")
+                return dict(self._models)
+        with self._lock:
+            self._fetching = False
+            self._models = {model.model: model.digest for model in response.models}
+            self._models_fetched = self.clock()
+            self.last_error = None
+            return dict(self._models)
+
+    def vision_models(self, force: bool = False) -> List[str]:
+        """Returns the installed models that accept images, sorted by name."""
+        return sorted(name for name in self.models(force) if any(family in name.lower() for family in VISION_MODEL_FAMILIES))
+
+    def capabilities(self, model: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Returns cached metadata of an installed model: family, parameter size, quantization,
+        capabilities and whether it takes images.
+
+        Args:
+            model (str): Model name as listed by `models`.
+            force (bool): Bypass the cache. Defaults to False.
+        """
+        digest = self.models().get(model, "")
+        key = (model, digest)
+        with self._lock:
+            cached = self._details.get(key)
+            if not force and cached and self.clock() - cached[0] < self.show_ttl:
+                return dict(cached[1])
+
+        response = self.client.show(model)
+        details = getattr(response, "details", None)
+        families = list(getattr(details, "families", None) or [])
+        capabilities = list(getattr(response, "capabilities", None) or [])
+        info = {
+            "family": getattr(details, "family", None),
+            "parameter_size": getattr(details, "parameter_size", None),
+            "quantization_level": getattr(details, "quantization_level", None),
+            "capabilities": capabilities,
+            "vision": "vision" in capabilities or any(family in VISION_ENCODER_FAMILIES for family in families),
+        }
+        with self._lock:
+            # Drop entries of older digests of the same model
+            self._details = {cached_key: value for cached_key, value in self._details.items() if cached_key[0] != model}
+            self._details[key] = (self.clock(), info)
+        return dict(info)
+
+    def refresh(self) -> Dict[str, str]:
+        """
+        Forgets cached model metadata and re-fetches the model list. If Ollama does not respond,
+        the last good list is kept, as in `models`.
+
+        Returns:
+            Dict[str, str]: The installed models mapped to their digest.
+        """
+        with self._lock:
+            self._details.clear()
+        return self.models(force=True)
@@ -0,0 +1,230 @@
+# llamarker/ollama_pool.py
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+def parse_hosts(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Splits a comma-separated list of Ollama hosts, dropping surrounding whitespace and empty entries.
+
+    Returns:
+        Optional[List[str]]: The hosts, or None if none were given.
+    """
+    hosts = [host.strip() for host in (value or "").split(",") if host.strip()]
+    return hosts or None
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Returns the given percentile of a list of samples using nearest-rank.
+
+    Args:
+        samples (List[float]): Observed values.
+        pct (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile value, or 0.0 if there are no samples.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class OllamaEndpoint:
+    """
+    State and metrics of a single Ollama host within an OllamaBackendPool.
+    """
+
+    def __init__(self, host: str, client: Any, latency_window: int = 256):
+        """
+        Args:
+            host (str): Base URL of the Ollama host.
+            client (Any): Client used to talk to the host (normally `ollama.Client`).
+            latency_window (int): Number of recent request latencies kept for percentiles.
+        """
+        self.host = host
+        self.client = client
+        self.healthy = True
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+        self.latencies = deque(maxlen=latency_window)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns a snapshot of the endpoint's metrics."""
+        latencies = list(self.latencies)
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "ejections": self.ejections,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+        }
+
+
+class OllamaBackendPool:
+    """
+    Spreads Ollama chat requests over several hosts.
+
+    Each request goes to the healthy endpoint with the fewest outstanding requests.
+    Endpoints are ejected after repeated failures or a failed health check and are
+    reinstated once a health check succeeds again.
+    """
+
+    def __init__(self, hosts: List[str], timeout: float = None, max_failures: int = 3, health_check_interval: float = 10.0, logger: logging.Logger = None, client_factory: Callable[[str], Any] = None):
+        """
+        Args:
+            hosts (List[str]): Base URLs of the Ollama hosts, e.g. "http://gpu-1:11434".
+            timeout (float, optional): Request timeout in seconds passed to each client. Defaults to None.
+            max_failures (int): Consecutive request failures before an endpoint is ejected. Defaults to 3.
+            health_check_interval (float): Seconds between background health checks. Defaults to 10.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+            client_factory (Callable[[str], Any], optional): Builds a client for a host. Defaults to `ollama.Client`.
+        """
+        if not hosts:
+            raise ValueError("At least one Ollama host must be provided.")
+
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_failures = max_failures
+        self.health_check_interval = health_check_interval
+
+        if client_factory is None:
+            from ollama import Client
+
+            def client_factory(host: str) -> Any:
+                return Client(host=host, timeout=timeout)
+
+        self.endpoints = [OllamaEndpoint(host, client_factory(host)) for host in hosts]
+        self._lock = threading.Lock()
+        self._next = 0
+        self._stop_event = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def chat(self, **kwargs) -> Any:
+        """
+        Sends a chat request to the least-loaded healthy endpoint.
+
+        Args:
+            **kwargs: Arguments forwarded to the client's `chat` method.
+
+        Returns:
+            Any: The chat response.
+        """
+        endpoint = self._acquire()
+        start = time.perf_counter()
+        try:
+            response = endpoint.client.chat(**kwargs)
+        except Exception as e:
+            self._release(endpoint, time.perf_counter() - start, failed=True)
+            self.logger.warning(f"Ollama endpoint {endpoint.host} failed: {e}")
+            raise
+        self._release(endpoint, time.perf_counter() - start, failed=False)
+        return response
+
+    def _acquire(self) -> OllamaEndpoint:
+        """Reserves the healthy endpoint with the fewest outstanding requests."""
+        with self._lock:
+            endpoint = self._pick()
+        if endpoint is None:
+            # Every endpoint is ejected; give them a chance to come back before giving up
+            self.check_health()
+            with self._lock:
+                endpoint = self._pick()
+            if endpoint is None:
+                raise RuntimeError("No healthy Ollama endpoints available.")
+        return endpoint
+
+    def _pick(self) -> Optional[OllamaEndpoint]:
+        """Selects and reserves an endpoint. Must be called with the lock held."""
+        count = len(self.endpoints)
+        # Rotate the starting point so ties are spread round-robin
+        candidates = [self.endpoints[(self._next + i) % count] for i in range(count)]
+        candidates = [endpoint for endpoint in candidates if endpoint.healthy]
+        if not candidates:
+            return None
+        endpoint = min(candidates, key=lambda e: e.outstanding)
+        endpoint.outstanding += 1
+        self._next = (self._next + 1) % count
+        return endpoint
+
+    def _release(self, endpoint: OllamaEndpoint, latency: float, failed: bool) -> None:
+        """Releases a reserved endpoint and records the outcome of the request."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.requests += 1
+            endpoint.latencies.append(latency)
+            if failed:
+                endpoint.errors += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.healthy and endpoint.consecutive_failures >= self.max_failures:
+                    self._eject(endpoint, f"{endpoint.consecutive_failures} consecutive failures")
+            else:
+                endpoint.consecutive_failures = 0
+
+    def _eject(self, endpoint: OllamaEndpoint, reason: str) -> None:
+        """Marks an endpoint as unhealthy. Must be called with the lock held."""
+        endpoint.healthy = False
+        endpoint.ejections += 1
+        self.logger.warning(f"Ejected Ollama endpoint {endpoint.host}: {reason}")
+
+    def check_health(self) -> None:
+        """Probes every endpoint once, ejecting failing ones and reinstating recovered ones."""
+        for endpoint in self.endpoints:
+            try:
+                endpoint.client.list()
+                ok = True
+            except Exception as e:
+                ok = False
+                error = e
+            with self._lock:
+                if ok and not endpoint.healthy:
+                    endpoint.healthy = True
+                    endpoint.consecutive_failures = 0
+                    self.logger.info(f"Reinstated Ollama endpoint {endpoint.host}")
+                elif not ok and endpoint.healthy:
+                    self._eject(endpoint, f"health check failed: {error}")
+
+    def start_health_checks(self) -> None:
+        """Starts a background thread that runs `check_health` periodically."""
+        if self._health_thread and self._health_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._health_thread = threading.Thread(target=self._health_loop, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        while not self._stop_event.wait(self.health_check_interval):
+            self.check_health()
+
+    def stop(self) -> None:
+        """Stops the background health checks."""
+        self._stop_event.set()
+        if self._health_thread:
+            self._health_thread.join()
+            self._health_thread = None
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """Returns per-endpoint latency and error metrics."""
+        with self._lock:
+            return [endpoint.metrics() for endpoint in self.endpoints]
+
+    def log_metrics(self) -> None:
+        """Logs per-endpoint metrics at INFO level."""
+        for m in self.metrics():
+            self.logger.info(
+                f"Ollama endpoint {m['host']}: healthy={m['healthy']} requests={m['requests']} "
+                f"errors={m['errors']} ({m['error_rate']:.1%}) p50={m['latency_p50']:.3f}s p95={m['latency_p95']:.3f}s"
+            )
@@ -0,0 +1,168 @@
+# llamarker/plaintext.py
+"""
+Direct conversion of plain-text and CSV files to Markdown.
+
+Rendering these formats to PDF with LibreOffice and parsing the PDF back with Marker only
+recovers text that was already there. Here they are read once, in their detected encoding,
+and written out as Markdown line by line: text files as they are, CSV files as Markdown
+tables. Neither is held in memory as a whole.
+"""
+import codecs
+import csv
+import math
+from pathlib import Path
+from typing import List
+
+# File types converted straight to Markdown
+DIRECT_EXTENSIONS = (".txt", ".csv")
+
+SAMPLE_SIZE = 64 * 1024
+# Nominal page size of a direct conversion, for page counts and scheduling
+LINES_PER_PAGE = 50
+# The header is repeated after this many rows, so every table stands on its own in a chunk
+ROWS_PER_TABLE = 500
+
+# UTF-32 first: its little-endian BOM starts with the UTF-16 one
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def detect_encoding(path: Path, sample_size: int = SAMPLE_SIZE) -> str:
+    """
+    Detects the text encoding of a file from its first `sample_size` bytes: a byte order mark,
+    else UTF-8 if the sample decodes as such, else the best guess of `charset_normalizer` if it
+    is installed, else Windows-1252 or, failing that, Latin-1 (which decodes anything).
+
+    Args:
+        path (Path): The file to inspect.
+        sample_size (int): Bytes read for the detection. Defaults to 64 KiB.
+
+    Returns:
+        str: A codec name for `open()`.
+    """
+    with open(path, "rb") as f:
+        sample = f.read(sample_size)
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # A multi-byte character may be cut off at the end of the sample
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=len(sample) < sample_size)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+
+        match = from_bytes(sample).best()
+        if match:
+            return match.encoding
+    except ImportError:
+        pass
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _pages(lines: int) -> int:
+    return max(1, math.ceil(lines / LINES_PER_PAGE))
+
+
+def text_to_markdown(source: Path, dest: Path, encoding: str = None) -> int:
+    """
+    Writes a plain-text file as UTF-8 Markdown, line by line.
+
+    Args:
+        source (Path): The text file.
+        dest (Path): The Markdown file to write.
+        encoding (str, optional): Encoding of `source`. Defaults to detecting it.
+
+    Returns:
+        int: Nominal page count, one page per `LINES_PER_PAGE` lines.
+    """
+    encoding = encoding or detect_encoding(source)
+    lines = 0
+    with open(source, "r", encoding=encoding, errors="replace") as src, open(dest, "w", encoding="utf-8") as out:
+        for line in src:
+            out.write(line.rstrip() + "\n")
+            lines += 1
+    return _pages(lines)
+
+
+def _row(cells: List[str]) -> str:
+    """Formats cells as a Markdown table row; pipes are escaped and line breaks become <br>."""
+    cells = ["<br>".join(part.strip() for part in cell.replace("|", "\\|").splitlines()) for cell in cells]
+    return "| " + " | ".join(cells) + " |\n"
+
+
+def _fit(row: List[str], width: int) -> List[str]:
+    """Pads a short row with empty cells; the surplus cells of a long row are joined into its last cell."""
+    if len(row) <= width:
+        return row + [""] * (width - len(row))
+    return row[:width - 1] + [", ".join(row[width - 1:])]
+
+
+def csv_to_markdown(source: Path, dest: Path, encoding: str = None, rows_per_table: int = ROWS_PER_TABLE) -> int:
+    """
+    Streams a CSV file into Markdown tables. The delimiter is sniffed from the start of the file
+    and the first row is used as the header, repeated every `rows_per_table` rows.
+
+    Args:
+        source (Path): The CSV file.
+        dest (Path): The Markdown file to write.
+        encoding (str, optional): Encoding of `source`. Defaults to detecting it.
+        rows_per_table (int): Data rows per table. Defaults to 500.
+
+    Returns:
+        int: Nominal page count, one page per `LINES_PER_PAGE` rows.
+    """
+    encoding = encoding or detect_encoding(source)
+    with open(source, "r", encoding=encoding, errors="replace", newline="") as src, open(dest, "w", encoding="utf-8") as out:
+        sample = src.read(SAMPLE_SIZE)
+        src.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        rows = (row for row in csv.reader(src, dialect) if row)
+        header = next(rows, None)
+        if header is None:
+            return 1
+        count = 0
+        for row in rows:
+            if count % rows_per_table == 0:
+                out.write(("\n" if count else "") + _row(header) + "|" + " --- |" * len(header) + "\n")
+            out.write(_row(_fit(row, len(header))))
+            count += 1
+        if not count:
+            out.write(_row(header) + "|" + " --- |" * len(header) + "\n")
+    return _pages(count + 1)
+
+
+def convert_to_markdown(source: Path, dest: Path) -> int:
+    """
+    Converts a `.txt` or `.csv` file to Markdown.
+
+    Args:
+        source (Path): The file to convert.
+        dest (Path): The Markdown file to write.
+
+    Returns:
+        int: Nominal page count of the document.
+
+    Raises:
+        ValueError: If the file type has no direct conversion.
+    """
+    suffix = Path(source).suffix.lower()
+    if suffix == ".csv":
+        return csv_to_markdown(source, dest)
+    if suffix == ".txt":
+        return text_to_markdown(source, dest)
+    raise ValueError(f"No direct Markdown conversion for {source}")
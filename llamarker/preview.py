@@ -0,0 +1,178 @@
+# llamarker/preview.py
+import base64
+import logging
+import mimetypes
+import re
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache, partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Tuple
+from urllib.parse import quote, unquote
+
+# Page separator Marker writes with --paginate_output, e.g. "{3}------------------------------------------------"
+PAGE_SEPARATOR_PATTERN = re.compile(r"^\{\d+\}-{48}$", re.MULTILINE)
+LINK_PATTERN = re.compile(r"(\]\()([^)\s]+)(\))")
+
+
+def file_fingerprint(path: str) -> Tuple[str, int, int]:
+    """
+    Cheap cache key for a file: its resolved path, size and modification time.
+
+    Passing this instead of the file content to a cached function keeps cache lookups
+    constant-time, while a rewritten file still gets a new entry.
+    """
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    return str(resolved), stat.st_size, stat.st_mtime_ns
+
+
+def split_markdown_pages(markdown: str, max_chars: int = 20000) -> List[str]:
+    """
+    Splits a Markdown document into pages for rendering one at a time.
+
+    Uses Marker's page separators when present; otherwise cuts at blank lines into
+    chunks of at most about `max_chars` characters.
+
+    Args:
+        markdown (str): The Markdown content.
+        max_chars (int): Target maximum length of a chunk without page separators. Defaults to 20000.
+
+    Returns:
+        List[str]: The pages; at least one, possibly empty.
+    """
+    if PAGE_SEPARATOR_PATTERN.search(markdown):
+        pages = [page.strip("\n") for page in PAGE_SEPARATOR_PATTERN.split(markdown)]
+        return [page for page in pages if page.strip()] or [""]
+
+    pages, current, size = [], [], 0
+    for block in markdown.split("\n\n"):
+        if current and size + len(block) > max_chars:
+            pages.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(block)
+        size += len(block) + 2
+    pages.append("\n\n".join(current))
+    return pages
+
+
+class _LinkRewriter(ABC):
+    """Rewrites Markdown links to the URLs returned by `url_for`."""
+
+    root_dir: Path
+
+    @abstractmethod
+    def url_for(self, path: str) -> str:
+        """URL of the file at `path`; raises ValueError for files outside `root_dir` or that do not exist."""
+
+    def rewrite_links(self, markdown: str, base_dir: str) -> str:
+        """
+        Points Markdown links and images to local files at their preview URLs. Links are resolved against
+        `base_dir`; links to files outside `root_dir` or that do not exist are left unchanged.
+        """
+        def replace(match: re.Match) -> str:
+            target = Path(base_dir) / unquote(match.group(2))
+            try:
+                return f"{match.group(1)}{self.url_for(target)}{match.group(3)}"
+            except (ValueError, OSError):
+                return match.group(0)
+
+        return LINK_PATTERN.sub(replace, markdown)
+
+    def _resolve(self, path: str) -> Path:
+        resolved = Path(path).resolve()
+        if not resolved.is_file():
+            raise ValueError(f"Not a file: {path}")
+        resolved.relative_to(self.root_dir)
+        return resolved
+
+
+@lru_cache(maxsize=64)
+def _data_uri(fingerprint: Tuple[str, int, int]) -> str:
+    """Base64 data URI of a file, computed once per version (`fingerprint` from `file_fingerprint`)."""
+    mime = mimetypes.guess_type(fingerprint[0])[0] or "application/octet-stream"
+    return f"data:{mime};base64,{base64.b64encode(Path(fingerprint[0]).read_bytes()).decode('ascii')}"
+
+
+class InlinePreview(_LinkRewriter):
+    """
+    Embeds the files under `root_dir` as base64 data URIs. Slower for large files than
+    `PreviewServer`, but works wherever the page is viewed from, as nothing but the page itself
+    has to be reachable by the browser. Each file version is encoded once.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        Args:
+            root_dir (str): Directory whose files may be embedded.
+        """
+        self.root_dir = Path(root_dir).resolve()
+
+    def url_for(self, path: str) -> str:
+        """
+        Returns a data URI with the content of a file under `root_dir`.
+
+        Raises:
+            ValueError: If the path is not a file under `root_dir`.
+        """
+        return _data_uri(file_fingerprint(self._resolve(path)))
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that logs through `logging` and lets browsers cache versioned URLs."""
+
+    def end_headers(self) -> None:
+        self.send_header("Cache-Control", "private, max-age=3600")
+        super().end_headers()
+
+    def list_directory(self, path):
+        self.send_error(404, "Directory listing is disabled")
+        return None
+
+    def log_message(self, format: str, *args) -> None:
+        logging.getLogger(__name__).debug(format, *args)
+
+
+class PreviewServer(_LinkRewriter):
+    """
+    Serves the files under `root_dir` (PDFs, extracted pictures) over HTTP, so the GUI can embed
+    them by URL instead of inlining base64 data on every rerun.
+
+    Browsers resolve the URLs on the viewer's machine: unless the GUI is only used on the host it
+    runs on, `public_url` has to be set to an address under which the viewers can reach this server
+    (e.g. through the same reverse proxy as the GUI, to keep HTTPS pages free of mixed content).
+    """
+
+    def __init__(self, root_dir: str, host: str = "127.0.0.1", port: int = 0, public_url: str = None):
+        """
+        Args:
+            root_dir (str): Directory whose files are served (read-only).
+            host (str): Interface to bind to. Defaults to localhost.
+            port (int): Port to listen on. Defaults to 0 (any free port).
+            public_url (str, optional): Base URL under which browsers reach the server. Defaults to `http://<host>:<port>`.
+        """
+        self.root_dir = Path(root_dir).resolve()
+        self.server = ThreadingHTTPServer((host, port), partial(_QuietHandler, directory=str(self.root_dir)))
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self.base_url = public_url.rstrip("/") if public_url else f"http://{self.host}:{self.port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="llamarker-preview", daemon=True)
+        self._thread.start()
+
+    def url_for(self, path: str) -> str:
+        """
+        Returns the URL of a file under `root_dir`. The modification time is part of the URL so
+        browsers reload a file only when it changed.
+
+        Raises:
+            ValueError: If the path is not a file under `root_dir`.
+        """
+        resolved = self._resolve(path)
+        relative = resolved.relative_to(self.root_dir)
+        return f"{self.base_url}/{quote(relative.as_posix())}?v={resolved.stat().st_mtime_ns}"
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
@@ -0,0 +1,183 @@
+# llamarker/profiling.py
+import cProfile
+import io
+import logging
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler covering every thread of the process.
+
+    A background thread snapshots all thread stacks every `interval` seconds and
+    counts them as collapsed stacks ("thread;outer;...;inner"), the input format
+    of flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Args:
+            interval (float): Seconds between samples. Defaults to 5 ms.
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="llamarker-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_folded(self, path: Path) -> None:
+        """Writes the collected stacks in collapsed-stack format."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, limit: int) -> List[tuple]:
+        """Returns the `limit` functions most often on top of a stack, with their share of samples."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(name, count / total) for name, count in leaves.most_common(limit)]
+
+
+class StageProfiler:
+    """
+    Profiles each pipeline stage separately.
+
+    For every stage it writes, under `output_dir/<run timestamp>/`:
+      - `<stage>.folded`: sampled stacks of all threads, ready for flamegraph tools.
+      - `<stage>.prof`: cProfile statistics of the thread running the stage (load with
+        `pstats`, snakeviz or flameprof).
+    Subprocess stages can additionally be recorded with py-spy (see `wrap_command`).
+    """
+
+    def __init__(self, output_dir: str, sample_interval: float = 0.005, top_n: int = 10, logger: logging.Logger = None):
+        """
+        Args:
+            output_dir (str): Directory in which a timestamped folder of profiles is created.
+            sample_interval (float): Seconds between stack samples. Defaults to 5 ms.
+            top_n (int): Number of hot functions listed per stage in the summary. Defaults to 10.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.output_dir = Path(output_dir) / datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.sample_interval = sample_interval
+        self.top_n = top_n
+        self.logger = logger or logging.getLogger(__name__)
+        self.py_spy = shutil.which("py-spy")
+        self.summaries: Dict[str, str] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Profiles the enclosed block as stage `name`.
+
+        Args:
+            name (str): Stage name, used for the output file names.
+        """
+        sampler = SamplingProfiler(self.sample_interval)
+        profile: Optional[cProfile.Profile] = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active in this interpreter (e.g. a nested stage)
+            profile = None
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            sampler.stop()
+            if profile:
+                profile.disable()
+            self._save(name, elapsed, sampler, profile)
+
+    def wrap_command(self, name: str, command: List[str]) -> List[str]:
+        """
+        Prefixes a Python-based subprocess command with `py-spy record` so its worker processes are profiled too.
+
+        Args:
+            name (str): Stage name, used for the output file name.
+            command (List[str]): The command to run.
+
+        Returns:
+            List[str]: The wrapped command, or the original one if py-spy is not installed.
+        """
+        if not self.py_spy:
+            self.logger.info(f"py-spy not found; subprocesses of stage '{name}' are not profiled.")
+            return command
+        output = self.output_dir / f"{name}.subprocess.folded"
+        return [self.py_spy, "record", "--subprocesses", "--format", "raw", "--output", str(output), "--"] + command
+
+    def _save(self, name: str, elapsed: float, sampler: SamplingProfiler, profile: Optional[cProfile.Profile]) -> None:
+        """Writes the stage's profile files and builds its summary."""
+        sampler.write_folded(self.output_dir / f"{name}.folded")
+        lines = [f"Stage '{name}': {elapsed:.2f}s wall, {sampler.samples} samples"]
+        lines.append("  Hot functions (share of sampled wall time, all threads):")
+        for function, share in sampler.top_functions(self.top_n):
+            lines.append(f"    {share:6.1%}  {function}")
+
+        if profile:
+            profile.dump_stats(str(self.output_dir / f"{name}.prof"))
+            stream = io.StringIO()
+            stats = pstats.Stats(profile, stream=stream)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+            lines.append("  cProfile (stage thread, by own time):")
+            lines.extend(f"    {line}" for line in stream.getvalue().splitlines() if line.strip())
+
+        self.summaries[name] = "\n".join(lines)
+        self.logger.info(f"Profile for stage '{name}' saved to {self.output_dir}")
+
+    def report(self) -> str:
+        """Returns the hot-function summary of all profiled stages and writes it to `summary.txt`."""
+        report = "\n\n".join(self.summaries.values())
+        (self.output_dir / "summary.txt").write_text(report + "\n", encoding="utf-8")
+        return report
+
+
+class NullProfiler:
+    """Profiler used when profiling is disabled."""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        yield
+
+    def wrap_command(self, name: str, command: List[str]) -> List[str]:
+        return command
+
+    def report(self) -> str:
+        return ""
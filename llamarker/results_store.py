@@ -0,0 +1,279 @@
+# llamarker/results_store.py
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def page_bucket(pages: int) -> str:
+    """Returns the power-of-two histogram bucket a page count falls into, e.g. "4-7"."""
+    if pages <= 0:
+        return "0"
+    low = 1 << (pages.bit_length() - 1)
+    high = (low << 1) - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def _close_spill(conn: sqlite3.Connection, path: str) -> None:
+    conn.close()
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _open_spill(owner: Any, spill_dir: Optional[str], *schema: str) -> Tuple[sqlite3.Connection, weakref.finalize]:
+    """Creates a spill file for `owner` with the given schema; the finalizer closes and deletes it."""
+    fd, path = tempfile.mkstemp(prefix="llamarker_results_", suffix=".sqlite3", dir=spill_dir)
+    os.close(fd)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    for statement in schema:
+        conn.execute(statement)
+    return conn, weakref.finalize(owner, _close_spill, conn, path)
+
+
+class ConversionResults:
+    """
+    Append-only record of converted PDFs and their page counts that uses constant memory.
+
+    The most recent records are kept in two compact arrays (paths and page counts); once
+    `memory_records` of them accumulate they are moved to a SQLite file in `spill_dir`, which
+    is deleted again when the object is closed or garbage collected. Totals and a page-count
+    histogram are kept up to date on every append, so summaries never need a full pass.
+
+    Behaves like a read-only list of `(pdf_path, pages)` tuples for iteration, `len()` and indexing;
+    `pages` looks up the page counts of given documents.
+    """
+
+    def __init__(self, memory_records: int = 10000, spill_dir: str = None):
+        """
+        Args:
+            memory_records (int): Records kept in memory before they are spilled to disk. Defaults to 10000.
+            spill_dir (str, optional): Directory for the spill file. Defaults to the system temporary directory.
+        """
+        self.memory_records = max(1, memory_records)
+        self.spill_dir = spill_dir
+        self.total_pages = 0
+        self._histogram: Dict[str, int] = {}
+        self._paths: List[str] = []
+        self._pages = array("L")
+        self._spilled = 0
+        self._conn = None
+        self._finalizer = None
+        self._lock = threading.Lock()
+
+    def append(self, record: Tuple[str, int]) -> None:
+        """Adds one `(pdf_path, pages)` record."""
+        pdf_path, pages = record
+        with self._lock:
+            self._paths.append(str(pdf_path))
+            self._pages.append(pages)
+            self.total_pages += pages
+            bucket = page_bucket(pages)
+            self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+            if len(self._paths) >= self.memory_records:
+                self._spill()
+
+    def _spill(self) -> None:
+        """Moves the in-memory records to the spill file."""
+        if self._conn is None:
+            self._conn, self._finalizer = _open_spill(
+                self,
+                self.spill_dir,
+                "CREATE TABLE results (id INTEGER PRIMARY KEY, pdf TEXT NOT NULL, name TEXT NOT NULL, pages INTEGER NOT NULL)",
+                "CREATE INDEX results_name ON results (name)",
+            )
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT INTO results VALUES (?, ?, ?, ?)",
+            ((self._spilled + offset + 1, pdf_path, Path(pdf_path).stem, pages) for offset, (pdf_path, pages) in enumerate(zip(self._paths, self._pages))),
+        )
+        self._conn.execute("COMMIT")
+        self._spilled += len(self._paths)
+        self._paths = []
+        self._pages = array("L")
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._paths)
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        """Yields the records in insertion order, reading spilled ones from disk in pages."""
+        position = 0
+        while position < self._spilled:
+            with self._lock:
+                rows = self._conn.execute("SELECT id, pdf, pages FROM results WHERE id > ? ORDER BY id LIMIT 1000", (position,)).fetchall()
+            if not rows:
+                break
+            for position, pdf_path, pages in rows:
+                yield pdf_path, pages
+        for index in range(len(self._paths)):
+            yield self._paths[index], self._pages[index]
+
+    def __getitem__(self, index: int) -> Tuple[str, int]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("result index out of range")
+        if index >= self._spilled:
+            return self._paths[index - self._spilled], self._pages[index - self._spilled]
+        with self._lock:
+            return tuple(self._conn.execute("SELECT pdf, pages FROM results WHERE id = ?", (index + 1,)).fetchone())
+
+    def pages(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Returns the page counts of the documents named `names` (file names without extension);
+        documents without a record are left out. Spilled records are found through an index, so
+        the cost grows with `names`, not with the number of records.
+        """
+        wanted = list(dict.fromkeys(names))
+        found: Dict[str, int] = {}
+        with self._lock:
+            if self._conn is not None:
+                # SQLite limits the number of parameters per statement
+                for start in range(0, len(wanted), 500):
+                    batch = wanted[start:start + 500]
+                    found.update(self._conn.execute(f"SELECT name, pages FROM results WHERE name IN ({', '.join('?' * len(batch))}) ORDER BY id", batch))
+            wanted_set = set(wanted)
+            for pdf_path, pages in zip(self._paths, self._pages):
+                name = Path(pdf_path).stem
+                if name in wanted_set:
+                    found[name] = pages
+        return found
+
+    def histogram(self) -> Dict[str, int]:
+        """Returns the number of documents per power-of-two page-count bucket, smallest first."""
+        return {bucket: self._histogram[bucket] for bucket in sorted(self._histogram, key=lambda bucket: int(bucket.split("-")[0]))}
+
+    def report(self) -> str:
+        """Returns a plain-text summary: document and page totals and a page-count histogram."""
+        lines = [f"{len(self)} documents, {self.total_pages} pages"]
+        histogram = self.histogram()
+        width = max(histogram.values(), default=0)
+        for bucket, count in histogram.items():
+            bar = "#" * max(1, round(40 * count / width))
+            lines.append(f"{bucket:>11} pages | {bar} {count}")
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        """Deletes the spill file; the records on disk are no longer readable afterwards."""
+        if self._finalizer:
+            self._finalizer()
+
+
+class FigureResults:
+    """
+    Enrichment results of the figures of one document, in constant memory.
+
+    The most recent `memory_records` results are kept in memory; older ones are spilled as JSON
+    to a SQLite file in `spill_dir`, indexed by image name, which is deleted again when the object
+    is closed or garbage collected. Logos and figures with extracted text are counted on every
+    append, so summaries never need a full pass.
+
+    Behaves like a read-only list of result dicts for iteration, `len()` and indexing, and like
+    a mapping from image name to result for `get`.
+    """
+
+    def __init__(self, memory_records: int = 100, spill_dir: str = None):
+        """
+        Args:
+            memory_records (int): Results kept in memory before they are spilled to disk. Defaults to 100.
+            spill_dir (str, optional): Directory for the spill file. Defaults to the system temporary directory.
+        """
+        self.memory_records = max(1, memory_records)
+        self.spill_dir = spill_dir
+        self.logos = 0
+        self.with_info = 0
+        self._results: List[Dict[str, Any]] = []
+        self._index: Dict[str, int] = {}  # image name -> position in `_results`
+        self._spilled = 0
+        self._conn = None
+        self._finalizer = None
+        self._lock = threading.Lock()
+
+    def append(self, result: Dict[str, Any]) -> None:
+        """Adds the result of one figure."""
+        with self._lock:
+            self._index[result["image"]] = len(self._results)
+            self._results.append(result)
+            self.logos += bool(result.get("is_logo"))
+            self.with_info += bool(result.get("contains_info"))
+            if len(self._results) >= self.memory_records:
+                self._spill()
+
+    def extend(self, results: Iterable[Dict[str, Any]]) -> None:
+        """Adds results one by one as the iterable produces them."""
+        for result in results:
+            self.append(result)
+
+    def _spill(self) -> None:
+        """Moves the in-memory results to the spill file."""
+        if self._conn is None:
+            self._conn, self._finalizer = _open_spill(
+                self,
+                self.spill_dir,
+                "CREATE TABLE figures (id INTEGER PRIMARY KEY, image TEXT NOT NULL, result TEXT NOT NULL)",
+                "CREATE INDEX figures_image ON figures (image)",
+            )
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT INTO figures VALUES (?, ?, ?)",
+            ((self._spilled + offset + 1, result["image"], json.dumps(result)) for offset, result in enumerate(self._results)),
+        )
+        self._conn.execute("COMMIT")
+        self._spilled += len(self._results)
+        self._results = []
+        self._index = {}
+
+    def get(self, image: str, default: Any = None) -> Any:
+        """Returns the latest result of the figure named `image`, or `default`."""
+        with self._lock:
+            if image in self._index:
+                return self._results[self._index[image]]
+            if self._conn is not None:
+                row = self._conn.execute("SELECT result FROM figures WHERE image = ? ORDER BY id DESC LIMIT 1", (image,)).fetchone()
+                if row:
+                    return json.loads(row[0])
+        return default
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._results)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yields the results in insertion order, reading spilled ones from disk in pages."""
+        position = 0
+        while position < self._spilled:
+            with self._lock:
+                rows = self._conn.execute("SELECT id, result FROM figures WHERE id > ? ORDER BY id LIMIT 100", (position,)).fetchall()
+            if not rows:
+                break
+            for position, result in rows:
+                yield json.loads(result)
+        yield from list(self._results)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("result index out of range")
+        if index >= self._spilled:
+            return self._results[index - self._spilled]
+        with self._lock:
+            return json.loads(self._conn.execute("SELECT result FROM figures WHERE id = ?", (index + 1,)).fetchone()[0])
+
+    def close(self) -> None:
+        """Forgets all results and deletes the spill file, once their last consumer has read them."""
+        with self._lock:
+            self._results = []
+            self._index = {}
+            self._spilled = 0
+        if self._finalizer:
+            self._finalizer()
+            self._conn = None
+            self._finalizer = None
@@ -0,0 +1,295 @@
+# llamarker/scheduler.py
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, Optional
+from llamarker.ollama_pool import percentile
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter. Tokens refill continuously at `rate` per second up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Maximum number of stored tokens (burst size). Defaults to max(1, rate).
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = rate
+        self.capacity = capacity if capacity else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """
+        Takes a token if one is available.
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise the seconds until the next token is available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ModelCallScheduler:
+    """
+    Gates model calls behind a concurrency cap and a token-bucket rate limit,
+    admitting waiting calls in priority order.
+
+    Calls are ordered by the document they belong to (documents that started
+    earlier go first, so in-progress documents finish before new ones are
+    started) and then by agent role, so the QA evaluator and translator calls of
+    a figure that is already being extracted go ahead of new extractions.
+    """
+
+    # Lower values run first
+    ROLE_PRIORITY: Dict[str, int] = {
+        "Translator": 0,
+        "QA Evaluator": 1,
+        "Information Extractor": 2,
+        "Logo Classifier": 3,
+    }
+
+    def __init__(self, max_concurrency: int = None, rate_limit: float = None, burst: int = None, logger: logging.Logger = None):
+        """
+        Args:
+            max_concurrency (int, optional): Maximum number of model calls in flight. Defaults to unlimited.
+            rate_limit (float, optional): Maximum number of model calls started per second. Defaults to unlimited.
+            burst (int, optional): Number of calls that may start back-to-back under the rate limit. Defaults to max(1, rate_limit).
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_concurrency = max_concurrency if max_concurrency else math.inf
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.active = 0
+        self.controller: Optional["AIMDController"] = None
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._arrivals = itertools.count()
+        self._documents: Dict[str, int] = {}
+        self._document_ranks = itertools.count()
+
+    def register_document(self, document: str) -> int:
+        """
+        Records that work on a document has started. Documents registered earlier get higher priority.
+        Call `finish_document` once the document is done.
+
+        Args:
+            document (str): Unique document identifier; reusing the identifier of a finished document starts a new one.
+
+        Returns:
+            int: The document's position in start order.
+        """
+        with self._cond:
+            if document not in self._documents:
+                self._documents[document] = next(self._document_ranks)
+            return self._documents[document]
+
+    def finish_document(self, document: str) -> None:
+        """Forgets a document registered with `register_document`; later calls for it get no document priority."""
+        with self._cond:
+            self._documents.pop(document, None)
+
+    def priority(self, document: str = None, role: str = None) -> tuple:
+        """Builds the sort key for a call; lower keys run first."""
+        with self._cond:
+            document_rank = self._documents.get(document, math.inf) if document is not None else math.inf
+        return (document_rank, self.ROLE_PRIORITY.get(role, len(self.ROLE_PRIORITY)))
+
+    def acquire(self, document: str = None, role: str = None) -> float:
+        """
+        Blocks until the call may start.
+
+        Args:
+            document (str, optional): Document the call belongs to.
+            role (str, optional): Agent role making the call.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        start = time.monotonic()
+        entry = (self.priority(document, role), next(self._arrivals))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            while True:
+                timeout = None
+                if self._waiting[0] == entry and self.active < self.max_concurrency:
+                    timeout = self.bucket.try_acquire() if self.bucket else 0.0
+                    if timeout == 0.0:
+                        heapq.heappop(self._waiting)
+                        self.active += 1
+                        # The next waiter may be able to start as well
+                        self._cond.notify_all()
+                        return time.monotonic() - start
+                self._cond.wait(timeout)
+
+    def set_max_concurrency(self, max_concurrency: int) -> None:
+        """Changes the concurrency cap; waiting calls are re-evaluated immediately."""
+        with self._cond:
+            self.max_concurrency = max_concurrency
+            self._cond.notify_all()
+
+    def release(self) -> None:
+        """Marks a call as finished and wakes up waiting calls."""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, document: str = None, role: str = None) -> Iterator[None]:
+        """Context manager holding a call slot for the duration of the block."""
+        self.acquire(document, role)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def call(self, fn: Callable[[], Any], document: str = None, role: str = None) -> Any:
+        """
+        Runs `fn` once the scheduler admits it.
+
+        Args:
+            fn (Callable[[], Any]): The model call.
+            document (str, optional): Document the call belongs to.
+            role (str, optional): Agent role making the call.
+
+        Returns:
+            Any: The return value of `fn`.
+        """
+        waited = self.acquire(document, role)
+        start = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            if self.controller:
+                self.controller.record(time.monotonic() - start, waited, error=True, timeout=is_timeout(e))
+            raise
+        finally:
+            self.release()
+        if self.controller:
+            self.controller.record(time.monotonic() - start, waited)
+        return result
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Returns True if an exception raised by a model call represents a timeout."""
+    return isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower()
+
+
+class AIMDController:
+    """
+    Adapts a scheduler's concurrency cap to the observed model latency (additive
+    increase, multiplicative decrease).
+
+    Completed calls are evaluated in windows of roughly one call per slot. The cap
+    grows by `increase` after a window in which calls had to queue for a slot while
+    p95 latency and error rate stayed within target, and shrinks by `decrease`
+    as soon as a timeout is seen or a window misses its targets.
+    """
+
+    def __init__(self, scheduler: ModelCallScheduler, min_concurrency: int = 1, max_concurrency: int = 16, initial_concurrency: int = None, increase: int = 1, decrease: float = 0.5, target_p95: float = 60.0, target_error_rate: float = 0.05, logger: logging.Logger = None):
+        """
+        Args:
+            scheduler (ModelCallScheduler): Scheduler whose concurrency cap is controlled.
+            min_concurrency (int): Lower bound for the cap. Defaults to 1.
+            max_concurrency (int): Upper bound for the cap. Defaults to 16.
+            initial_concurrency (int, optional): Starting cap. Defaults to `min_concurrency`.
+            increase (int): Slots added after a healthy, saturated window. Defaults to 1.
+            decrease (float): Factor applied to the cap on back-off. Defaults to 0.5.
+            target_p95 (float): Highest acceptable p95 latency in seconds. Defaults to 60.
+            target_error_rate (float): Highest acceptable fraction of failed calls. Defaults to 0.05.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.scheduler = scheduler
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.increase = increase
+        self.decrease = decrease
+        self.target_p95 = target_p95
+        self.target_error_rate = target_error_rate
+        self.logger = logger or logging.getLogger(__name__)
+        self.limit = min(self.max_concurrency, max(self.min_concurrency, initial_concurrency or self.min_concurrency))
+        self.history = deque(maxlen=256)
+        self._window = []
+        self._since_back_off = 0
+        self._lock = threading.Lock()
+
+        scheduler.set_max_concurrency(self.limit)
+        scheduler.controller = self
+
+    def record(self, latency: float, waited: float, error: bool = False, timeout: bool = False) -> None:
+        """
+        Records the outcome of a model call.
+
+        Args:
+            latency (float): Seconds the call took.
+            waited (float): Seconds the call waited in the scheduler before starting.
+            error (bool): Whether the call failed.
+            timeout (bool): Whether the call failed with a timeout.
+        """
+        with self._lock:
+            self.history.append(latency)
+            self._window.append((latency, waited, error))
+            self._since_back_off += 1
+            # A burst of timeouts from one round of calls only backs off once
+            if timeout and self._since_back_off >= self.limit:
+                self._adjust(self._back_off(), "timeout")
+            elif len(self._window) >= max(4, self.limit):
+                self._evaluate()
+
+    def _evaluate(self) -> None:
+        """Applies the AIMD rule to the current window. Must be called with the lock held."""
+        latencies = [latency for latency, _, _ in self._window]
+        p95 = percentile(latencies, 95)
+        error_rate = sum(1 for _, _, error in self._window if error) / len(self._window)
+        saturated = any(waited > 0.001 for _, waited, _ in self._window)
+
+        if p95 > self.target_p95 or error_rate > self.target_error_rate:
+            self._adjust(self._back_off(), f"p95 {p95:.2f}s, error rate {error_rate:.1%}")
+        elif saturated:
+            self._adjust(min(self.max_concurrency, self.limit + self.increase), "within targets")
+        else:
+            self._adjust(self.limit, "not saturated")
+
+    def _back_off(self) -> int:
+        self._since_back_off = 0
+        return max(self.min_concurrency, int(self.limit * self.decrease))
+
+    def _adjust(self, limit: int, reason: str) -> None:
+        """Sets a new cap, starts a new window and logs the state. Must be called with the lock held."""
+        previous, self.limit = self.limit, limit
+        self._window = []
+        if limit != previous:
+            self.scheduler.set_max_concurrency(limit)
+        history = list(self.history)
+        self.logger.info(
+            f"Adaptive concurrency: {previous} -> {limit} ({reason}); "
+            f"latency p50={percentile(history, 50):.2f}s p95={percentile(history, 95):.2f}s p99={percentile(history, 99):.2f}s"
+        )
+
+
+_default_scheduler: Optional[ModelCallScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler() -> ModelCallScheduler:
+    """Returns the process-wide scheduler used when none is passed explicitly (unlimited by default)."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = ModelCallScheduler()
+        return _default_scheduler
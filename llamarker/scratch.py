@@ -0,0 +1,123 @@
+# llamarker/scratch.py
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+DEFAULT_RAM_DIR = "/dev/shm"
+
+
+class ScratchSpace:
+    """
+    Places intermediate files in RAM (a tmpfs such as /dev/shm) up to a size cap, and on disk
+    once the cap is reached, and deletes each file as soon as its last consumer is done.
+
+    Every admitted file is addressed by a stable path in `disk_dir`: either the file itself, or a
+    symlink to its copy in RAM. Stages that read `disk_dir` (e.g. Marker parsing a folder of PDFs)
+    therefore see one folder no matter where the bytes live.
+    """
+
+    def __init__(self, disk_dir: str, ram_limit: int = 0, ram_dir: str = DEFAULT_RAM_DIR, logger: logging.Logger = None):
+        """
+        Args:
+            disk_dir (str): Directory for files that do not fit in RAM, and for the stable paths of the others.
+            ram_limit (int): Maximum bytes kept in RAM. Defaults to 0 (disk only).
+            ram_dir (str): tmpfs mount to keep files in. Defaults to "/dev/shm".
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.disk_dir = Path(disk_dir)
+        self.ram_limit = max(0, ram_limit)
+        self.logger = logger or logging.getLogger(__name__)
+        self.ram_root = None
+        if self.ram_limit:
+            if Path(ram_dir).is_dir() and os.access(ram_dir, os.W_OK):
+                self.ram_root = Path(tempfile.mkdtemp(prefix="llamarker_scratch_", dir=ram_dir))
+                self.logger.info(f"Keeping up to {self.ram_limit} bytes of intermediates in {self.ram_root}")
+            else:
+                self.logger.warning(f"{ram_dir} is not available; intermediates are kept on disk.")
+        self.ram_used = 0
+        self.ram_peak = 0
+        self.spilled = 0
+        self._files: Dict[Path, Tuple[Path, int]] = {}  # stable path -> (path in RAM, size)
+        self._lock = threading.Lock()
+
+    def _fits(self, size: int) -> bool:
+        return self.ram_root is not None and self.ram_used + size <= self.ram_limit and shutil.disk_usage(self.ram_root).free > size
+
+    def output_dir(self, expected_bytes: int) -> Path:
+        """
+        Returns the directory a tool should write its next output file to: a fresh directory in RAM
+        if about `expected_bytes` still fit under the cap, otherwise `disk_dir`. Pass the file to
+        `admit` once it is written.
+        """
+        with self._lock:
+            if self._fits(expected_bytes):
+                return Path(tempfile.mkdtemp(dir=self.ram_root))
+        return self.disk_dir
+
+    def admit(self, file: Path) -> Path:
+        """
+        Registers a file written to a directory returned by `output_dir` and returns its stable path.
+        A file that turned out larger than the room left in RAM is moved to disk.
+        """
+        file = Path(file)
+        if self.ram_root is None or self.ram_root not in file.parents:
+            return file
+        link = self.disk_dir / file.name
+        size = file.stat().st_size
+        link.unlink(missing_ok=True)
+        with self._lock:
+            in_ram = self.ram_used + size <= self.ram_limit
+            if in_ram:
+                self.ram_used += size
+                self.ram_peak = max(self.ram_peak, self.ram_used)
+                self._files[link] = (file, size)
+            else:
+                self.spilled += 1
+        if in_ram:
+            link.symlink_to(file)
+        else:
+            self.logger.info(f"RAM scratch is full; keeping {file.name} on disk")
+            shutil.move(str(file), str(link))
+            shutil.rmtree(file.parent, ignore_errors=True)
+        return link
+
+    def release(self, path: Path) -> None:
+        """Deletes an intermediate file, in RAM or on disk, once no stage needs it any more."""
+        path = Path(path)
+        with self._lock:
+            entry = self._files.pop(path, None)
+            if entry:
+                self.ram_used -= entry[1]
+        if entry:
+            shutil.rmtree(entry[0].parent, ignore_errors=True)
+        path.unlink(missing_ok=True)
+
+    def persist(self) -> None:
+        """Moves every file still in RAM to its stable path on disk, e.g. to keep it for a later resume."""
+        with self._lock:
+            files, self._files = self._files, {}
+            self.ram_used = 0
+        for link, (file, _) in files.items():
+            link.unlink(missing_ok=True)
+            shutil.move(str(file), str(link))
+
+    def close(self, persist: bool = False) -> None:
+        """
+        Frees the RAM directory. Files still in it are deleted, or moved to disk if `persist` is set;
+        their symlinks are removed either way.
+
+        Args:
+            persist (bool): Keep the files on disk instead of deleting them. Defaults to False.
+        """
+        if persist:
+            self.persist()
+        for link in list(self._files):
+            self.release(link)
+        if self.ram_root:
+            shutil.rmtree(self.ram_root, ignore_errors=True)
+            self.logger.info(f"RAM scratch peak: {self.ram_peak} bytes, {self.spilled} file(s) kept on disk")
+            self.ram_root = None
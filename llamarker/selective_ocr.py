@@ -0,0 +1,135 @@
+# llamarker/selective_ocr.py
+"""
+Per-page OCR: only the pages of a PDF that lack a usable text layer are OCR'd.
+
+`classify_pages` looks at each page's text layer and images; a page that shows an image but
+has (almost) no extractable text is a scan and needs OCR. A document with such pages is split
+into a born-digital part and a scanned part, Marker parses the parts separately (OCR forced on
+the scanned part only, both with page separators), and `merge_parts` puts the pages back
+together in their original order, renumbering the figures Marker named after their page.
+"""
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from pypdf import PdfReader, PdfWriter
+
+from llamarker.chunking import PAGE_SEPARATOR_PATTERN
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg")
+# Marker names figures after their 0-based page, e.g. _page_3_Figure_1.png
+FIGURE_PAGE_PATTERN = re.compile(r"^_page_(\d+)_")
+IMAGE_REF_PATTERN = re.compile(r"(!\[[^\]\n]*\]\()([^)\n]*)(\))")
+
+
+def _has_images(page) -> bool:
+    """Whether the page draws at least one image XObject."""
+    resources = page.get("/Resources")
+    if resources is None:
+        return False
+    xobjects = resources.get_object().get("/XObject")
+    if xobjects is None:
+        return False
+    return any(xobject.get_object().get("/Subtype") == "/Image" for xobject in xobjects.get_object().values())
+
+
+def classify_pages(pdf_file: Path, min_chars: int = 100) -> List[bool]:
+    """
+    Decides for each page of a PDF whether it needs OCR: pages that show an image but have fewer
+    than `min_chars` characters of extractable text. Blank and born-digital pages do not.
+
+    Args:
+        pdf_file (Path): The PDF to classify.
+        min_chars (int): Minimum non-whitespace characters of a usable text layer. Defaults to 100.
+
+    Returns:
+        List[bool]: One flag per page, True if the page needs OCR.
+    """
+    flags = []
+    for page in PdfReader(pdf_file).pages:
+        try:
+            chars = len("".join((page.extract_text() or "").split()))
+        except Exception:
+            chars = 0  # An unreadable text layer is as good as none
+        flags.append(chars < min_chars and _has_images(page))
+    return flags
+
+
+def write_pages(pdf_file: Path, pages: Sequence[int], dest: Path) -> None:
+    """Writes the given 0-based pages of `pdf_file`, in that order, to a new PDF at `dest`."""
+    reader = PdfReader(pdf_file)
+    writer = PdfWriter()
+    for index in pages:
+        writer.add_page(reader.pages[index])
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with open(dest, "wb") as f:
+        writer.write(f)
+
+
+def split_pages(text: str) -> List[Tuple[int, str]]:
+    """
+    Splits Markdown written by Marker with --paginate_output into `(page, content)` pairs, where
+    `page` is the 0-based page index of the parsed PDF. Content before the first separator is
+    added to the first page.
+    """
+    pages: List[Tuple[int, List[str]]] = []
+    preamble: List[str] = []
+    for line in text.splitlines(keepends=True):
+        separator = PAGE_SEPARATOR_PATTERN.match(line.rstrip("\n"))
+        if separator:
+            pages.append((int(separator.group(1)), []))
+        elif pages:
+            pages[-1][1].append(line)
+        else:
+            preamble.append(line)
+    if not pages:
+        return [(0, "".join(preamble).strip())]
+    pages[0][1][:0] = preamble
+    return [(page, "".join(lines).strip()) for page, lines in pages]
+
+
+def _renumber(name: str, page_map: Sequence[int]) -> str:
+    """Renames a figure of a part PDF after its page in the original document."""
+    match = FIGURE_PAGE_PATTERN.match(name)
+    if not match or int(match.group(1)) >= len(page_map):
+        return name
+    return f"_page_{page_map[int(match.group(1))]}_{name[match.end():]}"
+
+
+def merge_parts(document: str, parts: Sequence[Tuple[Path, Sequence[int]]], dest_dir: Path, paginate: bool = False) -> Path:
+    """
+    Merges the Marker output of a document's parts into one Markdown file with its figures, as if
+    Marker had parsed the whole document.
+
+    Args:
+        document (str): Document name; the merged file is `<dest_dir>/<document>.md`.
+        parts (Sequence[Tuple[Path, Sequence[int]]]): For each part, the folder Marker wrote it to and the
+            original 0-based page index of each of its pages.
+        dest_dir (Path): Folder to write the merged Markdown and the renamed figures to.
+        paginate (bool): Keep page separators, numbered by original page. Defaults to False.
+
+    Returns:
+        Path: The merged Markdown file.
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    merged: Dict[int, List[str]] = {}
+    for part_dir, page_map in parts:
+        markdown_files = list(part_dir.glob("*.md"))
+        if not markdown_files:
+            raise FileNotFoundError(f"Marker produced no Markdown in {part_dir}.")
+        text = markdown_files[0].read_text(encoding="utf-8")
+        for page, content in split_pages(text):
+            content = IMAGE_REF_PATTERN.sub(lambda match: f"{match.group(1)}{_renumber(match.group(2), page_map)}{match.group(3)}", content)
+            merged.setdefault(page_map[page] if page < len(page_map) else page_map[-1], []).append(content)
+        for image in part_dir.iterdir():
+            if image.suffix.lower() in IMAGE_SUFFIXES:
+                shutil.move(str(image), str(dest_dir / _renumber(image.name, page_map)))
+
+    if paginate:
+        text = "".join(f"\n\n{{{page}}}{'-' * 48}\n\n" + "\n\n".join(merged[page]) for page in sorted(merged))
+    else:
+        text = "\n\n".join("\n\n".join(merged[page]) for page in sorted(merged))
+    markdown_file = dest_dir / f"{document}.md"
+    markdown_file.write_text(text.strip("\n") + "\n", encoding="utf-8")
+    return markdown_file
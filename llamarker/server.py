@@ -0,0 +1,648 @@
+# llamarker/server.py
+"""
+`llamarker serve`: a long-running ingestion service with a local HTTP API.
+
+The process keeps everything that is expensive to start warm between requests: the
+imported pipeline, a persistent LibreOffice profile, Marker's models (when Marker is
+importable in this environment), the Ollama connection pool and the loaded Ollama model.
+Jobs are persisted in SQLite, so queued and interrupted jobs resume after a restart.
+
+API:
+    POST   /jobs?filename=report.docx[&model=..&qa_evaluator=1&force_ocr=1&languages=en]
+           Body: the document (or a ZIP of documents). Returns 202 with the job.
+    GET    /jobs                     List jobs.
+    GET    /jobs/<id>                Job status (queued, running, done, partial, failed or cancelled), per-stage and per-document progress.
+    GET    /jobs/<id>/events         Progress as newline-delimited JSON until the job ends.
+    GET    /jobs/<id>/documents/<name>  Parsed Markdown of a finished document.
+    DELETE /jobs/<id>                Cancel a job.
+    GET    /health                   Liveness and queue length.
+"""
+import argparse
+import json
+import logging
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from llamarker.ingest import CHUNK_SIZE, SUPPORTED_EXTENSIONS, extract_zip
+from llamarker.jobs import Job
+from llamarker.log_config import configure_logging
+from llamarker.main import LlaMarker, PipelineCancelled
+from llamarker.ollama_pool import parse_hosts
+from llamarker.scheduler import ModelCallScheduler
+
+# "partial": some documents finished, the others failed (listed in the job's error)
+TERMINAL_STATUSES = ("done", "partial", "failed", "cancelled")
+
+
+class JobStore:
+    """
+    SQLite-backed job queue. Jobs are claimed in submission order; jobs left "running" by a
+    previous process are put back in the queue by `requeue_interrupted`.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): SQLite database file; created if missing.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                options TEXT NOT NULL,
+                progress TEXT NOT NULL DEFAULT '{}',
+                error TEXT,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created)")
+
+    def create(self, job_id: str, filename: str, options: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, filename, options, created) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, filename, json.dumps(options), time.time()),
+            )
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Marks the oldest queued job as running and returns it, or None if the queue is empty."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+                if row:
+                    self._conn.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), row["id"]))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_dict(row, status="running") if row else None
+
+    def update_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress), job_id))
+
+    def finish(self, job_id: str, status: str, error: str = None) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?", (status, error, time.time(), job_id))
+
+    def cancel_queued(self, job_id: str) -> bool:
+        """Cancels a job that has not started yet; returns False otherwise."""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+        return cursor.rowcount == 1
+
+    def requeue_interrupted(self) -> int:
+        """Puts jobs that were running when the previous process stopped back in the queue."""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET status = 'queued', started = NULL, progress = '{}' WHERE status = 'running'")
+        return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def finished_before(self, cutoff: float) -> List[str]:
+        """Returns the IDs of jobs that ended before `cutoff` (a `time.time()` timestamp)."""
+        placeholders = ", ".join("?" * len(TERMINAL_STATUSES))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id FROM jobs WHERE status IN ({placeholders}) AND finished < ?", (*TERMINAL_STATUSES, cutoff)).fetchall()
+        return [row["id"] for row in rows]
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def queued(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, **overrides: Any) -> Dict[str, Any]:
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        job["progress"] = json.loads(job["progress"])
+        job.update(overrides)
+        return job
+
+
+def preload_model(model: str, keep_alive: str = None, backend=None, logger: logging.Logger = None) -> None:
+    """
+    Loads `model` into Ollama with an empty chat request; failures are logged, not raised.
+
+    Args:
+        model (str): Ollama model name.
+        keep_alive (str, optional): How long Ollama keeps the model loaded. Defaults to Ollama's default.
+        backend (OllamaBackendPool, optional): Pool to send the request through. Defaults to the local Ollama.
+        logger (logging.Logger, optional): Logger instance for logging progress.
+    """
+    logger = logger or logging.getLogger(__name__)
+    try:
+        from ollama import chat
+        chat_fn = backend.chat if backend else chat
+        chat_fn(model=model, messages=[], keep_alive=keep_alive)
+        logger.info(f"Ollama model {model} is loaded.")
+    except Exception as e:
+        logger.warning(f"Could not preload Ollama model {model}: {e}")
+
+
+class InProcessMarker:
+    """
+    Runs Marker through its Python API with models loaded once, instead of starting the
+    `marker` executable (and loading all models) for every job. Requires `marker-pdf` to be
+    importable in this environment.
+    """
+
+    def __init__(self, logger: logging.Logger = None):
+        from marker.models import create_model_dict
+
+        self.logger = logger or logging.getLogger(__name__)
+        start = time.perf_counter()
+        self.models = create_model_dict()
+        self._lock = threading.Lock()
+        self.logger.info(f"Marker models loaded in {time.perf_counter() - start:.1f}s")
+
+    def convert(self, pdf_path: Path, output_dir: Path, force_ocr: bool = False, languages: str = "en", paginate: bool = False) -> None:
+        """Writes `<output_dir>/<stem>/<stem>.md` and its images, like the Marker CLI."""
+        from marker.converters.pdf import PdfConverter
+        from marker.output import text_from_rendered
+
+        converter = PdfConverter(artifact_dict=self.models, config={"force_ocr": force_ocr, "languages": languages.split(","), "paginate_output": paginate})
+        # The models are shared; run one conversion at a time
+        with self._lock:
+            rendered = converter(str(pdf_path))
+        text, _, images = text_from_rendered(rendered)
+
+        document_dir = Path(output_dir) / pdf_path.stem
+        document_dir.mkdir(parents=True, exist_ok=True)
+        (document_dir / f"{pdf_path.stem}.md").write_text(text, encoding="utf-8")
+        for name, image in images.items():
+            image.save(document_dir / name)
+
+
+class IngestService:
+    """
+    Runs submitted documents through the pipeline on worker threads, with warm resources
+    shared by all jobs. Each job gets `<state_dir>/jobs/<id>/input`, deleted when the job ends,
+    and `.../output`, deleted with the job itself once it is older than `job_retention`.
+    """
+
+    def __init__(self, state_dir: str, model: str = "llama3.2-vision", marker_path: str = None, ollama_hosts: List[str] = None, job_workers: int = 1, max_model_calls: int = None, keep_alive: str = "30m", max_upload_bytes: int = 512 * 1024 * 1024, in_process_marker: bool = True, job_retention: float = 7 * 24 * 3600, logger: logging.Logger = None):
+        """
+        Args:
+            state_dir (str): Directory for the job database, job files and the LibreOffice profile.
+            model (str): Default Ollama model for jobs that do not name one.
+            marker_path (str, optional): Path to the Marker executable, used when Marker cannot run in-process.
+            ollama_hosts (List[str], optional): Ollama hosts to balance requests across. Defaults to the local host.
+            job_workers (int): Number of jobs processed at the same time. Defaults to 1.
+            max_model_calls (int, optional): Maximum concurrent model calls across all jobs. Defaults to unlimited.
+            keep_alive (str): How long Ollama keeps the model loaded after each call. Defaults to "30m".
+            max_upload_bytes (int): Largest accepted upload. Defaults to 512 MiB.
+            in_process_marker (bool): Load Marker's models once in this process if Marker is importable. Defaults to True.
+            job_retention (float): Seconds a finished job and its outputs are kept; 0 keeps them forever. Defaults to 7 days.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.state_dir = Path(state_dir).resolve()
+        self.jobs_dir = self.state_dir / "jobs"
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.logger = logger or logging.getLogger(__name__)
+        self.store = JobStore(self.state_dir / "jobs.sqlite3")
+        self.model = model
+        self.marker_path = marker_path or shutil.which("marker")
+        self.job_workers = max(1, job_workers)
+        self.keep_alive = keep_alive
+        self.max_upload_bytes = max_upload_bytes
+        self.job_retention = job_retention
+        self.libreoffice_profile = self.state_dir / "libreoffice_profile"
+        self.scheduler = ModelCallScheduler(max_concurrency=max_model_calls, logger=self.logger)
+        self.backend = None
+        if ollama_hosts:
+            from llamarker.ollama_pool import OllamaBackendPool
+            self.backend = OllamaBackendPool(ollama_hosts, logger=self.logger)
+        self.marker_runner = None
+        if in_process_marker:
+            try:
+                self.marker_runner = InProcessMarker(logger=self.logger)
+            except ImportError:
+                self.logger.info("Marker's Python API is not available; running the Marker executable per job.")
+        if not self.marker_runner and not self.marker_path:
+            raise FileNotFoundError("The 'marker' executable is required but not found in the PATH.")
+
+        self.active: Dict[str, Job] = {}
+        self._active_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._workers: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Resumes interrupted jobs, warms up the model and starts the job workers."""
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            self.logger.warning(f"Requeued {requeued} job(s) interrupted by the last shutdown.")
+        if self.backend:
+            self.backend.start_health_checks()
+        threading.Thread(target=self.warm_model, args=(self.model,), name="llamarker-warmup", daemon=True).start()
+        for index in range(self.job_workers):
+            worker = threading.Thread(target=self._work, name=f"llamarker-job-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        if self.job_retention:
+            cleaner = threading.Thread(target=self._expire, name="llamarker-job-retention", daemon=True)
+            cleaner.start()
+            self._workers.append(cleaner)
+
+    def stop(self) -> None:
+        """Stops taking new jobs and cancels the running ones; they are resumed on the next start."""
+        self._stopping.set()
+        with self._active_lock:
+            for job in self.active.values():
+                job.cancel()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for worker in self._workers:
+            worker.join()
+        if self.backend:
+            self.backend.stop()
+        self.store.close()
+
+    def warm_model(self, model: str) -> None:
+        """Loads `model` into Ollama so the first job does not wait for it."""
+        preload_model(model, self.keep_alive, backend=self.backend, logger=self.logger)
+
+    def submit(self, filename: str, stream, length: int, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Stores an uploaded document (or ZIP of documents) and queues a job for it.
+
+        Raises:
+            ValueError: If the file type is not supported or the upload is empty or too large.
+        """
+        filename = Path(unquote(filename)).name
+        suffix = Path(filename).suffix.lower()
+        if suffix not in SUPPORTED_EXTENSIONS and suffix != ".zip":
+            raise ValueError(f"Unsupported file type: {filename}")
+        if length <= 0:
+            raise ValueError("The upload is empty.")
+        if length > self.max_upload_bytes:
+            raise ValueError(f"Upload is larger than {self.max_upload_bytes} bytes.")
+
+        job_id = uuid.uuid4().hex[:12]
+        input_dir = self.jobs_dir / job_id / "input"
+        input_dir.mkdir(parents=True)
+        file_path = input_dir / filename
+        remaining = length
+        with open(file_path, "wb") as f:
+            while remaining > 0:
+                chunk = stream.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                f.write(chunk)
+                remaining -= len(chunk)
+        if remaining:
+            shutil.rmtree(input_dir.parent, ignore_errors=True)
+            raise ValueError("Upload ended before Content-Length bytes were received.")
+
+        if suffix == ".zip":
+            try:
+                for _ in extract_zip(file_path, input_dir, max_total_bytes=self.max_upload_bytes * 4, logger=self.logger):
+                    pass
+            except Exception:
+                shutil.rmtree(input_dir.parent, ignore_errors=True)
+                raise
+            finally:
+                file_path.unlink(missing_ok=True)
+
+        self.store.create(job_id, filename, options)
+        with self._wakeup:
+            self._wakeup.notify()
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job; returns False if it already ended or does not exist."""
+        if self.store.cancel_queued(job_id):
+            shutil.rmtree(self.jobs_dir / job_id / "input", ignore_errors=True)
+            return True
+        with self._active_lock:
+            job = self.active.get(job_id)
+        if job:
+            job.cancel()
+            return True
+        return False
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the stored job with its live progress and finished documents."""
+        stored = self.store.get(job_id)
+        if not stored:
+            return None
+        with self._active_lock:
+            job = self.active.get(job_id)
+        if job:
+            snapshot = job.snapshot()
+            stored["progress"] = {"stages": snapshot["stages"], "documents": snapshot["documents"]}
+        parsed_dir = self.jobs_dir / job_id / "output" / "ParsedFiles"
+        stored["documents"] = sorted(path.stem for path in parsed_dir.glob("*.md")) if parsed_dir.is_dir() else []
+        return stored
+
+    def document_path(self, job_id: str, name: str) -> Optional[Path]:
+        path = self.jobs_dir / job_id / "output" / "ParsedFiles" / f"{Path(unquote(name)).stem}.md"
+        return path if path.is_file() else None
+
+    def expire_jobs(self, now: float = None) -> int:
+        """
+        Deletes the jobs that ended more than `job_retention` seconds ago, with their outputs.
+
+        Returns:
+            int: Number of jobs deleted.
+        """
+        if not self.job_retention:
+            return 0
+        expired = self.store.finished_before((now or time.time()) - self.job_retention)
+        for job_id in expired:
+            shutil.rmtree(self.jobs_dir / job_id, ignore_errors=True)
+            self.store.delete(job_id)
+        if expired:
+            self.logger.info(f"Deleted {len(expired)} job(s) older than {self.job_retention:.0f}s.")
+        return len(expired)
+
+    def _expire(self) -> None:
+        while True:
+            try:
+                self.expire_jobs()
+            except Exception as e:
+                self.logger.error(f"Deleting expired jobs failed: {e}")
+            # Check every minute, or sooner for short retention periods
+            if self._stopping.wait(min(60.0, self.job_retention)):
+                return
+
+    def _finish(self, job_id: str, status: str, error: str = None) -> None:
+        """Records how a job ended and deletes its inputs, which only a requeued job would need."""
+        self.store.finish(job_id, status, error)
+        shutil.rmtree(self.jobs_dir / job_id / "input", ignore_errors=True)
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            claimed = self.store.claim_next()
+            if not claimed:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            self._run(claimed)
+
+    def _run(self, claimed: Dict[str, Any]) -> None:
+        job = Job(claimed["id"], claimed["filename"])
+        job.status = "running"
+        job.started = time.time()
+        options = claimed["options"]
+        with self._active_lock:
+            self.active[job.id] = job
+
+        def on_progress(stage, document, status, seconds=None):
+            job.on_progress(stage, document, status, seconds)
+            snapshot = job.snapshot()
+            self.store.update_progress(job.id, {"stages": snapshot["stages"], "documents": snapshot["documents"]})
+
+        job_dir = self.jobs_dir / job.id
+        output_dir = job_dir / "output"
+        shutil.rmtree(output_dir, ignore_errors=True)  # Leftovers of an interrupted attempt
+        llamarker = None
+        try:
+            llamarker = LlaMarker(
+                input_dir=str(job_dir / "input"),
+                output_dir=str(output_dir),
+                marker_path=self.marker_path,
+                logger=self.logger,
+                progress_callback=on_progress,
+                cancel_event=job.cancel_event,
+                libreoffice_profile=str(self.libreoffice_profile),
+                marker_runner=self.marker_runner,
+                scheduler=self.scheduler,
+                ollama_backend=self.backend,
+            )
+            llamarker.process_documents()
+            llamarker.parse_with_marker(force_ocr=options.get("force_ocr", False), languages=options.get("languages", "en"))
+            llamarker.process_subdirectories(model=options.get("model") or self.model, qa_evaluator=options.get("qa_evaluator", False), keep_alive=self.keep_alive)
+            self._finish(job.id, *self._outcome(job))
+        except PipelineCancelled:
+            if self._stopping.is_set():
+                # Shutting down: leave the job "running" so the next start requeues it
+                self.logger.info(f"Job {job.id} interrupted by shutdown")
+            else:
+                self._finish(job.id, "cancelled")
+        except Exception as e:
+            self.logger.error(f"Job {job.id} failed: {e}")
+            self._finish(job.id, "failed", str(e))
+        finally:
+            if llamarker:
+                llamarker.results_sink.close()
+                if llamarker.temp_dir.exists():
+                    llamarker.file_converter.cleanup()
+            with self._active_lock:
+                self.active.pop(job.id, None)
+
+
+    @staticmethod
+    def _outcome(job: Job) -> Tuple[str, Optional[str]]:
+        """
+        Status and error of a job whose pipeline ran through: the pipeline carries on past documents that fail
+        to convert, parse or enrich, so a job is only "done" if every document it reported on was enriched.
+        """
+        documents = job.snapshot()["documents"]
+        failed = sorted(name for name, stages in documents.items() if stages.get("enrich", {}).get("status") != "done")
+        if not documents:
+            return "failed", "No supported documents were converted."
+        if failed:
+            return "failed" if len(failed) == len(documents) else "partial", f"{len(failed)} of {len(documents)} document(s) did not finish: {', '.join(failed)}"
+        return "done", None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "LlaMarker"
+
+    def log_message(self, format: str, *args) -> None:
+        logging.getLogger(__name__).debug(format, *args)
+
+    @property
+    def service(self) -> IngestService:
+        return self.server.service
+
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> List[str]:
+        return [part for part in urlparse(self.path).path.split("/") if part]
+
+    def do_GET(self) -> None:
+        parts = self._route()
+        if parts == ["health"]:
+            self._send_json({"status": "ok", "queued": self.service.store.queued(), "running": len(self.service.active)})
+        elif parts == ["jobs"]:
+            self._send_json(self.service.store.list())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self.service.status(parts[1])
+            self._send_json(job, 200) if job else self._send_json({"error": "Job not found"}, 404)
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            self._stream_events(parts[1])
+        elif len(parts) == 4 and parts[0] == "jobs" and parts[2] == "documents":
+            path = self.service.document_path(parts[1], parts[3])
+            if not path:
+                self._send_json({"error": "Document not found"}, 404)
+                return
+            body = path.read_bytes()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/markdown; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({"error": "Not found"}, 404)
+
+    def _stream_events(self, job_id: str) -> None:
+        """Writes the job state as a JSON line whenever it changes, until the job ends."""
+        job = self.service.status(job_id)
+        if not job:
+            self._send_json({"error": "Job not found"}, 404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        last = None
+        while True:
+            line = json.dumps(job, default=str)
+            if line != last:
+                self.wfile.write(line.encode("utf-8") + b"\n")
+                self.wfile.flush()
+                last = line
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            time.sleep(0.25)
+            job = self.service.status(job_id)
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if [part for part in url.path.split("/") if part] != ["jobs"]:
+            self._send_json({"error": "Not found"}, 404)
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if "filename" not in query:
+            self._send_json({"error": "The 'filename' query parameter is required."}, 400)
+            return
+        options = {
+            "model": query.get("model"),
+            "qa_evaluator": query.get("qa_evaluator", "0") in ("1", "true"),
+            "force_ocr": query.get("force_ocr", "0") in ("1", "true"),
+            "languages": query.get("languages", "en"),
+        }
+        if "Content-Length" not in self.headers:
+            self._send_json({"error": "A Content-Length header is required."}, 411)
+            return
+        try:
+            job = self.service.submit(query["filename"], self.rfile, int(self.headers["Content-Length"]), options)
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+            return
+        self._send_json(job, 202)
+
+    def do_DELETE(self) -> None:
+        parts = self._route()
+        if len(parts) == 2 and parts[0] == "jobs":
+            if self.service.cancel(parts[1]):
+                self._send_json({"id": parts[1], "status": "cancelling"}, 202)
+            else:
+                self._send_json({"error": "Job not found or already finished"}, 404)
+        else:
+            self._send_json({"error": "Not found"}, 404)
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    """HTTP front end of an `IngestService`."""
+
+    daemon_threads = True
+
+    def __init__(self, service: IngestService, host: str = "127.0.0.1", port: int = 8765):
+        super().__init__((host, port), _Handler)
+        self.service = service
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="llamarker serve", description="Run LlaMarker as a local ingestion service with an HTTP API.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765).")
+    parser.add_argument("--state_dir", type=str, default="llamarker_service", help="Directory for the job database and job files (default: ./llamarker_service).")
+    parser.add_argument("--model", type=str, default="llama3.2-vision", help="Default Ollama model (default: llama3.2-vision).")
+    parser.add_argument("--marker_path", type=str, default=None, help="Path of the marker executable, used if Marker cannot run in-process.")
+    parser.add_argument("--ollama_hosts", type=str, default=None, help="Comma-separated list of Ollama hosts to balance requests across.")
+    parser.add_argument("--job_workers", type=int, default=1, help="Number of jobs processed at the same time (default: 1).")
+    parser.add_argument("--max_model_calls", type=int, default=None, help="Maximum concurrent Ollama calls across all jobs (default: unlimited).")
+    parser.add_argument("--keep_alive", type=str, default="30m", help='How long Ollama keeps the model loaded between calls, e.g. "30m" or "-1" (default: 30m).')
+    parser.add_argument("--max_upload_mb", type=int, default=512, help="Largest accepted upload in MiB (default: 512).")
+    parser.add_argument("--job_retention_hours", type=float, default=168.0, help="Hours finished jobs and their outputs are kept; 0 keeps them forever (default: 168).")
+    parser.add_argument("--verbose", type=int, choices=[0, 1, 2], default=1, help="0 for WARNING, 1 for INFO, 2 for DEBUG (default: 1).")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    configure_logging({0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG))
+    logger = logging.getLogger("llamarker.server")
+    service = IngestService(
+        args.state_dir,
+        model=args.model,
+        marker_path=args.marker_path,
+        ollama_hosts=parse_hosts(args.ollama_hosts),
+        job_workers=args.job_workers,
+        max_model_calls=args.max_model_calls,
+        keep_alive=args.keep_alive,
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+        job_retention=args.job_retention_hours * 3600,
+        logger=logger,
+    )
+    service.start()
+    server = ServiceHTTPServer(service, args.host, args.port)
+    print(f"LlaMarker service listening on {server.url} (state: {service.state_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
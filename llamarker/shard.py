@@ -0,0 +1,447 @@
+# llamarker/shard.py
+"""
+Sharded processing: several `llamarker` processes, on one host or on many hosts sharing a
+directory (e.g. over NFS), split the documents of one input folder between them.
+
+Coordination happens only through files in the shared directory:
+
+    <shard_dir>/worklist.json       The documents to process, written once by the first worker.
+    <shard_dir>/leases/<id>.lease   Created exclusively by the worker processing a document, holds
+                                    its worker ID and is touched periodically; a lease not touched
+                                    for `lease_seconds` belongs to a dead worker and is taken over.
+    <shard_dir>/done/<id>.json      Outcome of a finished document.
+
+Each worker parses its documents in a local scratch folder and publishes the results into the
+shared output tree file by file with atomic renames. The last worker writes a combined
+`summary.json` next to the outputs.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from llamarker.ingest import SUPPORTED_EXTENSIONS
+
+
+def atomic_write_json(path: Path, payload: Any) -> None:
+    """Writes JSON to `path` through a temporary file and a rename, so readers never see partial content."""
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def publish_file(source: Path, target: Path) -> None:
+    """Copies `source` to `target` (possibly on another file system) and renames it into place atomically."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+    shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+class WorkQueue:
+    """
+    Work list and lease files in a shared directory. Safe for concurrent workers on one host or
+    on several hosts, as long as the file system supports exclusive create and atomic rename
+    (local file systems and NFSv3+).
+    """
+
+    def __init__(self, shard_dir: str, worker_id: str = None, lease_seconds: float = 300.0, logger: logging.Logger = None):
+        """
+        Args:
+            shard_dir (str): Shared coordination directory.
+            worker_id (str, optional): Unique name of this worker. Defaults to `<hostname>-<pid>`.
+            lease_seconds (float): Seconds without a heartbeat after which a lease is considered dead. Defaults to 300.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.shard_dir = Path(shard_dir)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.logger = logger or logging.getLogger(__name__)
+        self.leases_dir = self.shard_dir / "leases"
+        self.done_dir = self.shard_dir / "done"
+        for directory in (self.leases_dir, self.done_dir, self.shard_dir / "clock"):
+            directory.mkdir(parents=True, exist_ok=True)
+        self.documents: List[Dict[str, str]] = []
+
+    def load_worklist(self, input_dir: Path) -> List[Dict[str, str]]:
+        """
+        Returns the shared work list, creating it from `input_dir` if this is the first worker.
+        Document paths are stored relative to the input folder, so hosts may mount it at different paths.
+        Outputs are named after the document, so a document whose name (without extension) is already
+        taken by an earlier one in another subfolder is marked with a `conflict` and will fail.
+        """
+        worklist = self.shard_dir / "worklist.json"
+        if not worklist.exists():
+            input_dir = Path(input_dir)
+            files = sorted(path for path in input_dir.rglob("*") if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS)
+            documents = [{"id": hashlib.sha1(path.relative_to(input_dir).as_posix().encode()).hexdigest()[:16], "path": path.relative_to(input_dir).as_posix()} for path in files]
+            owners: Dict[str, str] = {}
+            for document in documents:
+                stem = Path(document["path"]).stem
+                if stem in owners:
+                    document["conflict"] = owners[stem]
+                else:
+                    owners[stem] = document["path"]
+            tmp_path = worklist.with_name(f".worklist.{self.worker_id}.tmp")
+            tmp_path.write_text(json.dumps({"created_by": self.worker_id, "documents": documents}, indent=2), encoding="utf-8")
+            try:
+                # link() fails if another worker created the list first; theirs wins
+                os.link(tmp_path, worklist)
+                self.logger.info(f"Created work list with {len(documents)} documents")
+            except FileExistsError:
+                pass
+            finally:
+                tmp_path.unlink(missing_ok=True)
+        self.documents = json.loads(worklist.read_text(encoding="utf-8"))["documents"]
+        return self.documents
+
+    def _fs_now(self) -> float:
+        """Current time according to the shared file system, so clock skew between hosts does not matter."""
+        clock_file = self.shard_dir / "clock" / self.worker_id
+        clock_file.touch()
+        os.utime(clock_file, None)
+        return clock_file.stat().st_mtime
+
+    def _lease_path(self, document_id: str) -> Path:
+        return self.leases_dir / f"{document_id}.lease"
+
+    def is_done(self, document_id: str) -> bool:
+        return (self.done_dir / f"{document_id}.json").exists()
+
+    def _try_acquire(self, document_id: str, now: float) -> bool:
+        lease = self._lease_path(document_id)
+        try:
+            fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            try:
+                current = lease.stat()
+            except FileNotFoundError:
+                return False  # Released in the meantime; retried on the next pass
+            if now - current.st_mtime <= self.lease_seconds:
+                return False
+            # Only one worker can rename the dead lease away; that worker takes the document over
+            stale = lease.with_name(f"{lease.name}.stale.{self.worker_id}")
+            try:
+                os.rename(lease, stale)
+            except FileNotFoundError:
+                return False
+            moved = stale.stat()
+            if (moved.st_ino, moved.st_mtime_ns) != (current.st_ino, current.st_mtime_ns):
+                # Another worker reclaimed it first and this was its fresh lease; put it back
+                os.rename(stale, lease)
+                return False
+            stale.unlink(missing_ok=True)
+            self.logger.warning(f"Reclaiming document {document_id} from a worker that stopped responding")
+            return self._try_acquire(document_id, now)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.worker_id)
+        return True
+
+    def claim(self, limit: int = 1) -> List[Dict[str, str]]:
+        """Leases up to `limit` unfinished documents that no live worker holds."""
+        claimed = []
+        now = self._fs_now()
+        for document in self.documents:
+            if len(claimed) >= limit:
+                break
+            if not self.is_done(document["id"]) and self._try_acquire(document["id"], now):
+                if self.is_done(document["id"]):  # Finished while we were looking
+                    self.release(document["id"])
+                    continue
+                claimed.append(document)
+        return claimed
+
+    def owns(self, document_id: str) -> bool:
+        """Whether this worker still holds the lease of `document_id`."""
+        try:
+            return self._lease_path(document_id).read_text(encoding="utf-8") == self.worker_id
+        except FileNotFoundError:
+            return False
+
+    def renew(self, document_ids: List[str]) -> List[str]:
+        """
+        Heartbeat: marks the leases that this worker still holds as alive.
+
+        Returns:
+            List[str]: The documents whose lease was taken over by another worker; their leases are left alone.
+        """
+        lost = []
+        for document_id in document_ids:
+            try:
+                # Check and touch the same file: a reclaimed lease is a new file
+                with open(self._lease_path(document_id), "r+", encoding="utf-8") as f:
+                    if f.read() == self.worker_id:
+                        os.utime(f.fileno() if os.utime in os.supports_fd else f.name, None)
+                        continue
+            except FileNotFoundError:
+                pass
+            self.logger.warning(f"Lease of document {document_id} was taken over by another worker")
+            lost.append(document_id)
+        return lost
+
+    def release(self, document_id: str) -> None:
+        """Deletes the lease of `document_id`, unless another worker has taken it over."""
+        if self.owns(document_id):
+            self._lease_path(document_id).unlink(missing_ok=True)
+
+    def complete(self, document_id: str, outcome: Dict[str, Any]) -> None:
+        """Records the outcome of a document and releases its lease."""
+        atomic_write_json(self.done_dir / f"{document_id}.json", {"worker": self.worker_id, "finished": time.time(), **outcome})
+        self.release(document_id)
+
+    def remaining(self) -> int:
+        return sum(1 for document in self.documents if not self.is_done(document["id"]))
+
+    def outcomes(self) -> List[Dict[str, Any]]:
+        """Returns the outcomes of all finished documents in work-list order."""
+        results = []
+        for document in self.documents:
+            path = self.done_dir / f"{document['id']}.json"
+            if path.exists():
+                results.append(json.loads(path.read_text(encoding="utf-8")))
+        return results
+
+
+class _Heartbeat:
+    """Renews a set of leases in the background while they are being processed."""
+
+    def __init__(self, queue: WorkQueue, document_ids: List[str]):
+        self.queue = queue
+        self.document_ids = list(document_ids)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="llamarker-lease", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            lost = self.queue.renew(self.document_ids)
+            self.document_ids = [document_id for document_id in self.document_ids if document_id not in lost]
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class ShardWorker:
+    """
+    Claims batches of documents from a `WorkQueue`, runs the pipeline on them and publishes the
+    results into the shared output folder, until every document is finished.
+    """
+
+    def __init__(self, input_dir: str, output_dir: str, shard_dir: str, worker_id: str = None, lease_seconds: float = 300.0, batch_size: int = 4, poll_interval: float = 2.0, marker_path: str = None, model: str = "llama3.2-vision", qa_evaluator: bool = False, force_ocr: bool = False, languages: str = "en", save_pdfs: bool = False, ollama_hosts: List[str] = None, max_model_calls: int = None, keep_alive: str = None, doc_workers: int = 1, image_workers: int = 1, verbose: int = 0, logger: logging.Logger = None):
+        """
+        Args:
+            input_dir (str): Input folder; the same documents must be visible to every worker.
+            output_dir (str): Shared output folder the results are merged into.
+            shard_dir (str): Shared coordination folder.
+            worker_id (str, optional): Unique name of this worker. Defaults to `<hostname>-<pid>`.
+            lease_seconds (float): Seconds without a heartbeat after which a worker's documents are reclaimed. Defaults to 300.
+            batch_size (int): Documents claimed and parsed together. Defaults to 4.
+            poll_interval (float): Seconds between checks while other workers finish. Defaults to 2.
+            marker_path (str, optional): Path to the Marker executable.
+            model (str): Ollama model to query. Defaults to "llama3.2-vision".
+            qa_evaluator (bool): Whether to enable the QA evaluator. Defaults to False.
+            force_ocr (bool): Whether to force OCR on all pages. Defaults to False.
+            languages (str): Comma-separated OCR languages. Defaults to "en".
+            save_pdfs (bool): Publish the converted PDFs too. Defaults to False.
+            ollama_hosts (List[str], optional): Ollama hosts to balance requests across.
+            max_model_calls (int, optional): Maximum concurrent Ollama calls of this worker. Defaults to unlimited.
+            keep_alive (str, optional): How long Ollama keeps the model loaded between calls.
+            doc_workers (int): Documents enriched concurrently. Defaults to 1.
+            image_workers (int): Images processed concurrently per document. Defaults to 1.
+            verbose (int): Verbosity level of the pipeline. Defaults to 0.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        from llamarker.scheduler import ModelCallScheduler
+
+        self.input_dir = Path(input_dir).resolve()
+        if not self.input_dir.is_dir():
+            raise FileNotFoundError(f"Input directory not found: {self.input_dir}")
+        self.output_dir = Path(output_dir).resolve()
+        self.logger = logger or logging.getLogger(__name__)
+        self.queue = WorkQueue(shard_dir, worker_id=worker_id, lease_seconds=lease_seconds, logger=self.logger)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.marker_path = marker_path
+        self.model = model
+        self.qa_evaluator = qa_evaluator
+        self.force_ocr = force_ocr
+        self.languages = languages
+        self.save_pdfs = save_pdfs
+        self.keep_alive = keep_alive
+        self.doc_workers = doc_workers
+        self.image_workers = image_workers
+        self.verbose = verbose
+        self.scheduler = ModelCallScheduler(max_concurrency=max_model_calls, logger=self.logger)
+        self.backend = None
+        if ollama_hosts:
+            from llamarker.ollama_pool import OllamaBackendPool
+            self.backend = OllamaBackendPool(ollama_hosts, logger=self.logger)
+            self.backend.start_health_checks()
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Processes batches until no document is left, waiting for (or taking over from) other
+        workers, then writes the combined summary.
+
+        Returns:
+            Dict[str, Any]: The combined summary.
+        """
+        self.queue.load_worklist(self.input_dir)
+        self.logger.info(f"Worker {self.queue.worker_id}: {self.queue.remaining()} of {len(self.queue.documents)} documents left")
+        try:
+            while self.queue.remaining():
+                batch = self.queue.claim(self.batch_size)
+                if batch:
+                    self.process_batch(batch)
+                else:
+                    # Everything left is leased by other workers; wait for them or for their leases to expire
+                    time.sleep(self.poll_interval)
+        finally:
+            if self.backend:
+                self.backend.stop()
+        return self.write_summary()
+
+    def process_batch(self, batch: List[Dict[str, str]]) -> None:
+        """Parses the claimed documents in a local scratch folder and publishes their results."""
+        from llamarker.main import LlaMarker
+
+        start = time.perf_counter()
+        events: Dict[str, Dict[str, str]] = {}
+
+        def on_progress(stage, document, status, seconds=None):
+            if document:
+                events.setdefault(document, {})[stage] = status
+
+        for document in batch:
+            if document.get("conflict"):
+                self.logger.error(f"Skipping {document['path']}: its outputs would overwrite those of {document['conflict']}")
+                self.queue.complete(document["id"], {
+                    "path": document["path"],
+                    "status": "failed",
+                    "error": f"Another document with the same name is processed: {document['conflict']}",
+                    "pages": 0,
+                    "figures": 0,
+                    "batch_seconds": 0.0,
+                })
+        batch = [document for document in batch if not document.get("conflict")]
+        if not batch:
+            return
+
+        scratch = Path(tempfile.mkdtemp(prefix="llamarker_shard_"))
+        completed = False
+        try:
+            with _Heartbeat(self.queue, [document["id"] for document in batch]):
+                staging_input = scratch / "input"
+                staging_input.mkdir()
+                for document in batch:
+                    (staging_input / Path(document["path"]).name).symlink_to(self.input_dir / document["path"])
+                llamarker = LlaMarker(
+                    input_dir=str(staging_input),
+                    output_dir=str(scratch / "output"),
+                    save_pdfs=self.save_pdfs,
+                    marker_path=self.marker_path,
+                    verbose=self.verbose,
+                    logger=self.logger,
+                    progress_callback=on_progress,
+                    scheduler=self.scheduler,
+                    ollama_backend=self.backend,
+                )
+                try:
+                    llamarker.process_documents()
+                    if llamarker.file_converter.results:
+                        llamarker.parse_with_marker(force_ocr=self.force_ocr, languages=self.languages)
+                        llamarker.process_subdirectories(model=self.model, qa_evaluator=self.qa_evaluator, workers=self.doc_workers, image_workers=self.image_workers, keep_alive=self.keep_alive)
+                    error = None
+                except Exception as e:
+                    self.logger.error(f"Batch failed: {e}")
+                    error = str(e)
+                finally:
+                    llamarker.results_sink.close()
+                    if llamarker.temp_dir.exists():
+                        llamarker.file_converter.cleanup()
+                pages = {Path(pdf_file).stem: count for pdf_file, count in llamarker.generate_summary()}
+                # A document reclaimed by another worker (e.g. after a long stall) is theirs to publish
+                stems = {Path(document["path"]).stem for document in batch}
+                for document in [document for document in batch if not self.queue.owns(document["id"])]:
+                    self.logger.warning(f"Dropping the results of {document['path']}: another worker has taken it over")
+                    batch.remove(document)
+                self._publish(scratch / "output", {Path(document["path"]).stem for document in batch}, stems)
+
+            seconds = round(time.perf_counter() - start, 3)
+            for document in batch:
+                stem = Path(document["path"]).stem
+                done = events.get(stem, {}).get("enrich") == "done" and (self.output_dir / "ParsedFiles" / f"{stem}.md").exists()
+                self.queue.complete(document["id"], {
+                    "path": document["path"],
+                    "status": "done" if done else "failed",
+                    "error": None if done else error or "; ".join(f"{stage} {status}" for stage, status in events.get(stem, {}).items()) or "not converted",
+                    "pages": pages.get(stem, 0),
+                    "figures": len(list((self.output_dir / "ParsedFiles" / "pics").glob(f"{stem}_*"))) if done else 0,
+                    "batch_seconds": seconds,
+                })
+            completed = True
+        finally:
+            if not completed:
+                # Unexpected error (e.g. Marker or LibreOffice missing): let other workers take the documents
+                for document in batch:
+                    self.queue.release(document["id"])
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def _publish(self, staging_output: Path, stems: Set[str], batch_stems: Set[str]) -> None:
+        """
+        Moves the results of the documents named `stems` into the shared output folder, pointing Markdown
+        image links at it. Figures are named `<document>_<image>`; each belongs to the longest matching
+        name among `batch_stems`, the documents of the batch.
+        """
+        staged = staging_output / "ParsedFiles"
+        final = self.output_dir / "ParsedFiles"
+        # update_markdown writes image links relative to the working directory
+        staged_pics = os.path.relpath(staged / "pics", start=Path.cwd())
+        final_pics = os.path.relpath(final / "pics", start=Path.cwd())
+        for source in sorted(staged.glob("pics/*")):
+            owners = [stem for stem in batch_stems if source.name.startswith(f"{stem}_")]
+            if owners and max(owners, key=len) in stems:
+                publish_file(source, final / "pics" / source.name)
+        for source in sorted(staged.glob("*.md")):
+            if source.stem not in stems:
+                continue
+            content = source.read_text(encoding="utf-8").replace(f"({staged_pics}/", f"({final_pics}/")
+            source.write_text(content, encoding="utf-8")
+            publish_file(source, final / source.name)
+        for source in sorted((staging_output / "PDFs").glob("*.pdf")):
+            if source.stem in stems:
+                publish_file(source, self.output_dir / "PDFs" / source.name)
+
+    def write_summary(self) -> Dict[str, Any]:
+        """Writes `<output>/summary.json` with totals and per-document outcomes of all workers."""
+        outcomes = self.queue.outcomes()
+        workers: Dict[str, int] = {}
+        for outcome in outcomes:
+            workers[outcome["worker"]] = workers.get(outcome["worker"], 0) + 1
+        summary = {
+            "documents": len(self.queue.documents),
+            "done": sum(1 for outcome in outcomes if outcome["status"] == "done"),
+            "failed": sum(1 for outcome in outcomes if outcome["status"] == "failed"),
+            "pages": sum(outcome["pages"] for outcome in outcomes),
+            "figures": sum(outcome["figures"] for outcome in outcomes),
+            "workers": workers,
+            "outcomes": outcomes,
+        }
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.output_dir / "summary.json", summary)
+        return summary
@@ -0,0 +1,195 @@
+# llamarker/tracing.py
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("llamarker_current_span", default=None)
+
+
+class Span:
+    """
+    A timed operation within a trace. Use as a context manager; the span becomes the
+    parent of spans opened inside the block (including in threads started via `bind_context`).
+    """
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_span_id", "links", "attributes", "start_ns", "end_ns", "status", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any], trace_id: str = None):
+        parent = _current_span.get()
+        self.tracer = tracer
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.links = []
+        if trace_id and (parent is None or parent.trace_id != trace_id):
+            # Start (or join) a dedicated trace, linking back to the span we were called from
+            self.trace_id = trace_id
+            self.parent_span_id = None
+            if parent is not None:
+                self.links.append({"traceId": parent.trace_id, "spanId": parent.span_id})
+        elif parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_span_id = parent.span_id
+        else:
+            self.trace_id = tracer.run_trace_id
+            self.parent_span_id = None
+        self.attributes = attributes
+        self.status = "OK"
+        self.start_ns = 0
+        self.end_ns = 0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.status = "ERROR"
+            self.attributes["exception"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.export(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializes the span using OTLP/JSON field names."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "links": self.links,
+            "status": {"code": self.status},
+        }
+
+
+class Tracer:
+    """
+    Records spans to a local JSONL file, one finished span per line.
+
+    Pipeline-level spans (stages, Marker runs) belong to one trace per run. Each
+    document gets its own trace, derived from the run and the document name, so all
+    of a document's spans across stages can be pulled out with a single trace ID.
+    """
+
+    def __init__(self, path: str, logger: logging.Logger = None):
+        """
+        Args:
+            path (str): JSONL file to append finished spans to.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logger or logging.getLogger(__name__)
+        self.run_trace_id = os.urandom(16).hex()
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def span(self, name: str, trace_id: str = None, **attributes: Any) -> Span:
+        """
+        Creates a span; use it as a context manager.
+
+        Args:
+            name (str): Span name, e.g. "stage", "document", "subprocess" or "model_call".
+            trace_id (str, optional): Put the span in this trace instead of its parent's.
+            **attributes: Span attributes.
+        """
+        return Span(self, name, attributes, trace_id)
+
+    def document_trace_id(self, document: str) -> str:
+        """Returns the trace ID used for all spans of `document` in this run."""
+        return hashlib.sha256(f"{self.run_trace_id}:{document}".encode("utf-8")).hexdigest()[:32]
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        self.logger.info(f"Trace spans written to {self.path}")
+
+
+class _NullSpan:
+    """Shared do-nothing span returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Tracer used when tracing is disabled; creates no spans and writes nothing."""
+
+    def span(self, name: str, trace_id: str = None, **attributes: Any) -> _NullSpan:
+        return _NULL_SPAN
+
+    def document_trace_id(self, document: str) -> Optional[str]:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+_tracer = NullTracer()
+
+
+def get_tracer():
+    """Returns the process-wide tracer (a `NullTracer` unless `set_tracer` was called)."""
+    return _tracer
+
+
+def set_tracer(tracer) -> None:
+    """Installs the process-wide tracer; pass `None` to disable tracing."""
+    global _tracer
+    _tracer = tracer if tracer is not None else NullTracer()
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    Wraps `fn` so it runs with the caller's current span as parent, even in another thread.
+
+    Use when submitting work to a thread pool.
+    """
+    if isinstance(_tracer, NullTracer):
+        return fn
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,412 @@
+# llamarker/watch.py
+"""
+Watch-folder mode: process documents as they are dropped into a directory.
+
+`DirectoryWatcher` reports new or modified documents once they have stopped changing for a
+debounce period, using inotify on Linux and periodic scans elsewhere. `FolderWatchProcessor`
+feeds those documents through the pipeline in small batches, reusing one set of warm
+resources (LibreOffice profile, Marker models, Ollama connections and loaded model) for the
+life of the process. Deleted documents are ignored; their earlier results are kept.
+"""
+import ctypes
+import ctypes.util
+import errno
+import json
+import logging
+import os
+import select
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from llamarker.ingest import SUPPORTED_EXTENSIONS
+
+Fingerprint = Tuple[int, int]  # (size, mtime_ns)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def fingerprint(path: Path) -> Optional[Fingerprint]:
+    """Returns the size and modification time of a file, or None if it is gone."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class _InotifyBackend:
+    """Waits for file events under a directory tree with inotify (Linux only)."""
+
+    def __init__(self, directory: Path, is_excluded: Callable[[Path], bool]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._is_excluded = is_excluded
+        self._watches: Dict[int, Path] = {}
+        self._add_tree(directory)
+
+    def _add_tree(self, directory: Path) -> Set[Path]:
+        """Watches `directory` and its subdirectories; returns the files already in them."""
+        files = set()
+        for root, dirs, names in os.walk(directory):
+            root_path = Path(root)
+            dirs[:] = [name for name in dirs if not self._is_excluded(root_path / name)]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root_path), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "inotify watch limit reached (see fs.inotify.max_user_watches)")
+                continue
+            self._watches[wd] = root_path
+            files.update(root_path / name for name in names)
+        return files
+
+    def wait(self, timeout: float) -> Optional[Set[Path]]:
+        """
+        Returns the paths touched within `timeout` seconds, or None if events were lost and
+        the caller should rescan.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        touched: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return touched
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                offset += EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if wd not in self._watches or not name:
+                    continue
+                path = self._watches[wd] / os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    # A new folder may already contain files written before it was watched
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not self._is_excluded(path):
+                        touched.update(self._add_tree(path))
+                else:
+                    touched.add(path)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """Fallback that rescans the directory tree every `interval` seconds."""
+
+    def __init__(self, directory: Path, is_excluded: Callable[[Path], bool], interval: float):
+        self.interval = interval
+
+    def wait(self, timeout: float) -> Optional[Set[Path]]:
+        time.sleep(min(timeout, self.interval))
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class DirectoryWatcher:
+    """
+    Reports supported documents under a directory that are new or modified since they were
+    last reported, once their size and modification time have not changed for `debounce`
+    seconds (so files still being copied are not picked up half-written).
+    """
+
+    def __init__(self, directory: str, debounce: float = 2.0, poll_interval: float = 1.0, exclude: Iterable[str] = (), seen: Dict[str, Fingerprint] = None, use_inotify: bool = True, clock: Callable[[], float] = time.monotonic, logger: logging.Logger = None):
+        """
+        Args:
+            directory (str): Directory to watch, including subdirectories.
+            debounce (float): Seconds a file must stay unchanged before it is reported. Defaults to 2.
+            poll_interval (float): Seconds between scans without inotify. Defaults to 1.
+            exclude (Iterable[str]): Directories to ignore, e.g. the output folders inside the watched one.
+            seen (Dict[str, Fingerprint], optional): Fingerprints of documents already processed, by path;
+                they are only reported again once modified.
+            use_inotify (bool): Use inotify when available. Defaults to True.
+            clock (Callable[[], float]): Time source; replaceable in tests.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        self.directory = Path(directory).resolve()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.exclude = [Path(path).resolve() for path in exclude]
+        self.seen: Dict[str, Fingerprint] = {key: tuple(value) for key, value in (seen or {}).items()}
+        self.clock = clock
+        self.logger = logger or logging.getLogger(__name__)
+        self._pending: Dict[Path, Tuple[Fingerprint, float]] = {}
+        self._backend = None
+        if use_inotify:
+            try:
+                self._backend = _InotifyBackend(self.directory, self._is_excluded)
+                self.logger.info(f"Watching {self.directory} with inotify")
+            except (OSError, AttributeError) as e:
+                self.logger.info(f"inotify is not available ({e}); scanning {self.directory} every {poll_interval}s")
+        if not self._backend:
+            self._backend = _PollingBackend(self.directory, self._is_excluded, poll_interval)
+        # Documents that arrived while the watcher was not running
+        self._track(self._scan())
+
+    def _is_excluded(self, path: Path) -> bool:
+        return any(path == excluded or excluded in path.parents for excluded in self.exclude)
+
+    def _is_candidate(self, path: Path) -> bool:
+        # Hidden, temporary and Office lock files (~$report.docx) are skipped
+        return path.suffix.lower() in SUPPORTED_EXTENSIONS and not path.name.startswith((".", "~$")) and not self._is_excluded(path)
+
+    def _scan(self) -> Set[Path]:
+        files = set()
+        for root, dirs, names in os.walk(self.directory):
+            root_path = Path(root)
+            dirs[:] = [name for name in dirs if not name.startswith(".") and not self._is_excluded(root_path / name)]
+            files.update(root_path / name for name in names)
+        return files
+
+    def _track(self, paths: Iterable[Path]) -> None:
+        """Starts or restarts the quiet period of files that changed since they were last seen."""
+        now = self.clock()
+        for path in paths:
+            if not self._is_candidate(path):
+                continue
+            current = fingerprint(path)
+            if current is None or self.seen.get(str(path)) == current:
+                continue
+            pending = self._pending.get(path)
+            if not pending or pending[0] != current:
+                self._pending[path] = (current, now)
+
+    def poll(self, timeout: float = None) -> List[Path]:
+        """
+        Waits up to `timeout` seconds (default: the poll interval) for changes and returns the
+        documents that are ready to be processed, oldest change first.
+        """
+        timeout = self.poll_interval if timeout is None else timeout
+        if self._pending:
+            # Wake up when the next pending file may have settled
+            next_ready = min(since for _, since in self._pending.values()) + self.debounce - self.clock()
+            timeout = max(0.0, min(timeout, next_ready))
+        touched = self._backend.wait(timeout)
+        self._track(self._scan() if touched is None else touched)
+
+        now = self.clock()
+        ready = []
+        for path, (previous, since) in list(self._pending.items()):
+            current = fingerprint(path)
+            if current is None:
+                del self._pending[path]
+            elif current != previous:
+                self._pending[path] = (current, now)
+            elif now - since >= self.debounce:
+                del self._pending[path]
+                ready.append((since, path))
+        return [path for _, path in sorted(ready)]
+
+    def mark_processed(self, path: Path, file_fingerprint: Fingerprint) -> None:
+        """Records that `path` was processed at `file_fingerprint`; it is reported again only if it changes."""
+        self.seen[str(path)] = file_fingerprint
+
+    def close(self) -> None:
+        self._backend.close()
+
+
+class FolderWatchProcessor:
+    """
+    Runs the pipeline on documents as they appear in `input_dir`, keeping results of earlier
+    batches in the output folder. Processed documents are remembered in
+    `<output>/.llamarker_watch.json`, so a restart only picks up new or modified ones.
+    """
+
+    STATE_FILE = ".llamarker_watch.json"
+
+    def __init__(self, input_dir: str, output_dir: str = None, marker_path: str = None, model: str = "llama3.2-vision", qa_evaluator: bool = False, force_ocr: bool = False, languages: str = "en", save_pdfs: bool = False, ollama_hosts: List[str] = None, max_model_calls: int = None, keep_alive: str = "30m", doc_workers: int = 1, image_workers: int = 1, debounce: float = 2.0, poll_interval: float = 1.0, use_inotify: bool = True, in_process_marker: bool = True, verbose: int = 0, logger: logging.Logger = None):
+        """
+        Args:
+            input_dir (str): Directory to watch.
+            output_dir (str, optional): Directory for ParsedFiles (and PDFs). Defaults to `input_dir`.
+            marker_path (str, optional): Path to the Marker executable, used when Marker cannot run in-process.
+            model (str): Ollama model to query. Defaults to "llama3.2-vision".
+            qa_evaluator (bool): Whether to enable the QA evaluator. Defaults to False.
+            force_ocr (bool): Whether to force OCR on all pages. Defaults to False.
+            languages (str): Comma-separated OCR languages. Defaults to "en".
+            save_pdfs (bool): Keep the converted PDFs. Defaults to False.
+            ollama_hosts (List[str], optional): Ollama hosts to balance requests across.
+            max_model_calls (int, optional): Maximum concurrent Ollama calls. Defaults to unlimited.
+            keep_alive (str): How long Ollama keeps the model loaded between calls. Defaults to "30m".
+            doc_workers (int): Documents enriched concurrently. Defaults to 1.
+            image_workers (int): Images processed concurrently per document. Defaults to 1.
+            debounce (float): Seconds a file must stay unchanged before it is processed. Defaults to 2.
+            poll_interval (float): Seconds between scans without inotify. Defaults to 1.
+            use_inotify (bool): Use inotify when available. Defaults to True.
+            in_process_marker (bool): Load Marker's models once in this process if Marker is importable. Defaults to True.
+            verbose (int): Verbosity level of the pipeline. Defaults to 0.
+            logger (logging.Logger, optional): Logger instance for logging progress.
+        """
+        from llamarker.scheduler import ModelCallScheduler
+        from llamarker.server import InProcessMarker
+
+        self.input_dir = Path(input_dir).resolve()
+        if not self.input_dir.is_dir():
+            raise FileNotFoundError(f"Input directory not found: {self.input_dir}")
+        self.output_dir = Path(output_dir).resolve() if output_dir else None
+        self.parent_dir = self.output_dir or self.input_dir
+        self.logger = logger or logging.getLogger(__name__)
+        self.marker_path = marker_path
+        self.model = model
+        self.qa_evaluator = qa_evaluator
+        self.force_ocr = force_ocr
+        self.languages = languages
+        self.save_pdfs = save_pdfs
+        self.keep_alive = keep_alive
+        self.doc_workers = doc_workers
+        self.image_workers = image_workers
+        self.verbose = verbose
+
+        # Warm resources shared by all batches
+        self.scheduler = ModelCallScheduler(max_concurrency=max_model_calls, logger=self.logger)
+        self.backend = None
+        if ollama_hosts:
+            from llamarker.ollama_pool import OllamaBackendPool
+            self.backend = OllamaBackendPool(ollama_hosts, logger=self.logger)
+            self.backend.start_health_checks()
+        self.libreoffice_profile = Path(tempfile.mkdtemp(prefix="llamarker_libreoffice_"))
+        self.marker_runner = None
+        if in_process_marker:
+            try:
+                self.marker_runner = InProcessMarker(logger=self.logger)
+            except ImportError:
+                self.logger.info("Marker's Python API is not available; running the Marker executable per batch.")
+
+        self.state_path = self.parent_dir / self.STATE_FILE
+        self.watcher = DirectoryWatcher(
+            self.input_dir,
+            debounce=debounce,
+            poll_interval=poll_interval,
+            exclude=[self.parent_dir / "ParsedFiles", self.parent_dir / "PDFs", self.parent_dir / "profiles"],
+            seen=self._load_state(),
+            use_inotify=use_inotify,
+            logger=self.logger,
+        )
+
+    def _load_state(self) -> Dict[str, Fingerprint]:
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable watch state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self) -> None:
+        """Writes the processed-documents record atomically."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_path.parent, prefix=f"{self.state_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.watcher.seen, f)
+            os.replace(tmp_path, self.state_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def process_batch(self, files: List[Path]) -> List[Path]:
+        """
+        Converts, parses and enriches `files`, adding their results to the output folder.
+
+        Returns:
+            List[Path]: The files that were processed successfully.
+        """
+        from llamarker.main import LlaMarker
+
+        fingerprints = {path: fingerprint(path) for path in files}
+        failed: Set[str] = set()
+
+        def on_progress(stage, document, status, seconds=None):
+            if document and status == "failed":
+                failed.add(document)
+
+        self.logger.info(f"Processing {len(files)} new or modified document(s)")
+        llamarker = LlaMarker(
+            input_dir=str(self.input_dir),
+            output_dir=str(self.output_dir) if self.output_dir else None,
+            save_pdfs=self.save_pdfs,
+            clean_pdfs=False,
+            marker_path=self.marker_path,
+            verbose=self.verbose,
+            logger=self.logger,
+            progress_callback=on_progress,
+            libreoffice_profile=str(self.libreoffice_profile),
+            marker_runner=self.marker_runner,
+            scheduler=self.scheduler,
+            ollama_backend=self.backend,
+        )
+        try:
+            llamarker.process_documents(files)
+            converted = {Path(name).stem for name, _ in llamarker.generate_summary()}
+            if converted:
+                llamarker.parse_with_marker(force_ocr=self.force_ocr, languages=self.languages, clean=False)
+                llamarker.process_subdirectories(model=self.model, qa_evaluator=self.qa_evaluator, workers=self.doc_workers, image_workers=self.image_workers, keep_alive=self.keep_alive)
+        except Exception as e:
+            self.logger.error(f"Batch of {len(files)} document(s) failed: {e}")
+            return []
+        finally:
+            llamarker.results_sink.close()
+            if llamarker.temp_dir.exists():
+                llamarker.file_converter.cleanup()
+
+        succeeded = [path for path in files if path.stem in converted and path.stem not in failed and fingerprints[path]]
+        for path in succeeded:
+            self.watcher.mark_processed(path, fingerprints[path])
+        self._save_state()
+        for path in sorted(set(files) - set(succeeded)):
+            self.logger.warning(f"Could not process {path}; it is retried when modified or on the next start.")
+        return succeeded
+
+    def run(self, stop_event: threading.Event = None, max_batch: int = 50) -> None:
+        """
+        Processes documents as they become ready until `stop_event` is set (or Ctrl+C).
+
+        Args:
+            stop_event (threading.Event, optional): Set to stop watching.
+            max_batch (int): Most documents processed in one batch. Defaults to 50.
+        """
+        from llamarker.server import preload_model
+
+        stop_event = stop_event or threading.Event()
+        preload_model(self.model, self.keep_alive, backend=self.backend, logger=self.logger)
+        self.logger.info(f"Watching {self.input_dir} for documents; results go to {self.parent_dir / 'ParsedFiles'}")
+        while not stop_event.is_set():
+            ready = self.watcher.poll()
+            while ready and not stop_event.is_set():
+                self.process_batch(ready[:max_batch])
+                ready = ready[max_batch:]
+
+    def close(self) -> None:
+        """Releases the watcher and the warm resources."""
+        self.watcher.close()
+        if self.backend:
+            self.backend.stop()
+        shutil.rmtree(self.libreoffice_profile, ignore_errors=True)
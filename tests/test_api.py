@@ -0,0 +1,41 @@
+import io
+import os
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.api import DocumentParser
+
+
+def test_parse_returns_markdown_and_figures_without_output_folders(tmp_path):
+    """Test that bytes and file-like inputs come back as enriched Markdown, leaving no files behind."""
+    [document] = make_corpus(tmp_path / "input", [2])
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            with DocumentParser(model="stub", marker_path=str(tools["marker"]), ollama_hosts=[stub.host], scratch_dir=str(tmp_path / "scratch")) as parser:
+                parsed = parser.parse(document.read_bytes(), document.name)
+                from_stream = parser.parse(io.BytesIO(document.read_bytes()), document.name, enrich=False)
+                upper_case = parser.parse(document.read_bytes(), "REPORT.DOCX", enrich=False)
+                assert list((tmp_path / "scratch").iterdir()) == [parser.scratch_root]
+                assert not parser.scheduler._documents  # Each parse unregisters its document
+                assert not [path for path in parser.scratch_root.iterdir() if path.name.startswith("doc_")]
+            assert not list((tmp_path / "scratch").iterdir())
+    finally:
+        os.chdir(cwd)
+
+    assert parsed["pages"] == 2 and len(parsed["figures"]) == 2
+    assert "Synthetic text for page 2" in parsed["markdown"]
+    assert all(figure["data"].startswith(b"\x89PNG") for figure in parsed["figures"])
+    assert all(figure["extracted_info"] in parsed["markdown"] for figure in parsed["figures"] if figure["contains_info"])
+    assert upper_case["pages"] == 2
+    assert from_stream["figures"] == [] and "![](_page_1_Figure_1.png)" in from_stream["markdown"]
+    assert not (tmp_path / "PDFs").exists() and not (tmp_path / "ParsedFiles").exists()
+
+
+def test_parse_converts_csv_without_marker(tmp_path):
+    """Test that CSV documents are turned into Markdown tables without LibreOffice or Marker."""
+    with DocumentParser(marker_path=str(tmp_path / "missing-marker"), scratch_dir=str(tmp_path / "scratch")) as parser:
+        parsed = parser.parse("a,b\n1,2\n".encode("utf-16"), "table.csv")
+
+    assert parsed["markdown"] == "| a | b |\n| --- | --- |\n| 1 | 2 |\n"
+    assert parsed["pages"] == 1 and parsed["figures"] == []
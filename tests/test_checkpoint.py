@@ -0,0 +1,102 @@
+import os
+import threading
+import pytest
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.checkpoint import CheckpointStore
+from llamarker.img_processor import ImageProcessor
+from llamarker.main import LlaMarker, PipelineCancelled, main
+
+
+def test_checkpoint_store_survives_reopen(tmp_path):
+    """Test that stage and figure records persist and can be reset per document."""
+    store = CheckpointStore(tmp_path / "state.sqlite3")
+    store.complete("a", "convert", pdf="a.pdf", pages=3)
+    store.record_figure("a", {"image": "_page_0_Figure_1.png", "contains_info": True})
+    store.complete("b", "convert", pdf="b.pdf", pages=1)
+    store.close()
+
+    store = CheckpointStore(tmp_path / "state.sqlite3")
+    assert store.stage("a", "convert") == {"pdf": "a.pdf", "pages": 3}
+    assert store.is_done("a", "convert") and not store.is_done("a", "marker")
+    assert list(store.figures("a")) == ["_page_0_Figure_1.png"]
+    store.reset("a")
+    assert store.stage("a", "convert") is None and store.figures("a") == {}
+    assert store.is_done("b", "convert")
+    store.close()
+
+
+def test_reused_figures_count_as_cache_hits(tmp_path):
+    """Test that figures taken from the checkpoint are counted as cache hits instead of calling the model."""
+    (tmp_path / "doc").mkdir()
+    (tmp_path / "doc" / "doc.md").write_text("![](_page_0_Figure_1.png)\n", encoding="utf-8")
+    (tmp_path / "doc" / "_page_0_Figure_1.png").write_bytes(b"png")
+    store = CheckpointStore(tmp_path / "state.sqlite3")
+    store.record_figure("doc", {"image": "_page_0_Figure_1.png", "contains_info": False})
+
+    processor = ImageProcessor(folder_path=str(tmp_path / "doc"), checkpoint=store)
+    processor.process_images()
+
+    assert processor.cache_hits == 1 and list(processor.results) == [{"image": "_page_0_Figure_1.png", "contains_info": False}]
+    store.close()
+
+
+def test_resume_skips_finished_documents(tmp_path):
+    """Test that a resumed run reuses conversions and parses and enriches only unfinished documents."""
+    make_corpus(tmp_path / "input", [1, 1, 1])
+    cancel_event = threading.Event()
+    events = []
+
+    def on_progress(stage, document, status, seconds):
+        events.append((stage, document, status, seconds))
+        if stage == "enrich" and status == "done" and document:
+            cancel_event.set()  # Simulate a crash after the first document
+
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            options = dict(input_dir=str(tmp_path / "input"), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host], progress_callback=on_progress)
+            llamarker = LlaMarker(checkpoint=True, cancel_event=cancel_event, **options)
+            llamarker.process_documents()
+            llamarker.parse_with_marker(workers=1)
+            with pytest.raises(PipelineCancelled):
+                llamarker.process_subdirectories(model="stub", qa_evaluator=False)
+            finished = [document for stage, document, status, _ in events if stage == "enrich" and status == "done" and document]
+            assert len(finished) == 1
+            assert (tmp_path / "output" / ".llamarker_checkpoint" / "pdfs").is_dir()
+
+            events.clear()
+            resumed = LlaMarker(resume=True, **options)
+            resumed.process_documents()
+            resumed.parse_with_marker(workers=1)
+            resumed.process_subdirectories(model="stub", qa_evaluator=False)
+    finally:
+        os.chdir(cwd)
+
+    assert sorted(document for stage, document, status, seconds in events if stage == "convert" and document and seconds == 0.0) == ["doc_0000", "doc_0001", "doc_0002"]
+    assert sorted(document for stage, document, status, _ in events if stage == "enrich" and status == "done" and document) == sorted({"doc_0000", "doc_0001", "doc_0002"} - set(finished))
+    assert sorted(path.name for path in (tmp_path / "output" / "ParsedFiles").glob("*.md")) == ["doc_0000.md", "doc_0001.md", "doc_0002.md"]
+    assert not (tmp_path / "output" / ".llamarker_checkpoint").exists()
+
+
+def test_cli_checkpoints_only_when_asked(tmp_path, monkeypatch):
+    """Test that a plain CLI run leaves no checkpoint or PDFs next to its outputs, and --checkpoint cleans up after a complete run."""
+    make_corpus(tmp_path / "input", [1])
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            argv = ["llamarker", "--directory", str(tmp_path / "input"), "--marker_path", str(tools["marker"]), "--ollama_hosts", stub.host, "--model", "stub"]
+            monkeypatch.setattr("sys.argv", argv)
+            assert not main()
+            # Without --output the results go next to the inputs, but nothing else does
+            assert sorted(path.name for path in (tmp_path / "input").iterdir()) == ["ParsedFiles", "doc_0000.docx"]
+
+            monkeypatch.setattr("sys.argv", argv + ["--checkpoint"])
+            assert not main()
+    finally:
+        os.chdir(cwd)
+
+    assert (tmp_path / "input" / "ParsedFiles" / "doc_0000.md").exists()
+    assert not (tmp_path / "input" / ".llamarker_checkpoint").exists()
@@ -0,0 +1,70 @@
+import json
+import os
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.chunking import chunk_markdown
+from llamarker.main import LlaMarker
+
+SEPARATOR = "-" * 48
+MARKDOWN = f"""{{0}}{SEPARATOR}
+
+# Report
+
+## Intro
+
+First paragraph of the introduction.
+
+![](_page_0_Figure_1.png)
+
+![](_page_0_Picture_2.png)
+
+{{1}}{SEPARATOR}
+
+## Results
+
+{"Measured values are stable. " * 20}
+"""
+FIGURES = {
+    "_page_0_Figure_1.png": {"image": "_page_0_Figure_1.png", "contains_info": True, "new_image_path": "pics/report_page_0_Figure_1.png", "extracted_info": "Bar chart of revenue."},
+    "_page_0_Picture_2.png": {"image": "_page_0_Picture_2.png", "contains_info": False, "new_image_path": "_page_0_Picture_2.png", "extracted_info": "N/A"},
+}
+
+
+def test_chunks_carry_pages_sections_and_figures():
+    """Test that chunks respect the size, overlap into each other and carry page range, heading and figure text."""
+    chunks = list(chunk_markdown(MARKDOWN.splitlines(True), FIGURES, chunk_size=250, overlap=40))
+    assert [chunk["chunk"] for chunk in chunks] == list(range(len(chunks)))
+    assert all(len(chunk["text"]) <= 250 + 40 for chunk in chunks)
+
+    first = chunks[0]
+    assert (first["page_start"], first["page_end"], first["heading"]) == (1, 1, "Report")
+    assert "Bar chart of revenue." in first["text"] and "![](" not in first["text"]
+    assert first["figures"] == [{"image": "_page_0_Figure_1.png", "path": "pics/report_page_0_Figure_1.png", "text": "Bar chart of revenue."}]
+
+    results = [chunk for chunk in chunks if chunk["heading"] == "Results"]
+    assert len(results) >= 2 and results[0]["section_path"] == ["Report", "Results"]
+    assert all(chunk["page_start"] == 2 for chunk in results)
+    # The end of each chunk is repeated at the start of the next
+    assert results[1]["text"].split()[0] in results[0]["text"]
+
+
+def test_pipeline_streams_chunks_per_document(tmp_path):
+    """Test that the pipeline writes chunk records with source files and page ranges for every document."""
+    make_corpus(tmp_path / "input", [2, 1])
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            llamarker = LlaMarker(input_dir=str(tmp_path / "input"), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host], chunk_file=str(tmp_path / "chunks.jsonl"), chunk_size=100, chunk_overlap=0)
+            llamarker.process_documents()
+            llamarker.parse_with_marker(workers=1)
+            llamarker.process_subdirectories(model="stub", qa_evaluator=False)
+            llamarker.chunk_sink.close()
+    finally:
+        os.chdir(cwd)
+
+    records = [json.loads(line) for line in (tmp_path / "chunks.jsonl").read_text().splitlines()]
+    assert {record["document"] for record in records} == {"doc_0000", "doc_0001"}
+    assert {record["source"] for record in records} == {str(tmp_path / "input" / "doc_0000.docx"), str(tmp_path / "input" / "doc_0001.docx")}
+    assert max(record["page_end"] for record in records if record["document"] == "doc_0000") == 2
+    assert any(record["figures"] for record in records)
@@ -0,0 +1,66 @@
+import pytest
+import logging
+from llamarker.img_processor import ImageProcessor
+
+
+@pytest.fixture(scope="session")
+def logger():
+    """Fixture to configure and return a logger for testing."""
+    logger = logging.getLogger("LlaMarkerTest")
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+@pytest.fixture
+def parsed_doc_dir(tmp_path):
+    """Fixture to create a Marker-style output folder with a Markdown file and two images."""
+    doc_dir = tmp_path / "ParsedFiles" / "report"
+    doc_dir.mkdir(parents=True)
+    (doc_dir / "report.md").write_text(
+        "# Report\n"
+        "Intro text.\n"
+        "![](_page_0_Figure_1.png)\n"
+        "Middle ![](_page_1_Picture_2.png) text.\n"
+        "![](unknown.png)\n",
+        encoding="utf-8",
+    )
+    (doc_dir / "_page_0_Figure_1.png").write_bytes(b"png")
+    (doc_dir / "_page_1_Picture_2.png").write_bytes(b"png")
+    return doc_dir
+
+
+def test_update_markdown_rewrites_references(parsed_doc_dir, logger):
+    """Test that image references are replaced or removed in a single pass."""
+    processor = ImageProcessor(folder_path=str(parsed_doc_dir), logger=logger)
+    new_image_path = parsed_doc_dir.parent / "pics" / "report_page_0_Figure_1.png"
+    processor.results.extend([
+        processor.create_result(parsed_doc_dir / "_page_0_Figure_1.png", new_image_path, False, True, "Extracted table"),
+        processor.create_result(parsed_doc_dir / "_page_1_Picture_2.png", parsed_doc_dir / "_page_1_Picture_2.png", True, False, "N/A"),
+    ])
+
+    processor.update_markdown()
+
+    updated_file = parsed_doc_dir.parent / "report.md"
+    content = updated_file.read_text(encoding="utf-8")
+    assert "![](_page_0_Figure_1.png)" not in content
+    assert "Extracted table" in content
+    assert "Middle  text." in content
+    assert "![](unknown.png)" in content  # References without results are left untouched
+    assert not parsed_doc_dir.exists()
+    assert not list(updated_file.parent.glob(".*.tmp"))
+
+
+def test_update_markdown_keeps_target_on_failure(parsed_doc_dir, logger, monkeypatch):
+    """Test that a failed rewrite leaves no partial output behind."""
+    processor = ImageProcessor(folder_path=str(parsed_doc_dir), logger=logger)
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("llamarker.img_processor.os.replace", failing_replace)
+    with pytest.raises(OSError):
+        processor.update_markdown()
+
+    assert not (parsed_doc_dir.parent / "report.md").exists()
+    assert not list(parsed_doc_dir.parent.glob(".*.tmp"))
+    assert parsed_doc_dir.exists()
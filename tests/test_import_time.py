@@ -0,0 +1,30 @@
+from benchmarks.import_time import check, measure_import
+
+
+def test_cli_import_does_not_load_heavy_dependencies():
+    """Test that importing the CLI module does not load pypdf, matplotlib, ollama, pydantic or streamlit."""
+    results = measure_import("llamarker.main")
+
+    assert results["heavy_modules"] == []
+    assert results["total_ms"] > 0
+    assert any(name == "llamarker.scheduler" for name, _ in results["top_imports"])
+
+
+def test_package_exports_load_lazily():
+    """Test that `import llamarker` stays light while its classes remain importable from the package."""
+    assert measure_import("llamarker")["heavy_modules"] == []
+
+    from llamarker import LlaMarker
+    from llamarker.main import LlaMarker as MainLlaMarker
+    assert LlaMarker is MainLlaMarker
+
+
+def test_check_reports_budget_and_heavy_modules():
+    """Test that exceeding the budget and loading heavy modules are both reported."""
+    results = {"module": "llamarker.main", "total_ms": 250.0, "top_imports": [], "heavy_modules": ["matplotlib"]}
+
+    problems = check(results, budget_ms=200.0)
+
+    assert len(problems) == 2
+    assert "250.0 ms" in problems[0] and "'matplotlib'" in problems[1]
+    assert check(dict(results, total_ms=50.0, heavy_modules=[]), budget_ms=200.0) == []
@@ -0,0 +1,73 @@
+import io
+import zipfile
+import pytest
+from llamarker.ingest import extract_zip, ingest_uploads, save_upload
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return path
+
+
+class Upload(io.BytesIO):
+    """Stand-in for Streamlit's UploadedFile."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+def test_save_upload_writes_in_chunks(tmp_path):
+    """Test that uploads are copied to disk in full, even from a partly read buffer, and names lose directory parts."""
+    upload = Upload("../report.docx", b"x" * 2500)
+    upload.read(100)
+
+    file_path = save_upload(upload, upload.name, tmp_path, chunk_size=1000)
+
+    assert file_path == tmp_path / "report.docx"
+    assert file_path.read_bytes() == b"x" * 2500
+
+
+def test_extract_zip_yields_documents_as_they_land(tmp_path):
+    """Test that supported members are yielded one at a time, while unsupported and escaping members are skipped."""
+    archive = make_zip(tmp_path / "docs.zip", {"a.docx": b"a", "sub/b.pdf": b"bb", "notes.exe": b"x", "../evil.txt": b"x"})
+    dest = tmp_path / "out"
+    dest.mkdir()
+
+    extracted = extract_zip(archive, dest)
+    first = next(extracted)
+    assert first == (dest / "a.docx").resolve() and first.read_bytes() == b"a"
+    assert not (dest / "sub" / "b.pdf").exists()  # Not extracted until requested
+
+    assert list(extracted) == [(dest / "sub" / "b.pdf").resolve()]
+    assert not (tmp_path / "evil.txt").exists()
+    assert not (dest / "notes.exe").exists()
+
+
+def test_extract_zip_enforces_limits(tmp_path):
+    """Test that the member count and size limits stop the extraction."""
+    archive = make_zip(tmp_path / "docs.zip", {"a.txt": b"a" * 100, "b.txt": b"b" * 100, "c.txt": b"c" * 100})
+
+    with pytest.raises(ValueError, match="more than 2 documents"):
+        list(extract_zip(archive, tmp_path / "count", max_members=2))
+    with pytest.raises(ValueError, match="larger than 50 bytes"):
+        list(extract_zip(archive, tmp_path / "member", max_member_bytes=50))
+    with pytest.raises(ValueError, match="size limit"):
+        list(extract_zip(archive, tmp_path / "total", max_total_bytes=250, chunk_size=10))
+    # The partly written member is removed
+    assert sorted(path.name for path in (tmp_path / "total").iterdir()) == ["a.txt", "b.txt"]
+
+
+def test_ingest_uploads_extracts_and_removes_zips(tmp_path):
+    """Test that plain uploads and ZIP members are all yielded, and the ZIP itself is deleted."""
+    archive = make_zip(tmp_path / "bundle.zip", {"b.docx": b"b"})
+    uploads = [Upload("a.pdf", b"a"), Upload("bundle.zip", archive.read_bytes()), Upload("c.png", b"c")]
+    dest = tmp_path / "uploads"
+    dest.mkdir()
+
+    files = list(ingest_uploads(uploads, dest))
+
+    assert [path.name for path in files] == ["a.pdf", "b.docx"]
+    assert not (dest / "bundle.zip").exists()
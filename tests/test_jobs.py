@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+import pytest
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.jobs import JobManager
+from llamarker.main import LlaMarker, PipelineCancelled
+
+
+def wait(job, timeout=10.0):
+    """Waits until the job has ended."""
+    for _ in range(int(timeout / 0.01)):
+        if not job.active:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job.id} did not finish")
+
+
+def test_job_reports_progress_and_outcome():
+    """Test that jobs record stage and document progress and end as done, failed or cancelled."""
+    manager = JobManager()
+    release = threading.Event()
+
+    def target(job):
+        job.on_progress("convert", None, "running")
+        job.on_progress("enrich", "a", "done", 1.234)
+        release.wait()
+
+    job = manager.submit(target, description="a.docx")
+    job.on_progress("enrich", "b", "done", 2.0)
+    release.set()
+    wait(job)
+    assert job.status == "done"
+    assert job.snapshot()["stages"]["convert"]["status"] == "running"
+    assert job.snapshot()["documents"]["a"]["enrich"]["seconds"] == 1.23
+    assert set(job.finished_documents()) == {"a", "b"}
+
+    failed = manager.submit(lambda job: 1 / 0)
+    wait(failed)
+    assert failed.status == "failed" and "division by zero" in failed.error
+
+    def cancellable(job):
+        while True:
+            if job.cancel_event.wait(0.01):
+                raise PipelineCancelled("stop")
+
+    cancelled = manager.submit(cancellable)
+    assert manager.cancel(cancelled.id)
+    wait(cancelled)
+    assert cancelled.status == "cancelled"
+    assert not manager.cancel(cancelled.id)
+    manager.shutdown()
+
+
+def test_pipeline_progress_and_cancellation(tmp_path):
+    """Test that LlaMarker reports per-document progress and stops at the next document once cancelled."""
+    make_corpus(tmp_path / "input", [1, 1, 1])
+    events = []
+    cancel_event = threading.Event()
+
+    def on_progress(stage, document, status, seconds):
+        events.append((stage, document, status))
+        if stage == "enrich" and status == "done" and document:
+            cancel_event.set()
+
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            llamarker = LlaMarker(input_dir=str(tmp_path / "input"), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host], progress_callback=on_progress, cancel_event=cancel_event)
+            llamarker.process_documents()
+            llamarker.parse_with_marker(workers=1)
+            with pytest.raises(PipelineCancelled):
+                llamarker.process_subdirectories(model="stub", qa_evaluator=False)
+    finally:
+        os.chdir(cwd)
+
+    assert sorted(document for stage, document, status in events if stage == "convert" and status == "done" and document) == ["doc_0000", "doc_0001", "doc_0002"]
+    assert ("marker", None, "done") in events
+    assert [status for stage, document, status in events if stage == "enrich" and document].count("done") == 1
+    assert ("enrich", None, "done") not in events
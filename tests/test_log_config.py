@@ -0,0 +1,61 @@
+import json
+import logging
+from llamarker.img_processor import ImageProcessor
+from llamarker.log_config import BoundedQueueHandler, ResultsSink, configure_logging, shutdown_logging
+
+
+def test_logging_is_configured_once_and_rotates(tmp_path):
+    """Test that repeated configuration reuses one queue handler and that the log file is size-capped."""
+    root = logging.getLogger()
+    level = root.level
+    shutdown_logging()  # Start from a clean process state, e.g. after a pipeline run in another test
+    try:
+        log_file = configure_logging(logging.INFO, log_dir=str(tmp_path), max_bytes=2000, backup_count=2)
+        assert configure_logging(logging.DEBUG, log_dir=str(tmp_path / "other")) == log_file
+        assert sum(isinstance(handler, BoundedQueueHandler) for handler in root.handlers) == 1
+        assert root.level == logging.DEBUG
+
+        for i in range(200):
+            logging.getLogger("llamarker.test").warning(f"record {i:03d}")
+    finally:
+        shutdown_logging()
+        root.setLevel(level)
+
+    assert not any(isinstance(handler, BoundedQueueHandler) for handler in root.handlers)
+    assert "record 199" in log_file.read_text()
+    assert all(path.stat().st_size <= 2000 for path in tmp_path.glob("llamarker_*.log*"))
+    assert len(list(tmp_path.glob("llamarker_*.log*"))) == 3
+
+
+def test_full_queue_drops_only_low_priority_records():
+    """Test that a full queue drops info records without blocking, while warnings would wait for room."""
+    import queue
+    handler = BoundedQueueHandler(queue.Queue(maxsize=1))
+    handler.enqueue(logging.makeLogRecord({"levelno": logging.INFO, "msg": "first"}))
+    handler.enqueue(logging.makeLogRecord({"levelno": logging.INFO, "msg": "second"}))
+
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().msg == "first"
+
+
+def test_summary_sends_extracted_text_to_results_sink(tmp_path, caplog):
+    """Test that summarize_results keeps extracted text out of the log and writes it to the results sink."""
+    doc_dir = tmp_path / "doc"
+    doc_dir.mkdir()
+    (doc_dir / "doc.md").write_text("![](a.png)\n")
+    sink = ResultsSink(str(tmp_path / "results.jsonl"))
+    processor = ImageProcessor(folder_path=str(doc_dir), results_sink=sink)
+    processor.results.append(
+        processor.create_result(old_image_path=doc_dir / "a.png", new_image_path=tmp_path / "pics" / "a.png", is_logo=False, contains_info=True, extracted_info="secret figure text " * 100),
+    )
+
+    with caplog.at_level(logging.DEBUG):
+        processor.summarize_results()
+    sink.close()
+
+    assert "secret figure text" not in caplog.text
+    assert "1 images, 0 logos, 1 with extracted information" in caplog.text
+    records = [json.loads(line) for line in (tmp_path / "results.jsonl").read_text().splitlines()]
+    assert records[0]["document"] == "doc"
+    assert records[0]["extracted_info"].startswith("secret figure text")
+    assert processor.results[0]["extracted_info"] == records[0]["extracted_info"]  # Summarising leaves the results intact
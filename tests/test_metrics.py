@@ -0,0 +1,49 @@
+import pytest
+import json
+from llamarker.metrics import MetricsRecorder, NullMetrics
+
+
+def test_measure_writes_jsonl_and_prometheus(tmp_path):
+    """Test that measured records are written as JSONL and summed into the Prometheus textfile."""
+    metrics = MetricsRecorder(str(tmp_path), run_id="run-1")
+    for name in ("a.docx", "b.docx"):
+        with metrics.measure("document", "convert", document=name) as record:
+            record["pages"] = 3
+            record["bytes_in"] = 100
+    with metrics.measure("model_call", "enrich", document="a", role="Translator") as record:
+        record["retries"] = 1
+    metrics.close()
+
+    records = [json.loads(line) for line in (tmp_path / "metrics.jsonl").read_text().splitlines()]
+    assert [r["document"] for r in records] == ["a.docx", "b.docx", "a"]
+    assert all(r["run_id"] == "run-1" and r["status"] == "ok" for r in records)
+    assert all(r["wall_s"] >= 0 and r["cpu_s"] >= 0 for r in records)
+
+    prom = (tmp_path / "llamarker.prom").read_text()
+    assert 'llamarker_pages_total{kind="document",stage="convert"} 6' in prom
+    assert 'llamarker_count_total{kind="document",stage="convert"} 2' in prom
+    assert 'llamarker_retries_total{kind="model_call",stage="enrich",role="Translator"} 1' in prom
+    assert "# TYPE llamarker_wall_s_total counter" in prom
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_measure_marks_errors(tmp_path):
+    """Test that a failing block is recorded with error status and re-raised."""
+    metrics = MetricsRecorder(str(tmp_path))
+    with pytest.raises(RuntimeError):
+        with metrics.measure("stage", "marker"):
+            raise RuntimeError("marker failed")
+    metrics.close()
+
+    record = json.loads((tmp_path / "metrics.jsonl").read_text())
+    assert record["status"] == "error"
+    assert 'llamarker_errors_total{kind="stage",stage="marker"} 1' in (tmp_path / "llamarker.prom").read_text()
+
+
+def test_null_metrics_records_nothing(tmp_path):
+    """Test that the disabled recorder accepts the same calls without writing anything."""
+    metrics = NullMetrics()
+    with metrics.measure("stage", "convert") as record:
+        record["pages"] = 1
+    metrics.close()
+    assert not list(tmp_path.iterdir())
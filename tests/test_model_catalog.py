@@ -0,0 +1,122 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from llamarker.model_catalog import ModelCatalog
+
+
+class FakeClient:
+    """Minimal stand-in for `ollama.Client`."""
+
+    def __init__(self, models):
+        self.models = dict(models)
+        self.list_calls = 0
+        self.show_calls = 0
+        self.fail = False
+
+    def list(self):
+        self.list_calls += 1
+        if self.fail:
+            raise ConnectionError("Ollama is busy")
+        return SimpleNamespace(models=[SimpleNamespace(model=name, digest=digest) for name, digest in self.models.items()])
+
+    def show(self, model):
+        self.show_calls += 1
+        details = SimpleNamespace(family="mllama", families=["mllama"], parameter_size="11B", quantization_level="Q4_K_M")
+        return SimpleNamespace(details=details, capabilities=["completion"])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_model_list_is_cached_and_expires():
+    """Test that the list is reused within the TTL and picks up pulled and removed models afterwards."""
+    client, clock = FakeClient({"llama3.2-vision:latest": "a", "qwen2.5:7b": "b"}), Clock()
+    catalog = ModelCatalog(client=client, list_ttl=30.0, clock=clock)
+
+    assert catalog.vision_models() == ["llama3.2-vision:latest"]
+    client.models = {"llava:13b": "c"}
+    clock.now = 10.0
+    assert catalog.vision_models() == ["llama3.2-vision:latest"]
+    assert client.list_calls == 1
+
+    clock.now = 31.0
+    assert catalog.vision_models() == ["llava:13b"]
+    client.models["moondream:latest"] = "d"
+    catalog.refresh()
+    assert catalog.vision_models() == ["llava:13b", "moondream:latest"]
+    assert client.list_calls == 3
+
+
+def test_stale_list_is_served_while_ollama_fails():
+    """Test that a failing list call falls back to the cached list and is reported, and raises without a cache."""
+    client, clock = FakeClient({"llava:latest": "a"}), Clock()
+    catalog = ModelCatalog(client=client, list_ttl=1.0, clock=clock)
+    catalog.models()
+
+    client.fail = True
+    clock.now = 5.0
+    assert catalog.vision_models() == ["llava:latest"]
+    assert catalog.last_error == "Ollama is busy"
+
+    # A refresh while Ollama is down keeps the list
+    assert catalog.refresh() == {"llava:latest": "a"}
+    assert catalog.vision_models() == ["llava:latest"]
+
+    client.fail = False
+    clock.now = 10.0
+    catalog.models()
+    assert catalog.last_error is None
+
+    with pytest.raises(ConnectionError):
+        failing = FakeClient({})
+        failing.fail = True
+        ModelCatalog(client=failing).models()
+
+
+def test_capabilities_are_cached_per_digest():
+    """Test that model metadata is fetched once per model version."""
+    client, clock = FakeClient({"llama3.2-vision:latest": "a"}), Clock()
+    catalog = ModelCatalog(client=client, list_ttl=1.0, clock=clock)
+
+    info = catalog.capabilities("llama3.2-vision:latest")
+    catalog.capabilities("llama3.2-vision:latest")
+    assert client.show_calls == 1
+    assert info["vision"] and info["parameter_size"] == "11B"
+
+    # Re-pulled model: new digest, new lookup
+    client.models["llama3.2-vision:latest"] = "b"
+    clock.now = 2.0
+    catalog.capabilities("llama3.2-vision:latest")
+    assert client.show_calls == 2
+
+
+def test_slow_list_call_does_not_block_other_callers():
+    """Test that while one caller waits for Ollama, the others are served the cached list without waiting."""
+    client, clock = FakeClient({"llava:latest": "a"}), Clock()
+    catalog = ModelCatalog(client=client, list_ttl=1.0, clock=clock)
+    catalog.models()
+
+    started, release = threading.Event(), threading.Event()
+    list_models = client.list
+
+    def slow_list():
+        started.set()
+        release.wait(5)
+        return list_models()
+
+    client.list = slow_list
+    client.models["moondream:latest"] = "b"
+    clock.now = 5.0
+    refresher = threading.Thread(target=catalog.refresh)
+    refresher.start()
+    assert started.wait(5)
+    assert catalog.vision_models() == ["llava:latest"]
+
+    release.set()
+    refresher.join(5)
+    assert catalog.vision_models() == ["llava:latest", "moondream:latest"]
@@ -0,0 +1,141 @@
+import pytest
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from llamarker.ollama_pool import OllamaBackendPool, parse_hosts, percentile
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Minimal handler speaking the parts of the Ollama API used by the pool."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.server.failing:
+            self._send_json(500, {"error": "unavailable"})
+        else:
+            self._send_json(200, {"models": []})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.failing:
+            self._send_json(500, {"error": "unavailable"})
+            return
+        time.sleep(self.server.delay)
+        self.server.hits += 1
+        self._send_json(200, {
+            "model": "stub",
+            "created_at": "2025-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": json.dumps({"host": self.server.name})},
+            "done": True,
+        })
+
+
+@pytest.fixture
+def stub_servers():
+    """Fixture to start three local stub Ollama servers."""
+    servers = []
+    for i in range(3):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+        server.name = f"stub-{i}"
+        server.failing = False
+        server.delay = 0.0
+        server.hits = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def host_of(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def chat(pool):
+    return pool.chat(model="stub", messages=[{"role": "user", "content": "hi"}], format="json")
+
+
+def test_requests_are_spread_across_endpoints(stub_servers):
+    """Test that sequential requests are balanced over all endpoints."""
+    pool = OllamaBackendPool([host_of(s) for s in stub_servers])
+    for _ in range(9):
+        chat(pool)
+
+    assert [s.hits for s in stub_servers] == [3, 3, 3]
+    assert all(m["requests"] == 3 and m["errors"] == 0 for m in pool.metrics())
+
+
+def test_least_outstanding_endpoint_is_preferred(stub_servers):
+    """Test that a slow endpoint receives fewer concurrent requests."""
+    stub_servers[0].delay = 0.5
+    pool = OllamaBackendPool([host_of(s) for s in stub_servers])
+
+    threads = [threading.Thread(target=chat, args=(pool,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    assert stub_servers[0].hits == 1
+    assert stub_servers[1].hits + stub_servers[2].hits == 5
+
+
+def test_failing_endpoint_is_ejected_and_reinstated(stub_servers):
+    """Test that an endpoint is ejected after repeated failures and reinstated by a health check."""
+    stub_servers[1].failing = True
+    pool = OllamaBackendPool([host_of(s) for s in stub_servers], max_failures=2)
+
+    failures = 0
+    for _ in range(12):
+        try:
+            chat(pool)
+        except Exception:
+            failures += 1
+
+    metrics = {m["host"]: m for m in pool.metrics()}
+    failing = metrics[host_of(stub_servers[1])]
+    assert failures == 2
+    assert not failing["healthy"]
+    assert failing["errors"] == 2 and failing["ejections"] == 1
+
+    stub_servers[1].failing = False
+    pool.check_health()
+    assert all(m["healthy"] for m in pool.metrics())
+
+
+def test_all_endpoints_down_raises(stub_servers):
+    """Test that an error is raised when no endpoint is healthy."""
+    for server in stub_servers:
+        server.failing = True
+    pool = OllamaBackendPool([host_of(s) for s in stub_servers])
+    pool.check_health()
+
+    with pytest.raises(RuntimeError, match="No healthy Ollama endpoints"):
+        chat(pool)
+
+
+def test_percentile():
+    """Test nearest-rank percentile computation."""
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile([], 95) == 0.0
+
+
+def test_parse_hosts_strips_whitespace_and_empty_entries():
+    """Test that a comma-separated host list tolerates spaces and stray commas."""
+    assert parse_hosts("http://a:11434, http://b:11434,,") == ["http://a:11434", "http://b:11434"]
+    assert parse_hosts(" , ") is None and parse_hosts(None) is None
@@ -0,0 +1,46 @@
+import copy
+from benchmarks.pipeline_benchmark import compare, run_benchmark
+
+CONFIG = {
+    "documents": 2,
+    "pages": 2,
+    "figures_per_page": 1,
+    "soffice_latency": 0.0,
+    "marker_latency": 0.0,
+    "model_latency": 0.0,
+    "marker_workers": 1,
+    "doc_workers": 1,
+    "image_workers": 1,
+    "qa_evaluator": False,
+}
+
+
+def test_pipeline_runs_against_fake_tools():
+    """Test that the whole pipeline runs end-to-end against the fake tools and stub Ollama server."""
+    results = run_benchmark(dict(CONFIG))
+
+    assert set(results["stages"]) == {"convert", "marker", "enrich"}
+    assert results["stages"]["enrich"]["figures_per_s"] > 0
+    # Every figure is extracted once and translated once
+    assert results["model_requests"] == 2 * 2 * 2
+    assert compare(results, results, tolerance=0.0) == []
+
+
+def test_compare_flags_throughput_and_memory_regressions():
+    """Test that slower stages and higher peak RSS are reported as regressions."""
+    stage = {"seconds": 1.0, "documents_per_s": 10.0, "pages_per_s": 20.0, "figures_per_s": 20.0}
+    baseline = {
+        "config": CONFIG,
+        "stages": {"marker": dict(stage)},
+        "total": dict(stage),
+        "peak_rss_mb": {"self": 100.0, "children": 50.0},
+    }
+    results = copy.deepcopy(baseline)
+    results["stages"]["marker"]["pages_per_s"] = 10.0
+    results["peak_rss_mb"]["self"] = 150.0
+
+    regressions = compare(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("marker: pages_per_s")
+    assert "peak RSS" in regressions[1]
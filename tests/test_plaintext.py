@@ -0,0 +1,96 @@
+import os
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.main import LlaMarker
+from llamarker.plaintext import csv_to_markdown, detect_encoding, text_to_markdown
+
+
+def test_encodings_are_detected_and_csv_becomes_tables(tmp_path):
+    """Test encoding detection and that CSV rows stream into Markdown tables with escaped cells."""
+    (tmp_path / "utf8.txt").write_text("Grüße\n", encoding="utf-8")
+    (tmp_path / "utf16.txt").write_text("Grüße\n", encoding="utf-16")
+    (tmp_path / "legacy.txt").write_bytes("Grüße – café\n".encode("cp1252"))
+    assert detect_encoding(tmp_path / "utf8.txt") == "utf-8"
+    assert detect_encoding(tmp_path / "utf16.txt") == "utf-16"
+    assert detect_encoding(tmp_path / "legacy.txt") in ("cp1252", "windows-1252")
+
+    assert text_to_markdown(tmp_path / "legacy.txt", tmp_path / "legacy.md") == 1
+    assert (tmp_path / "legacy.md").read_text(encoding="utf-8") == "Grüße – café\n"
+
+    (tmp_path / "table.csv").write_bytes("name;note\nA;x|y\nB;\"two\nlines\"\nC\nD;1;2\n".encode("cp1252"))
+    assert csv_to_markdown(tmp_path / "table.csv", tmp_path / "table.md", rows_per_table=3) == 1
+    assert (tmp_path / "table.md").read_text(encoding="utf-8").splitlines() == [
+        "| name | note |",
+        "| --- | --- |",
+        "| A | x\\|y |",
+        "| B | two<br>lines |",
+        "| C |  |",
+        "",
+        "| name | note |",
+        "| --- | --- |",
+        "| D | 1, 2 |",
+    ]
+
+
+def test_pipeline_converts_text_and_csv_without_pdfs(tmp_path):
+    """Test that .txt and .csv inputs bypass LibreOffice and Marker unless the PDF path is forced."""
+    input_dir = tmp_path / "input"
+    make_corpus(input_dir, [2])
+    (input_dir / "notes.txt").write_text("First line\nSecond line\n", encoding="utf-16")
+    (input_dir / "prices.csv").write_text("item,price\napple,1\n", encoding="utf-8")
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            llamarker = LlaMarker(input_dir=str(input_dir), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host], checkpoint=True)
+            llamarker.process_documents()
+            assert [pdf.name for pdf in llamarker.temp_dir.glob("*.pdf")] == ["doc_0000.pdf"]
+            assert sorted(llamarker._page_counts(["doc_0000", "notes", "prices", "missing"]).items()) == [("doc_0000", 2), ("notes", 1), ("prices", 1)]
+
+            llamarker.parse_with_marker(workers=1)
+            assert llamarker.checkpoint.is_done("notes", "marker")
+            llamarker.process_subdirectories(model="stub", qa_evaluator=False)
+            llamarker.results_sink.close()
+
+            via_pdf = LlaMarker(input_dir=str(input_dir), output_dir=str(tmp_path / "via_pdf"), marker_path=str(tools["marker"]), direct_text=False)
+            via_pdf.process_documents()
+            assert sorted(pdf.name for pdf in via_pdf.temp_dir.glob("*.pdf")) == ["doc_0000.pdf", "notes.pdf", "prices.pdf"]
+    finally:
+        os.chdir(cwd)
+
+    parsed = tmp_path / "output" / "ParsedFiles"
+    assert (parsed / "notes.md").read_text(encoding="utf-8") == "First line\nSecond line\n"
+    assert "| apple | 1 |" in (parsed / "prices.md").read_text(encoding="utf-8")
+    assert "Synthetic text for page 2" in (parsed / "doc_0000.md").read_text(encoding="utf-8")
+
+
+def test_resume_reuses_direct_conversions(tmp_path):
+    """Test that direct conversions are checkpointed without a PDF and reused on resume, before and after Marker."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "notes.txt").write_text("Only line\n", encoding="utf-8")
+    events = []
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            options = dict(input_dir=str(input_dir), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host], progress_callback=lambda *event: events.append(event))
+            llamarker = LlaMarker(checkpoint=True, **options)
+            llamarker.process_documents()
+            recorded = llamarker.checkpoint.stage("notes", "convert")
+            assert recorded["pdf"] is None and recorded["direct"]
+
+            # Resumed once while the Markdown still waits for ParsedFiles, once after it was moved there
+            for _ in range(2):
+                events.clear()
+                resumed = LlaMarker(resume=True, **options)
+                resumed.process_documents()
+                assert ("convert", "notes", "done", 0.0) in events
+                resumed.parse_with_marker(workers=1)
+                assert resumed.checkpoint.is_done("notes", "marker")
+            resumed.process_subdirectories(model="stub", qa_evaluator=False)
+            resumed.results_sink.close()
+    finally:
+        os.chdir(cwd)
+
+    assert (tmp_path / "output" / "ParsedFiles" / "notes.md").read_text(encoding="utf-8") == "Only line\n"
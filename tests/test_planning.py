@@ -0,0 +1,53 @@
+import os
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.schedule_benchmark import predicted_makespan, run_benchmark, skewed_page_counts
+from llamarker.main import LlaMarker
+from llamarker.planning import longest_first, lpt_gain, makespan, partition
+
+
+def test_longest_first_partition_balances_workers():
+    """Test that LPT ordering spreads a skewed set of jobs evenly and beats discovery order."""
+    costs = [1, 1, 1, 1, 1, 1, 6]
+    ordered = longest_first(costs, lambda cost: cost)
+    assert ordered[0] == 6
+
+    groups = partition(ordered, lambda cost: cost, workers=2)
+    assert sorted(sum(group) for group in groups) == [6, 6]
+    assert partition([5], lambda cost: cost, workers=3) == [[5]]
+
+    assert makespan(costs, 2) == 9  # The large job starts last
+    assert makespan(ordered, 2) == 6
+    assert lpt_gain(costs, 2) == 1 - 6 / 9
+    assert lpt_gain([5] * 8, 4) == 0.0 and lpt_gain([], 4) == 0.0
+
+
+def test_schedule_benchmark_runs_both_schedules():
+    """Test that the benchmark parses the skewed corpus with both schedules and predicts a shorter lpt makespan."""
+    config = {"small": 3, "large": 1, "large_pages": 3, "workers": 2, "marker_latency": 0.0, "model_latency": 0.0}
+    page_counts = skewed_page_counts(3, 1, 3)
+    assert predicted_makespan(page_counts, 2, "lpt") < predicted_makespan(page_counts, 2, "fifo")
+
+    results = run_benchmark(config)
+
+    assert set(results["schedules"]) == {"fifo", "lpt"}
+    assert all(set(row["seconds"]) == {"marker", "enrich", "total"} for row in results["schedules"].values())
+
+
+def test_marker_is_split_only_for_skewed_page_counts(tmp_path):
+    """Test that "lpt" keeps one Marker process for even page counts and splits it when a long document comes last."""
+    make_corpus(tmp_path / "even", [2, 2, 2, 2])
+    make_corpus(tmp_path / "skewed", [1, 1, 1, 1, 1, 1, 8])
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with fake_tool_env(tmp_path / "bin") as tools:
+            split = {}
+            for corpus in ("even", "skewed"):
+                llamarker = LlaMarker(input_dir=str(tmp_path / corpus), marker_path=str(tools["marker"]))
+                llamarker.process_documents()
+                split[corpus] = llamarker._split_marker(sorted(llamarker.temp_dir.glob("*.pdf")), workers=2)
+                llamarker.file_converter.cleanup()
+    finally:
+        os.chdir(cwd)
+
+    assert split == {"even": False, "skewed": True}
@@ -0,0 +1,83 @@
+import os
+import urllib.error
+import urllib.request
+import pytest
+from llamarker.preview import InlinePreview, PreviewServer, _LinkRewriter, file_fingerprint, split_markdown_pages
+
+
+def test_split_markdown_pages_uses_marker_separators():
+    """Test that Marker's page separators split the document and empty pages are dropped."""
+    separator = "-" * 48
+    markdown = f"{{0}}{separator}\n\n# Title\n\n{{1}}{separator}\n\n\n{{2}}{separator}\n\nLast page\n"
+
+    assert split_markdown_pages(markdown) == ["# Title", "Last page"]
+
+
+def test_split_markdown_pages_chunks_at_blank_lines():
+    """Test that documents without separators are cut at paragraph boundaries near the size limit."""
+    paragraphs = [f"paragraph {i} " * 10 for i in range(10)]
+
+    pages = split_markdown_pages("\n\n".join(paragraphs), max_chars=300)
+
+    assert len(pages) > 1
+    assert all(len(page) <= 300 for page in pages)
+    assert "\n\n".join(pages) == "\n\n".join(paragraphs)
+    assert split_markdown_pages("") == [""]
+
+
+def test_file_fingerprint_changes_with_content(tmp_path):
+    """Test that rewriting a file changes its fingerprint."""
+    path = tmp_path / "doc.md"
+    path.write_text("one")
+    first = file_fingerprint(path)
+    path.write_text("three")
+    os.utime(path, ns=(first[2] + 1_000_000, first[2] + 1_000_000))
+
+    assert file_fingerprint(path) != first
+    assert file_fingerprint(path)[0] == str(path.resolve())
+
+
+def test_preview_server_serves_files_by_url(tmp_path):
+    """Test that files under the root are served, links are rewritten and nothing else is exposed."""
+    (tmp_path / "pics").mkdir()
+    (tmp_path / "pics" / "fig 1.png").write_bytes(b"png")
+    (tmp_path / "doc.pdf").write_bytes(b"%PDF")
+    server = PreviewServer(str(tmp_path))
+    try:
+        url = server.url_for(tmp_path / "doc.pdf")
+        with urllib.request.urlopen(url) as response:
+            assert response.read() == b"%PDF"
+            assert "max-age" in response.headers["Cache-Control"]
+
+        markdown = server.rewrite_links("[![x](pics/fig%201.png)](pics/missing.png) [site](https://example.com)", str(tmp_path))
+        assert markdown.startswith(f"[![x](http://{server.host}:{server.port}/pics/fig%201.png?v=")
+        assert markdown.endswith("(pics/missing.png) [site](https://example.com)")
+
+        with pytest.raises(ValueError):
+            server.url_for(tmp_path.parent)
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://{server.host}:{server.port}/pics/")
+    finally:
+        server.stop()
+
+
+def test_public_url_and_inline_fallback(tmp_path):
+    """Test that URLs use the configured public base URL, and that the inline preview embeds files as data URIs."""
+    (tmp_path / "pics").mkdir()
+    (tmp_path / "pics" / "fig.png").write_bytes(b"png")
+    server = PreviewServer(str(tmp_path), public_url="https://gui.example.com/preview/")
+    try:
+        assert server.url_for(tmp_path / "pics" / "fig.png").startswith("https://gui.example.com/preview/pics/fig.png?v=")
+    finally:
+        server.stop()
+
+    inline = InlinePreview(str(tmp_path))
+    assert inline.rewrite_links("![](pics/fig.png)", str(tmp_path)) == "![](data:image/png;base64,cG5n)"
+    with pytest.raises(ValueError):
+        inline.url_for(tmp_path.parent)
+
+    class Incomplete(_LinkRewriter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,42 @@
+import threading
+import time
+from llamarker.profiling import StageProfiler
+
+
+def busy_worker(seconds):
+    """Spins in a worker thread so the sampler sees it."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def test_stage_profile_covers_worker_threads(tmp_path):
+    """Test that each stage writes folded stacks including worker threads, cProfile stats and a summary."""
+    profiler = StageProfiler(str(tmp_path), sample_interval=0.001)
+    with profiler.stage("enrich"):
+        worker = threading.Thread(target=busy_worker, args=(0.2,), name="image-worker")
+        worker.start()
+        worker.join()
+    with profiler.stage("convert"):
+        busy_worker(0.05)
+
+    folded = (profiler.output_dir / "enrich.folded").read_text()
+    assert any(line.startswith("image-worker;") and "busy_worker" in line for line in folded.splitlines())
+    assert (profiler.output_dir / "enrich.prof").exists()
+    assert (profiler.output_dir / "convert.folded").exists()
+
+    report = profiler.report()
+    assert "Stage 'enrich'" in report and "Stage 'convert'" in report
+    assert (profiler.output_dir / "summary.txt").read_text().strip() == report.strip()
+
+
+def test_wrap_command_without_py_spy(tmp_path):
+    """Test that subprocess commands are left unchanged when py-spy is unavailable."""
+    profiler = StageProfiler(str(tmp_path))
+    profiler.py_spy = None
+    assert profiler.wrap_command("marker", ["marker", "in"]) == ["marker", "in"]
+
+    profiler.py_spy = "/usr/bin/py-spy"
+    wrapped = profiler.wrap_command("marker", ["marker", "in"])
+    assert wrapped[:3] == ["/usr/bin/py-spy", "record", "--subprocesses"]
+    assert wrapped[-3:] == ["--", "marker", "in"]
@@ -0,0 +1,54 @@
+from llamarker.results_store import ConversionResults, FigureResults, page_bucket
+
+
+def test_results_spill_to_disk_and_read_back_in_order(tmp_path):
+    """Test that records beyond the in-memory limit are spilled and still iterate and index in insertion order."""
+    results = ConversionResults(memory_records=4, spill_dir=str(tmp_path))
+    records = [(f"/tmp/doc_{index}.pdf", index % 7) for index in range(11)]
+    for record in records:
+        results.append(record)
+
+    assert len(results) == 11
+    assert len(results._paths) < 4  # Only the most recent records stay in memory
+    assert list(results) == records
+    assert results[0] == records[0] and results[5] == records[5] and results[-1] == records[-1]
+    assert results.total_pages == sum(pages for _, pages in records)
+    assert sum(results.histogram().values()) == 11
+    assert list(tmp_path.glob("llamarker_results_*.sqlite3"))
+    # Spilled and in-memory records are found by document name
+    assert results.pages(["doc_1", "doc_10", "doc_99"]) == {"doc_1": 1, "doc_10": 3}
+
+    results.close()
+    assert not list(tmp_path.glob("llamarker_results_*.sqlite3"))
+
+
+def test_histogram_buckets_and_report():
+    """Test that page counts fall into power-of-two buckets and that the report shows totals."""
+    assert [page_bucket(pages) for pages in (0, 1, 2, 3, 4, 7, 8, 100)] == ["0", "1", "2-3", "2-3", "4-7", "4-7", "8-15", "64-127"]
+    results = ConversionResults()
+    for pages in (1, 1, 3, 12):
+        results.append(("doc.pdf", pages))
+
+    assert results.histogram() == {"1": 2, "2-3": 1, "8-15": 1}
+    report = results.report()
+    assert report.splitlines()[0] == "4 documents, 17 pages"
+    assert "8-15 pages" in report
+    assert results and not ConversionResults()
+
+
+def test_figure_results_spill_and_are_released(tmp_path):
+    """Test that figure results beyond the in-memory limit are spilled, found by image name, and deleted on close."""
+    results = FigureResults(memory_records=3, spill_dir=str(tmp_path))
+    records = [{"image": f"_page_{index}_Figure_1.png", "is_logo": index == 0, "contains_info": index > 0, "extracted_info": f"text {index}"} for index in range(7)]
+    results.extend(iter(records))
+
+    assert len(results) == 7 and len(results._results) < 3
+    assert list(results) == records
+    assert results[1] == records[1] and results[-1] == records[-1]
+    assert results.get("_page_2_Figure_1.png") == records[2] and results.get("_page_6_Figure_1.png") == records[6]
+    assert results.get("missing.png") is None
+    assert (results.logos, results.with_info) == (1, 6)
+
+    results.close()
+    assert len(results) == 0 and list(results) == []
+    assert not list(tmp_path.glob("llamarker_results_*.sqlite3"))
@@ -0,0 +1,150 @@
+import threading
+import time
+from llamarker.scheduler import AIMDController, ModelCallScheduler, TokenBucket
+
+
+def test_concurrency_cap_is_respected():
+    """Test that no more than max_concurrency calls run at once."""
+    scheduler = ModelCallScheduler(max_concurrency=2)
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def model_call():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    threads = [threading.Thread(target=scheduler.call, args=(model_call,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+    assert scheduler.active == 0
+
+
+def test_token_bucket_limits_rate():
+    """Test that the token bucket only allows a burst before throttling."""
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert 0 < bucket.try_acquire() <= 0.1
+
+
+def test_rate_limited_calls_are_spaced():
+    """Test that calls beyond the burst wait for new tokens."""
+    scheduler = ModelCallScheduler(rate_limit=20, burst=1)
+    start = time.monotonic()
+    for _ in range(5):
+        scheduler.call(lambda: None)
+    assert time.monotonic() - start >= 0.18
+
+
+def test_priority_favors_started_documents_and_follow_up_roles():
+    """Test that waiting calls are admitted by document start order, then by agent role."""
+    scheduler = ModelCallScheduler(max_concurrency=1)
+    scheduler.register_document("first")
+    scheduler.register_document("second")
+    order = []
+
+    # Hold the only slot so every call below has to queue
+    scheduler.acquire()
+    waiting = [
+        ("second", "Translator"),
+        ("first", "Information Extractor"),
+        ("first", "QA Evaluator"),
+        ("second", "Information Extractor"),
+        ("first", "Translator"),
+    ]
+    threads = []
+    for document, role in waiting:
+        thread = threading.Thread(target=scheduler.call, args=(lambda d=document, r=role: order.append((d, r)),), kwargs={"document": document, "role": role})
+        thread.start()
+        threads.append(thread)
+    while len(scheduler._waiting) < len(waiting):
+        time.sleep(0.01)
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == [
+        ("first", "Translator"),
+        ("first", "QA Evaluator"),
+        ("first", "Information Extractor"),
+        ("second", "Translator"),
+        ("second", "Information Extractor"),
+    ]
+
+
+def test_finished_documents_are_forgotten():
+    """Test that finishing a document frees its entry and a reused name starts behind running documents."""
+    scheduler = ModelCallScheduler()
+    assert scheduler.register_document("doc") == 0
+    assert scheduler.register_document("other") == 1
+    scheduler.finish_document("doc")
+    assert "doc" not in scheduler._documents
+
+    assert scheduler.register_document("doc") == 2
+    assert scheduler.priority("other") < scheduler.priority("doc")
+
+
+def test_aimd_increases_while_within_targets():
+    """Test that the controller widens concurrency while saturated calls stay fast."""
+    scheduler = ModelCallScheduler()
+    controller = AIMDController(scheduler, max_concurrency=4, target_p95=1.0)
+    assert scheduler.max_concurrency == 1
+
+    for _ in range(40):
+        controller.record(latency=0.1, waited=0.5)
+
+    assert controller.limit == 4
+    assert scheduler.max_concurrency == 4
+
+
+def test_aimd_does_not_increase_when_unsaturated():
+    """Test that the cap is not raised when calls never wait for a slot."""
+    scheduler = ModelCallScheduler()
+    controller = AIMDController(scheduler, initial_concurrency=2, max_concurrency=8)
+
+    for _ in range(20):
+        controller.record(latency=0.1, waited=0.0)
+
+    assert controller.limit == 2
+
+
+def test_aimd_backs_off_on_slow_calls_and_timeouts():
+    """Test multiplicative decrease on latency above target and on timeouts."""
+    scheduler = ModelCallScheduler()
+    controller = AIMDController(scheduler, initial_concurrency=8, max_concurrency=8, target_p95=1.0)
+
+    for _ in range(8):
+        controller.record(latency=5.0, waited=0.0)
+    assert controller.limit == 4
+
+    for _ in range(4):
+        controller.record(latency=0.1, waited=0.0, error=True, timeout=True)
+    assert controller.limit == 2  # A burst of timeouts only backs off once
+    assert scheduler.max_concurrency == 2
+
+
+def test_scheduler_reports_timeouts_to_controller():
+    """Test that scheduled calls feed latency and timeouts into the controller."""
+    scheduler = ModelCallScheduler()
+    controller = AIMDController(scheduler, initial_concurrency=4, max_concurrency=4)
+
+    def timed_out():
+        raise TimeoutError("model call timed out")
+
+    for _ in range(4):
+        try:
+            scheduler.call(timed_out)
+        except TimeoutError:
+            pass
+
+    assert controller.limit == 2
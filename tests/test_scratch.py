@@ -0,0 +1,63 @@
+import os
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.main import LlaMarker
+from llamarker.scratch import ScratchSpace
+
+
+def test_ram_cap_falls_back_to_disk(tmp_path):
+    """Test that files go to RAM until the cap is reached, then to disk, always under their stable path."""
+    (tmp_path / "ram").mkdir()
+    (tmp_path / "disk").mkdir()
+    scratch = ScratchSpace(tmp_path / "disk", ram_limit=100, ram_dir=str(tmp_path / "ram"))
+
+    first_dir = scratch.output_dir(60)
+    assert scratch.ram_root in first_dir.parents
+    (first_dir / "a.pdf").write_bytes(b"a" * 60)
+    first = scratch.admit(first_dir / "a.pdf")
+    assert first == tmp_path / "disk" / "a.pdf" and first.is_symlink() and first.read_bytes() == b"a" * 60
+    assert scratch.output_dir(60) == tmp_path / "disk"  # Would exceed the cap
+
+    # A file larger than expected is moved to disk when admitted
+    second_dir = scratch.output_dir(10)
+    (second_dir / "b.pdf").write_bytes(b"b" * 50)
+    second = scratch.admit(second_dir / "b.pdf")
+    assert not second.is_symlink() and second.read_bytes() == b"b" * 50 and not second_dir.exists()
+    assert (scratch.ram_used, scratch.spilled) == (60, 1)
+
+    scratch.release(first)
+    assert not first.exists() and scratch.ram_used == 0 and not list(scratch.ram_root.iterdir())
+
+    third_dir = scratch.output_dir(10)
+    (third_dir / "c.pdf").write_bytes(b"c" * 10)
+    third = scratch.admit(third_dir / "c.pdf")
+    scratch.close(persist=True)
+    assert not third.is_symlink() and third.read_bytes() == b"c" * 10
+    assert not list((tmp_path / "ram").iterdir())
+
+
+def test_pipeline_deletes_each_pdf_after_marker(tmp_path):
+    """Test that converted PDFs live in RAM and are deleted as soon as Marker has parsed them."""
+    make_corpus(tmp_path / "input", [1, 2])
+    (tmp_path / "ram").mkdir()
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            llamarker = LlaMarker(input_dir=str(tmp_path / "input"), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host], checkpoint=True, scratch_ram=1024 * 1024, scratch_ram_dir=str(tmp_path / "ram"))
+            llamarker.process_documents()
+            pdfs = sorted(llamarker.temp_dir.glob("*.pdf"))
+            assert len(pdfs) == 2 and all(pdf.is_symlink() for pdf in pdfs)
+            assert llamarker.scratch.ram_used > 0
+
+            llamarker.parse_with_marker(workers=1)
+            assert not list(llamarker.temp_dir.glob("*.pdf")) and llamarker.scratch.ram_used == 0
+            assert llamarker.checkpoint.is_done("doc_0001", "marker")
+
+            llamarker.process_subdirectories(model="stub", qa_evaluator=False)
+            llamarker.results_sink.close()
+    finally:
+        os.chdir(cwd)
+
+    assert sorted(path.name for path in (tmp_path / "output" / "ParsedFiles").glob("*.md")) == ["doc_0000.md", "doc_0001.md"]
+    assert not list((tmp_path / "ram").iterdir())
@@ -0,0 +1,59 @@
+import os
+from benchmarks.harness import fake_tool_env
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.main import LlaMarker
+from llamarker.selective_ocr import classify_pages, merge_parts, split_pages
+
+
+def test_merge_parts_restores_page_order(tmp_path):
+    """Test that the pages and figures of two parts are merged back under their original page numbers."""
+    separator = "-" * 48
+    text_dir, ocr_dir = tmp_path / "text" / "doc", tmp_path / "ocr" / "doc"
+    text_dir.mkdir(parents=True)
+    ocr_dir.mkdir(parents=True)
+    (text_dir / "doc.md").write_text(f"{{0}}{separator}\n\nFirst\n\n{{1}}{separator}\n\nThird ![](_page_1_Figure_1.png)\n", encoding="utf-8")
+    (text_dir / "_page_1_Figure_1.png").write_bytes(b"png")
+    (ocr_dir / "doc.md").write_text(f"{{0}}{separator}\n\nSecond ![](_page_0_Figure_1.png)\n", encoding="utf-8")
+    (ocr_dir / "_page_0_Figure_1.png").write_bytes(b"png")
+
+    assert split_pages("Title\n" + (text_dir / "doc.md").read_text(encoding="utf-8"))[0] == (0, "Title\n\nFirst")
+
+    markdown_file = merge_parts("doc", [(text_dir, [0, 2]), (ocr_dir, [1])], tmp_path / "out", paginate=True)
+
+    text = markdown_file.read_text(encoding="utf-8")
+    assert text.index("First") < text.index("Second") < text.index("Third")
+    assert "![](_page_1_Figure_1.png)" in text and "![](_page_2_Figure_1.png)" in text
+    assert [page for page, _ in split_pages(text)] == [0, 1, 2]
+    assert sorted(path.name for path in (tmp_path / "out").glob("*.png")) == ["_page_1_Figure_1.png", "_page_2_Figure_1.png"]
+
+
+def test_pipeline_ocrs_only_scanned_pages(tmp_path):
+    """Test that only the scanned page of a mixed document is OCR'd and the document is merged back together."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "mixed.docx").write_text("pages: 3\nscanned: 2\n", encoding="utf-8")
+    (input_dir / "digital.docx").write_text("pages: 2\n", encoding="utf-8")
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            llamarker = LlaMarker(input_dir=str(input_dir), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), ollama_hosts=[stub.host], selective_ocr=True)
+            llamarker.process_documents()
+            assert classify_pages(llamarker.temp_dir / "mixed.pdf") == [False, True, False]
+            assert not any(classify_pages(llamarker.temp_dir / "digital.pdf"))
+
+            llamarker.parse_with_marker(workers=2)
+            assert not (llamarker.temp_dir / "selective_ocr").exists()
+
+            llamarker.process_subdirectories(model="stub", qa_evaluator=False)
+            llamarker.results_sink.close()
+    finally:
+        os.chdir(cwd)
+
+    parsed = tmp_path / "output" / "ParsedFiles"
+    mixed = (parsed / "mixed.md").read_text(encoding="utf-8")
+    assert "Synthetic text for page 1 of mixed." in mixed
+    assert "OCR text for page 1 of mixed." in mixed  # First page of the scanned part
+    assert mixed.index("page 1 of mixed") < mixed.index("OCR text") < mixed.index("Synthetic text for page 2 of mixed.")
+    assert "OCR text" not in (parsed / "digital.md").read_text(encoding="utf-8")
+    assert sorted(path.name for path in (parsed / "pics").glob("mixed_page_*")) == ["mixed_page_0_Figure_1.png", "mixed_page_1_Figure_1.png", "mixed_page_2_Figure_1.png"]
@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+import pytest
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.server import TERMINAL_STATUSES, IngestService, JobStore, ServiceHTTPServer
+
+
+def test_job_store_claims_in_order_and_requeues_after_restart(tmp_path):
+    """Test that queued jobs are claimed oldest first and running jobs survive a restart as queued."""
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create("a", "a.docx", {"model": None})
+    store.create("b", "b.docx", {})
+    assert store.claim_next()["id"] == "a"
+    store.update_progress("a", {"stages": {"convert": {"status": "done"}}})
+    assert store.cancel_queued("b")
+    assert store.claim_next() is None
+    store.close()
+
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    assert store.get("a")["status"] == "running"
+    assert store.requeue_interrupted() == 1
+    job = store.claim_next()
+    assert job["id"] == "a" and job["progress"] == {} and job["options"] == {"model": None}
+    assert store.get("b")["status"] == "cancelled"
+    store.close()
+
+
+def test_service_parses_submitted_document(tmp_path):
+    """Test submitting a document over HTTP, streaming its progress and fetching the Markdown."""
+    make_corpus(tmp_path / "corpus", [2])
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            service = IngestService(tmp_path / "state", model="stub", marker_path=str(tools["marker"]), ollama_hosts=[stub.host], in_process_marker=False)
+            service.start()
+            server = ServiceHTTPServer(service, port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                body = (tmp_path / "corpus" / "doc_0000.docx").read_bytes()
+                request = urllib.request.Request(f"{server.url}/jobs?filename=doc_0000.docx", data=body, method="POST")
+                with urllib.request.urlopen(request) as response:
+                    assert response.status == 202
+                    job_id = json.load(response)["id"]
+
+                with urllib.request.urlopen(f"{server.url}/jobs/{job_id}/events", timeout=30) as response:
+                    events = [json.loads(line) for line in response]
+                assert events[-1]["status"] == "done", events[-1]
+                assert events[-1]["documents"] == ["doc_0000"]
+
+                with urllib.request.urlopen(f"{server.url}/jobs/{job_id}/documents/doc_0000") as response:
+                    assert response.headers["Content-Type"].startswith("text/markdown")
+                    assert response.read()
+                with urllib.request.urlopen(f"{server.url}/health") as response:
+                    assert json.load(response)["queued"] == 0
+
+                # The inputs go when the job ends, the outputs once the job has expired
+                assert not (tmp_path / "state" / "jobs" / job_id / "input").exists()
+                assert service.expire_jobs() == 0
+                assert service.expire_jobs(now=time.time() + service.job_retention + 1) == 1
+                assert not (tmp_path / "state" / "jobs" / job_id).exists()
+                with pytest.raises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(f"{server.url}/jobs/{job_id}")
+                assert error.value.code == 404
+
+                with pytest.raises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(urllib.request.Request(f"{server.url}/jobs?filename=empty.docx", data=b"", method="POST"))
+                assert error.value.code == 400
+                assert service.store.list() == []
+            finally:
+                server.shutdown()
+                server.server_close()
+                service.stop()
+    finally:
+        os.chdir(cwd)
+
+
+def test_job_with_failed_documents_is_not_done(tmp_path):
+    """Test that a job reports "partial" with the failed documents when one of its documents cannot be converted."""
+    make_corpus(tmp_path / "corpus", [1])
+    (tmp_path / "corpus" / "broken.docx").write_text("corrupt\n", encoding="utf-8")
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for path in sorted((tmp_path / "corpus").iterdir()):
+            zf.write(path, path.name)
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            service = IngestService(tmp_path / "state", model="stub", marker_path=str(tools["marker"]), ollama_hosts=[stub.host], in_process_marker=False)
+            service.start()
+            try:
+                job_id = service.submit("batch.zip", io.BytesIO(archive.getvalue()), len(archive.getvalue()), {})["id"]
+                deadline = time.monotonic() + 30
+                while service.status(job_id)["status"] not in TERMINAL_STATUSES and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                job = service.status(job_id)
+            finally:
+                service.stop()
+    finally:
+        os.chdir(cwd)
+
+    assert job["status"] == "partial", job
+    assert job["error"] == "1 of 2 document(s) did not finish: broken"
+    assert job["documents"] == ["doc_0000"]
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.shard import ShardWorker, WorkQueue
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_leases_are_exclusive_and_reclaimed_after_expiry(tmp_path):
+    """Test that two workers never hold the same document and that a dead worker's lease is taken over."""
+    make_corpus(tmp_path / "input", [1, 1])
+    first = WorkQueue(tmp_path / "shared", worker_id="a", lease_seconds=60)
+    second = WorkQueue(tmp_path / "shared", worker_id="b", lease_seconds=60)
+    assert len(first.load_worklist(tmp_path / "input")) == 2
+    assert second.load_worklist(tmp_path / "input") == first.documents
+
+    [claimed_a] = first.claim(1)
+    [claimed_b] = second.claim(5)
+    assert claimed_a != claimed_b
+    assert second.claim(5) == []
+
+    # Worker "a" stops sending heartbeats
+    lease = tmp_path / "shared" / "leases" / f"{claimed_a['id']}.lease"
+    os.utime(lease, (lease.stat().st_atime - 120, lease.stat().st_mtime - 120))
+    assert second.claim(5) == [claimed_a]
+    second.complete(claimed_a["id"], {"status": "done"})
+    assert first.remaining() == 1
+    assert not lease.exists()
+
+
+def test_worker_processes_share_one_corpus(tmp_path):
+    """Test that several worker processes split the documents, take over a dead worker's lease and write one summary."""
+    make_corpus(tmp_path / "input", [1, 2, 1, 1, 2])
+    # A worker that died while holding the first document
+    dead_id = hashlib.sha1(b"doc_0000.docx").hexdigest()[:16]
+    (tmp_path / "shared" / "leases").mkdir(parents=True)
+    (tmp_path / "shared" / "leases" / f"{dead_id}.lease").write_text("ghost")
+    os.utime(tmp_path / "shared" / "leases" / f"{dead_id}.lease", (0, 0))
+
+    with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+        env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-m", "llamarker.main", "--directory", str(tmp_path / "input"), "--output", str(tmp_path / "output"),
+                 "--shard_dir", str(tmp_path / "shared"), "--worker_id", f"w{index}", "--shard_batch", "1", "--lease_seconds", "30",
+                 "--marker_path", str(tools["marker"]), "--ollama_hosts", stub.host, "--model", "stub"],
+                cwd=tmp_path, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+            )
+            for index in range(3)
+        ]
+        outputs = [worker.communicate(timeout=120)[0] for worker in workers]
+    assert [worker.returncode for worker in workers] == [0, 0, 0], outputs
+
+    summary = json.loads((tmp_path / "output" / "summary.json").read_text())
+    assert (summary["documents"], summary["done"], summary["failed"], summary["pages"]) == (5, 5, 0, 7)
+    assert sum(summary["workers"].values()) == 5
+    assert sorted(path.name for path in (tmp_path / "output" / "ParsedFiles").glob("*.md")) == [f"doc_{index:04d}.md" for index in range(5)]
+    assert not list((tmp_path / "shared" / "leases").iterdir())
+
+
+def test_documents_with_the_same_name_fail_explicitly(tmp_path):
+    """Test that a second document with an already used name is failed instead of crashing the worker or overwriting outputs."""
+    for folder, index in (("a", 0), ("b", 0), ("c", 1)):
+        (tmp_path / "input" / folder).mkdir(parents=True)
+        (tmp_path / "input" / folder / f"doc_{index:04d}.docx").write_text("pages: 1\n", encoding="utf-8")
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            worker = ShardWorker(input_dir=str(tmp_path / "input"), output_dir=str(tmp_path / "output"), shard_dir=str(tmp_path / "shared"), batch_size=4, marker_path=str(tools["marker"]), model="stub", ollama_hosts=[stub.host])
+            summary = worker.run()
+    finally:
+        os.chdir(cwd)
+
+    assert (summary["documents"], summary["done"], summary["failed"]) == (3, 2, 1)
+    [failed] = [outcome for outcome in summary["outcomes"] if outcome["status"] == "failed"]
+    assert failed["path"] == "b/doc_0000.docx" and "a/doc_0000.docx" in failed["error"]
+    assert sorted(path.name for path in (tmp_path / "output" / "ParsedFiles").glob("*.md")) == ["doc_0000.md", "doc_0001.md"]
+
+
+def test_reclaimed_lease_is_left_to_its_new_owner(tmp_path):
+    """Test that a worker whose lease was taken over neither renews nor releases it, and drops its results for that document."""
+    make_corpus(tmp_path / "input", [1, 1])
+    first = WorkQueue(tmp_path / "shared", worker_id="a", lease_seconds=60)
+    second = WorkQueue(tmp_path / "shared", worker_id="b", lease_seconds=60)
+    first.load_worklist(tmp_path / "input")
+    second.load_worklist(tmp_path / "input")
+    [claimed] = first.claim(1)
+    lease = tmp_path / "shared" / "leases" / f"{claimed['id']}.lease"
+    os.utime(lease, (0, 0))
+    assert second.claim(1) == [claimed]
+    os.utime(lease, (0, 0))
+
+    assert first.renew([claimed["id"]]) == [claimed["id"]]
+    first.release(claimed["id"])
+    assert lease.stat().st_mtime == 0 and second.owns(claimed["id"]) and not first.owns(claimed["id"])
+    assert second.renew([claimed["id"]]) == []
+    assert lease.stat().st_mtime > 0
+
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            worker = ShardWorker(input_dir=str(tmp_path / "input"), output_dir=str(tmp_path / "output"), shard_dir=str(tmp_path / "shared"), worker_id="a", marker_path=str(tools["marker"]), model="stub", ollama_hosts=[stub.host])
+            worker.queue.load_worklist(tmp_path / "input")
+            [own] = worker.queue.claim(1)
+            worker.process_batch([claimed, own])
+    finally:
+        os.chdir(cwd)
+
+    assert not first.is_done(claimed["id"]) and second.owns(claimed["id"])
+    assert first.is_done(own["id"])
+    own_stem = Path(own["path"]).stem
+    assert [path.name for path in (tmp_path / "output" / "ParsedFiles").glob("*.md")] == [f"{own_stem}.md"]
+    assert all(path.name.startswith(f"{own_stem}_") for path in (tmp_path / "output" / "ParsedFiles" / "pics").iterdir())
@@ -0,0 +1,64 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from llamarker.tracing import NullTracer, Tracer, bind_context, get_tracer, set_tracer
+
+
+def read_spans(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_spans_nest_across_threads_and_documents(tmp_path):
+    """Test that child spans keep their parent across thread pools and documents get their own trace."""
+    tracer = Tracer(str(tmp_path / "trace.jsonl"))
+    set_tracer(tracer)
+    try:
+        def enrich(document):
+            with tracer.span("document", trace_id=tracer.document_trace_id(document), document=document):
+                with tracer.span("model_call", role="Translator"):
+                    pass
+
+        with tracer.span("stage", stage="enrich"):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(bind_context(enrich), ["a", "b"]))
+        tracer.close()
+    finally:
+        set_tracer(None)
+
+    spans = read_spans(tmp_path / "trace.jsonl")
+    stage = next(span for span in spans if span["name"] == "stage")
+    documents = {span["attributes"]["document"]: span for span in spans if span["name"] == "document"}
+    calls = [span for span in spans if span["name"] == "model_call"]
+
+    assert stage["traceId"] == tracer.run_trace_id and stage["parentSpanId"] is None
+    assert documents["a"]["traceId"] == tracer.document_trace_id("a") != documents["b"]["traceId"]
+    # Document traces link back to the stage that processed them
+    assert documents["a"]["links"] == [{"traceId": stage["traceId"], "spanId": stage["spanId"]}]
+    assert sorted(call["parentSpanId"] for call in calls) == sorted(span["spanId"] for span in documents.values())
+    assert all(call["traceId"] in {documents["a"]["traceId"], documents["b"]["traceId"]} for call in calls)
+
+
+def test_span_records_errors(tmp_path):
+    """Test that an exception marks the span as failed and is re-raised."""
+    tracer = Tracer(str(tmp_path / "trace.jsonl"))
+    try:
+        with tracer.span("subprocess", tool="soffice"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    tracer.close()
+
+    span = read_spans(tmp_path / "trace.jsonl")[0]
+    assert span["status"] == {"code": "ERROR"}
+    assert span["attributes"] == {"tool": "soffice", "exception": "RuntimeError: boom"}
+
+
+def test_tracing_disabled_by_default():
+    """Test that the default tracer records nothing and leaves functions unwrapped."""
+    assert isinstance(get_tracer(), NullTracer)
+
+    def fn():
+        pass
+
+    assert bind_context(fn) is fn
+    with get_tracer().span("stage", stage="convert") as span:
+        span.set_attributes(pages=1)
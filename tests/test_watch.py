@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import pytest
+from benchmarks.harness import fake_tool_env, make_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from llamarker.watch import DirectoryWatcher, FolderWatchProcessor, fingerprint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_watcher_debounces_and_reports_only_changes(tmp_path):
+    """Test that files are reported once unchanged for the debounce period, and again only when modified."""
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "ignored.pdf").write_text("x")
+    (tmp_path / "~$lock.docx").write_text("x")
+    document = tmp_path / "a.docx"
+    document.write_text("first")
+    clock = FakeClock()
+    watcher = DirectoryWatcher(tmp_path, debounce=5.0, poll_interval=0.0, exclude=[tmp_path / "out"], use_inotify=False, clock=clock)
+
+    assert watcher.poll(0) == []
+    clock.now = 3.0
+    document.write_text("first, still copying")
+    assert watcher.poll(0) == []
+    clock.now = 7.0
+    assert watcher.poll(0) == []
+    clock.now = 8.0
+    assert watcher.poll(0) == [document.resolve()]
+
+    watcher.mark_processed(document.resolve(), fingerprint(document))
+    clock.now = 20.0
+    assert watcher.poll(0) == []
+    document.write_text("second version")
+    assert watcher.poll(0) == []
+    clock.now = 25.0
+    assert watcher.poll(0) == [document.resolve()]
+    watcher.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_watcher_picks_up_files_in_new_folders(tmp_path):
+    """Test that inotify events, including files in folders created after the watch started, are reported."""
+    watcher = DirectoryWatcher(tmp_path, debounce=0.05, poll_interval=0.1)
+    (tmp_path / "inbox").mkdir()
+    (tmp_path / "inbox" / "b.txt").write_text("hello")
+    ready = []
+    deadline = time.monotonic() + 5
+    while not ready and time.monotonic() < deadline:
+        ready = watcher.poll(0.1)
+    assert ready == [(tmp_path / "inbox" / "b.txt").resolve()]
+    watcher.close()
+
+
+def test_folder_watch_processes_only_new_documents(tmp_path):
+    """Test that each batch adds to ParsedFiles and that processed documents are skipped after a restart."""
+    make_corpus(tmp_path / "inbox", [1, 1])
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            options = dict(input_dir=str(tmp_path / "inbox"), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), model="stub", ollama_hosts=[stub.host], debounce=0.0, use_inotify=False, in_process_marker=False)
+            processor = FolderWatchProcessor(**options)
+            assert len(processor.process_batch(processor.watcher.poll(0))) == 2
+
+            make_corpus(tmp_path / "new", [1])
+            os.replace(tmp_path / "new" / "doc_0000.docx", tmp_path / "inbox" / "late.docx")
+            assert [path.name for path in processor.watcher.poll(0)] == ["late.docx"]
+            processor.process_batch([tmp_path.resolve() / "inbox" / "late.docx"])
+            processor.close()
+
+            assert sorted(path.name for path in (tmp_path / "output" / "ParsedFiles").glob("*.md")) == ["doc_0000.md", "doc_0001.md", "late.md"]
+            restarted = FolderWatchProcessor(**options)
+            assert restarted.watcher.poll(0) == []
+            restarted.close()
+    finally:
+        os.chdir(cwd)
+
+
+def test_folder_watch_keeps_pdfs_of_earlier_batches(tmp_path):
+    """Test that with save_pdfs each batch adds its PDFs to PDFs/ instead of replacing those of earlier batches."""
+    make_corpus(tmp_path / "inbox", [1])
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        with StubOllamaServer(latency=0.0) as stub, fake_tool_env(tmp_path / "bin") as tools:
+            processor = FolderWatchProcessor(input_dir=str(tmp_path / "inbox"), output_dir=str(tmp_path / "output"), marker_path=str(tools["marker"]), model="stub", ollama_hosts=[stub.host], save_pdfs=True, debounce=0.0, use_inotify=False, in_process_marker=False)
+            assert len(processor.process_batch(processor.watcher.poll(0))) == 1
+
+            make_corpus(tmp_path / "new", [1])
+            os.replace(tmp_path / "new" / "doc_0000.docx", tmp_path / "inbox" / "late.docx")
+            assert len(processor.process_batch(processor.watcher.poll(0))) == 1
+            processor.close()
+    finally:
+        os.chdir(cwd)
+
+    assert sorted(path.name for path in (tmp_path / "output" / "PDFs").iterdir()) == ["doc_0000.pdf", "late.pdf"]